@@ -0,0 +1,95 @@
+"""
+缓存键统一写法的命中率对比
+
+按真实调用中常见的写法差异（symbol 大小写、港股/沪市后缀、日期补零、interval/freq 大小写与别名、
+位置参数与关键字参数、省略默认参数）生成请求序列，分别用原始参数缓存键和统一写法的缓存键回放，
+统计命中率和访问上游的次数。被缓存的函数与 src/api/ticker.py 中的函数签名相同，只记录调用，不访问上游。
+
+python benchmark.py [请求数]
+"""
+import sys
+import random
+from src.common.cache import cache
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA', '0700.HK', '9988.HK', '601398.SS', '600519.SS']
+DATES = [('2025-06-02', '2025-07-01'), ('2025-01-02', '2025-07-01'), ('2024-07-01', '2025-07-01')]
+INTERVALS = ['1d', '1wk', '60m']
+
+
+def symbol_spellings(symbol: str) -> list:
+    spellings = [symbol, symbol.lower()]
+    code, _, suffix = symbol.partition('.')
+    if suffix == 'HK':
+        spellings += [f"{code.lstrip('0')}.HK", f"0{code}.hk"]
+    if suffix == 'SS':
+        spellings += [f"{code}.SH", f"{code}.ss"]
+    return spellings
+
+
+def date_spellings(value: str) -> list:
+    year, month, day = value.split('-')
+    return [value, f"{year}-{int(month)}-{int(day)}", f"{year}/{month}/{day}"]
+
+
+def interval_spellings(interval: str) -> list:
+    return {'1d': ['1d', '1D'], '1wk': ['1wk', '1W', '1WK'], '60m': ['60m', '1h', '1H']}[interval]
+
+
+def make_requests(count: int, seed: int = 0) -> list:
+    """生成请求序列：(函数名, args, kwargs)，每个请求随机选择一种写法"""
+    rand = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        symbol = rand.choice(symbol_spellings(rand.choice(SYMBOLS)))
+        kind = rand.random()
+        if kind < 0.5:
+            start_date, end_date = rand.choice(DATES)
+            interval = rand.choice(interval_spellings(rand.choice(INTERVALS)))
+            args = (symbol, interval, rand.choice(date_spellings(start_date)), rand.choice(date_spellings(end_date)))
+            requests.append(('prices', args, {}))
+        else:
+            freq = rand.choice([None, 'yearly', 'Yearly', 'annual'])
+            if freq is None:
+                requests.append(('income_stmt', (symbol,), {}))
+            elif rand.random() < 0.5:
+                requests.append(('income_stmt', (symbol, freq), {}))
+            else:
+                requests.append(('income_stmt', (symbol,), {'freq': freq}))
+    return requests
+
+
+def replay(requests: list, canonical: bool) -> dict:
+    upstream_calls = []
+
+    @cache(timeout=60*60, canonical=canonical)
+    def get_ticker_prices(symbol: str, interval: str, start_date: str, end_date: str):
+        upstream_calls.append(('prices', symbol, interval, start_date, end_date))
+        return [symbol]
+
+    @cache(timeout=60*60*24, canonical=canonical)
+    def get_income_stmt(symbol: str, freq="yearly"):
+        upstream_calls.append(('income_stmt', symbol, freq))
+        return [symbol]
+
+    functions = {'prices': get_ticker_prices, 'income_stmt': get_income_stmt}
+    for name, args, kwargs in requests:
+        functions[name](*args, **kwargs)
+
+    hits = sum(func.cache_info().hits for func in functions.values())
+    return {
+        'requests': len(requests),
+        'hits': hits,
+        'hit_rate': hits / len(requests),
+        'upstream_calls': len(upstream_calls),
+        'distinct_upstream_calls': len(set(upstream_calls)),
+    }
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    requests = make_requests(count)
+    print(f"{'cache key':<12}{'requests':>10}{'hits':>8}{'hit rate':>10}{'upstream':>10}{'distinct':>10}")
+    for label, canonical in (('raw', False), ('canonical', True)):
+        result = replay(requests, canonical)
+        print(f"{label:<12}{result['requests']:>10}{result['hits']:>8}{result['hit_rate']:>10.1%}"
+              f"{result['upstream_calls']:>10}{result['distinct_upstream_calls']:>10}")
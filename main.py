@@ -1,15 +1,34 @@
 from dotenv import load_dotenv
 import os
+import sys
+import threading
 load_dotenv()
 
-from typing import Optional
+# 最先导入，开启 STARTUP_PROFILE 时记录之后每个模块的导入时间
+from src.common import startup
+
+from typing import Literal, Optional
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, Header, Depends, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, PlainTextResponse, StreamingResponse
 from fastapi_mcp import FastApiMCP
-from src.common.fastapi_util import success, exception_handler, BaseResponse
-from src.api.ticker import get_ticker_info, get_ticker_prices, get_ticker_news, get_income_stmt, get_balance_sheet, get_cash_flow, get_insider_transactions, get_insider_roster_holders, get_insider_purchases, get_financial_metrics, lookup_ticker, get_financial_items
+from starlette.concurrency import run_in_threadpool
+from src.common.fastapi_util import success, exception_handler, export_response, fields_query, BaseResponse
+from src.common.clients import get_client
+from src.common.scheduler import fetch, scheduler, request_client
+from src.common.admission import admission
+from src.common.cache import cache_usage, cache_entries, cache_invalidate, prefetchable_functions, start_invalidation_sync
+from src.common.errors import DataError, NoDataError
+from src.common.profiling import ProfileMiddleware, profiler, start_requested
+from src.common.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from src.common.quote_stream import QuoteHub, stream_quotes, STREAM_MAX_SYMBOLS
+from src.common.peer_stats import peer_stats, latest_metrics
+from src.common.canonical import canonical_symbol
 from src.models.ticker_info_model import TickerInfo
 from src.models.ticker_prices_model import TickerPriceItem
+from src.models.ticker_corporate_actions_model import CorporateActionItem
+from src.models.ticker_indicators_model import TickerIndicatorItem
 from src.models.ticker_news_model import NewsItem
 from src.models.ticker_income_stmt_model import IncomeStmtItem
 from src.models.ticker_balance_sheet_model import BalanceSheetItem
@@ -20,11 +39,25 @@ from src.models.ticker_insider_purchases_model import InsiderPurchaseItem
 from src.models.ticker_financial_metrics_model import FinancialMetricItem
 from src.models.ticker_financial_items_model import FinancialItem
 from src.models.ticker_lookup_model import LookupItem
+from src.models.ticker_quote_model import QuoteItem
+from src.models.ticker_peers_model import PeerComparisonItem
+from src.models.cache_usage_model import CacheUsageItem
+from src.models.cache_control_model import CacheEntryItem, CacheInvalidateItem, CachePrefetchItem
+from src.models.client_usage_model import ClientUsageItem
+from src.models.admission_usage_model import AdmissionUsageItem
+from src.models.profile_model import ProfileItem
+from src.models.loop_monitor_model import LoopMonitorInfo
+import asyncio
 import uvicorn
 
+# 只在处理数据请求时需要的重量级依赖（pandas、yfinance 等）延迟导入，启动后在后台线程中预先导入
+ticker = startup.lazy_import('src.api.ticker')
+price_archive = startup.lazy_import('src.common.price_archive')
+export_util = startup.lazy_import('src.common.export_util')
+startup.mark('imports')
+
+quote_hub = QuoteHub(lambda symbol: ticker.get_ticker_quote(symbol))
 
-# Get the valid token from environment variable or use default
-VALID_TOKEN = os.getenv("API_TOKEN", "secret-token")
 
 async def verify_token(authorization: str = Header(None),
                        authentication: str = Header(None),
@@ -33,7 +66,7 @@ async def verify_token(authorization: str = Header(None),
                        x_token: str = Header(None),
                        token: str = Header(None),
                        request: Request = None):
-    """Verify the authorization token from the request header"""
+    """Verify the authorization token from the request header and identify the client"""
     # Skip authorization for MCP routes and docs
     if request and (request.url.path.startswith("/mcp") or 
                     request.url.path.startswith("/sse") or
@@ -51,7 +84,8 @@ async def verify_token(authorization: str = Header(None),
     # Check if token is valid (format: "Bearer <token>")
     try:
         token_type, token = auth_str.split(" ")
-        if token_type != "Bearer" or token != VALID_TOKEN:
+        client = get_client(token) if token_type == "Bearer" else None
+        if client is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authorization token",
@@ -62,10 +96,36 @@ async def verify_token(authorization: str = Header(None),
             detail="Invalid authorization header format",
         )
     
+    request.state.client = client
+    return True
+
+
+async def verify_admin(request: Request):
+    """Allow only clients configured with admin access to call the admin endpoints"""
+    client = getattr(request.state, 'client', None)
+    if client is None or not client.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
     return True
 
 
-app = FastAPI(title="Aostock financial data API", version="1.0", description="Aostock financial data API. All API endpoints require authorization via the 'Authorization: Bearer <token>' header. The default token is 'secret-token' but can be overridden with the API_TOKEN environment variable.", dependencies=[Depends(verify_token)])
+async def start_profile(request: Request):
+    """Start sampling a request that asked for a profile, once verify_token has identified its client"""
+    start_requested(request.state)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=startup.warm_up, name="warm-up", daemon=True).start()
+    loop_monitor.start()
+    start_invalidation_sync()
+    peer_stats.start(lambda symbol: ticker.get_ticker_info(symbol), lambda symbol: ticker.get_financial_metrics(symbol))
+    yield
+
+
+app = FastAPI(title="Aostock financial data API", version="1.0", description="Aostock financial data API. All API endpoints require authorization via the 'Authorization: Bearer <token>' header. The default token is 'secret-token' but can be overridden with the API_TOKEN environment variable.", dependencies=[Depends(verify_token), Depends(start_profile)], lifespan=lifespan)
 
 # Add CORS middleware for remote access
 app.add_middleware(
@@ -74,8 +134,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id", "X-Missing-Symbols"],
 )
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(LoopMonitorMiddleware)
 
+@app.exception_handler(DataError)
 @app.exception_handler(Exception)
 async def general_exception_handler(request, e: Exception):
     """Global exception handler for the FastAPI application.
@@ -87,7 +151,7 @@ async def general_exception_handler(request, e: Exception):
     Returns:
         A standardized error response
     """
-    return exception_handler(request, e)
+    return await exception_handler(request, e)
 
 
 @app.get("/api/v1/test", operation_id="get_test", tags=["Test"], summary="Test", description="Test endpoint", response_model=BaseResponse)
@@ -99,194 +163,378 @@ async def test():
 @app.get("/api/v1/ticker/info", operation_id="get_ticker_info", tags=["Ticker"], summary="Ticker Info",
 description="Get ticker info",
 response_model=BaseResponse[TickerInfo])
-async def ticker_info(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS")):
+async def ticker_info(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    fields: Optional[set] = fields_query(TickerInfo)):
     """Get information about a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get information for (e.g., AAPL, 601398.SS)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         Ticker information including company name, sector, industry, etc.
     """
-    data = get_ticker_info(symbol)
-    return success(data)
+    data = await fetch(request, ticker.get_ticker_info, symbol)
+    return success(data, fields)
+
+
+@app.get("/api/v1/ticker/quote", operation_id="get_ticker_quote", tags=["Ticker"], summary="Ticker Quote",
+description="Get the latest quote of one or more tickers",
+response_model=BaseResponse[list[QuoteItem]])
+async def ticker_quote(request: Request, response: Response, symbols: str = Query(..., description="Comma separated ticker symbols, eg: AAPL,601398.SS"),
+    fields: Optional[set] = fields_query(QuoteItem)):
+    """Get the latest quote (price, change, session range, volume, market cap) of one or more ticker symbols.
+    
+    Quotes are cached for a few seconds only, and concurrent requests for the same symbol share one upstream call.
+    
+    Args:
+        symbols: Comma separated ticker symbols (e.g., AAPL,601398.SS)
+        fields: Comma separated fields to return (default: all fields)
+        
+    Returns:
+        List of quotes in the order of the symbols; symbols without a quote are listed in the X-Missing-Symbols header
+    """
+    items = list(dict.fromkeys(symbol.strip() for symbol in symbols.split(',') if symbol.strip()))
+    results = await asyncio.gather(*(fetch(request, ticker.get_ticker_quote, symbol) for symbol in items),
+                                   return_exceptions=True)
+    data, missing = [], []
+    for symbol, result in zip(items, results):
+        if isinstance(result, NoDataError):
+            missing.append(symbol)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            data.append(result)
+    if not data and missing:
+        raise NoDataError(f"No quote found for symbols: {','.join(missing)}")
+    result = success(data, fields)
+    if missing:
+        (result if isinstance(result, Response) else response).headers["X-Missing-Symbols"] = ",".join(missing)
+    return result
+
+
+@app.get("/api/v1/stream/quotes", operation_id="stream_quotes", tags=["Stream"], summary="Stream Quotes",
+    description="Subscribe to quote changes of one or more tickers as Server-Sent Events",
+    response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream"}})
+async def stream_quote_changes(request: Request, symbols: str = Query(..., description="Comma separated ticker symbols, eg: AAPL,601398.SS")):
+    """Subscribe to quote changes of one or more ticker symbols.
+    
+    Each symbol is polled upstream once per interval for all subscribers. The first 'quote' event of a symbol
+    carries the full quote, later ones only the changed fields plus symbol and updated_at. Symbols without a quote
+    get an 'error' event. Updates a slow client has not read yet are merged per symbol. Polls are charged to the
+    subscribing clients in turn, and the symbols a client streams across its connections are limited.
+    
+    Args:
+        symbols: Comma separated ticker symbols (e.g., AAPL,601398.SS)
+        
+    Returns:
+        text/event-stream of 'quote' and 'error' events
+    """
+    items = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()]
+    if not items:
+        raise DataError("No symbols given")
+    if len(items) > STREAM_MAX_SYMBOLS:
+        raise DataError(f"At most {STREAM_MAX_SYMBOLS} symbols per stream")
+    client = request_client(request)
+    quote_hub.check(client, items)
+    return StreamingResponse(stream_quotes(quote_hub, client, items), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.get("/api/v1/ticker/prices", operation_id="get_ticker_prices", tags=["Ticker"], summary="Ticker Prices",
     description="Get ticker prices",
     response_model=BaseResponse[list[TickerPriceItem]])
-async def ticker_prices(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+async def ticker_prices(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
     interval: str = Query(..., description="Time interval, eg: 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo"),
     start_date: str = Query(..., description="Start date, eg: 2025-06-23"),
-    end_date: str = Query(..., description="End date, eg: 2025-06-23")):
+    end_date: str = Query(..., description="End date, eg: 2025-06-23"),
+    adjust: bool = Query(default=True, description="Return dividend adjusted prices, false for unadjusted prices"),
+    currency: Optional[str] = Query(default=None, description="Convert monetary values to this currency, eg: USD, CNY, HKD"),
+    fields: Optional[set] = fields_query(TickerPriceItem)):
     """Get historical prices for a specific ticker symbol.
     
+    Unadjusted bars are fetched once; adjusted prices are computed locally from their dividends.
+    
     Args:
         symbol: The ticker symbol to get prices for (e.g., AAPL, 601398.SS)
         interval: Time interval for the data (e.g., 1m, 1h, 1d)
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
+        adjust: Whether to return dividend adjusted prices (default: true)
+        currency: Currency to convert monetary values to (default: no conversion)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of ticker price items for the specified period
     """
-    data = get_ticker_prices(symbol, interval, start_date, end_date)
-    return success(data)
+    data = await fetch(request, ticker.get_ticker_prices, symbol, interval, start_date, end_date, currency, adjust)
+    return success(data, fields)
+
+
+@app.get("/api/v1/ticker/actions", operation_id="get_ticker_actions", tags=["Ticker"], summary="Ticker Corporate Actions",
+    description="Get ticker dividends and stock splits",
+    response_model=BaseResponse[list[CorporateActionItem]])
+async def ticker_actions(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    start_date: str = Query(..., description="Start date, eg: 2025-06-23"),
+    end_date: str = Query(..., description="End date, eg: 2025-06-23"),
+    fields: Optional[set] = fields_query(CorporateActionItem)):
+    """Get dividends and stock splits of a ticker symbol with their price adjustment factors.
+    
+    Derived from the same cached daily bars as the prices endpoint, without another upstream download.
+    
+    Args:
+        symbol: The ticker symbol to get corporate actions for (e.g., AAPL, 601398.SS)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        fields: Comma separated fields to return (default: all fields)
+        
+    Returns:
+        List of dividends and splits in date order
+    """
+    data = await fetch(request, ticker.get_corporate_actions, symbol, start_date, end_date)
+    return success(data, fields)
+
+
+@app.get("/api/v1/ticker/indicators", operation_id="get_ticker_indicators", tags=["Ticker"], summary="Ticker Indicators",
+    description="Get ticker technical indicators (returns, SMA, EMA, RSI, ATR, volatility, 52-week high/low) computed from prices",
+    response_model=BaseResponse[list[TickerIndicatorItem]])
+async def ticker_indicators(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    interval: str = Query(..., description="Time interval, eg: 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo"),
+    start_date: str = Query(..., description="Start date, eg: 2025-06-23"),
+    end_date: str = Query(..., description="End date, eg: 2025-06-23"),
+    window: int = Query(default=14, ge=1, description="Indicator window in bars, eg: 14"),
+    latest: bool = Query(default=True, description="Return only the latest values instead of the whole series"),
+    fields: Optional[set] = fields_query(TickerIndicatorItem)):
+    """Get technical indicators for a specific ticker symbol.
+    
+    Args:
+        symbol: The ticker symbol to get indicators for (e.g., AAPL, 601398.SS)
+        interval: Time interval of the price bars (e.g., 1m, 1h, 1d)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        window: Indicator window in bars (default: 14)
+        latest: Whether to return only the latest values (default: True)
+        fields: Comma separated fields to return (default: all fields)
+        
+    Returns:
+        List of indicator items, a single item when latest is True
+    """
+    data = await fetch(request, ticker.get_ticker_indicators, symbol, interval, start_date, end_date, window, latest)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/news", operation_id="get_ticker_news", tags=["Ticker"], summary="Ticker News",
 description="Get ticker news",
 response_model=BaseResponse[list[NewsItem]])
-async def ticker_news(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
-    count: Optional[int] = Query(default=10, description="Number of news, eg: 10")):
+async def ticker_news(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    count: Optional[int] = Query(default=10, description="Number of news, eg: 10"),
+    since: Optional[str] = Query(default=None, description="Only return news published after this time, eg: 2025-07-31T12:00:00Z"),
+    fields: Optional[set] = fields_query(NewsItem)):
     """Get recent news articles for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get news for (e.g., AAPL, 601398.SS)
         count: Number of news articles to retrieve (default: 10)
+        since: Only return articles published after this time, for polling new articles
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of news items related to the specified ticker
     """
-    data = get_ticker_news(symbol, count)
-    return success(data)
+    data = await fetch(request, ticker.get_ticker_news, symbol, count, since)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/income_stmt", operation_id="get_ticker_income_stmt", tags=["Ticker"], summary="Ticker Income Statement",
 description="Get ticker income statement",
 response_model=BaseResponse[list[IncomeStmtItem]])
-async def ticker_income_stmt(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
-    freq: str = Query(default='yearly', description="Income statement frequency, eg: yearly, quarterly or trailing")):
+async def ticker_income_stmt(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    freq: str = Query(default='yearly', description="Income statement frequency, eg: yearly, quarterly or trailing"),
+    currency: Optional[str] = Query(default=None, description="Convert monetary values to this currency, eg: USD, CNY, HKD"),
+    fields: Optional[set] = fields_query(IncomeStmtItem)):
     """Get income statement data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get income statement for (e.g., AAPL, 601398.SS)
         freq: Frequency of data - 'yearly', 'quarterly', or 'trailing' (default: yearly)
+        currency: Currency to convert monetary values to (default: no conversion)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of income statement items for the specified ticker
     """
-    data = get_income_stmt(symbol, freq)
-    return success(data)
+    data = await fetch(request, ticker.get_income_stmt, symbol, freq, currency)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/balance_sheet", operation_id="get_ticker_balance_sheet", tags=["Ticker"], summary="Ticker Balance Sheet",
 description="Get ticker balance sheet",
 response_model=BaseResponse[list[BalanceSheetItem]])
-async def ticker_balance_sheet(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
-    freq: str = Query(default='yearly', description="Balance sheet frequency, eg: yearly, quarterly or trailing")):
+async def ticker_balance_sheet(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    freq: str = Query(default='yearly', description="Balance sheet frequency, eg: yearly or quarterly"),
+    currency: Optional[str] = Query(default=None, description="Convert monetary values to this currency, eg: USD, CNY, HKD"),
+    fields: Optional[set] = fields_query(BalanceSheetItem)):
     """Get balance sheet data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get balance sheet for (e.g., AAPL, 601398.SS)
-        freq: Frequency of data - 'yearly', 'quarterly', or 'trailing' (default: yearly)
+        freq: Frequency of data - 'yearly' or 'quarterly' (default: yearly); balance sheets have no trailing frequency
+        currency: Currency to convert monetary values to (default: no conversion)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of balance sheet items for the specified ticker
     """
-    data = get_balance_sheet(symbol, freq)
-    return success(data)
+    data = await fetch(request, ticker.get_balance_sheet, symbol, freq, currency)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/cash_flow", operation_id="get_ticker_cash_flow", tags=["Ticker"], summary="Ticker Cash Flow",
 description="Get ticker cash flow",
 response_model=BaseResponse[list[CashFlowItem]])
-async def ticker_cash_flow(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
-    freq: str = Query(default='yearly', description="Cash flow frequency, eg: yearly, quarterly or trailing")):
+async def ticker_cash_flow(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    freq: str = Query(default='yearly', description="Cash flow frequency, eg: yearly, quarterly or trailing"),
+    currency: Optional[str] = Query(default=None, description="Convert monetary values to this currency, eg: USD, CNY, HKD"),
+    fields: Optional[set] = fields_query(CashFlowItem)):
     """Get cash flow data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get cash flow for (e.g., AAPL, 601398.SS)
         freq: Frequency of data - 'yearly', 'quarterly', or 'trailing' (default: yearly)
+        currency: Currency to convert monetary values to (default: no conversion)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of cash flow items for the specified ticker
     """
-    data = get_cash_flow(symbol, freq)
-    return success(data)
+    data = await fetch(request, ticker.get_cash_flow, symbol, freq, currency)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/insider_transactions", operation_id="get_ticker_insider_transactions", tags=["Ticker"], summary="Ticker Insider Transactions",
 description="Get ticker insider transactions",
 response_model=BaseResponse[list[InsiderTransactionItem]])
-async def ticker_insider_transactions(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS")):
+async def ticker_insider_transactions(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    fields: Optional[set] = fields_query(InsiderTransactionItem)):
     """Get insider transactions data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get insider transactions for (e.g., AAPL, 601398.SS)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of insider transaction items for the specified ticker
     """
-    data = get_insider_transactions(symbol)
-    return success(data)
+    data = await fetch(request, ticker.get_insider_transactions, symbol)
+    return success(data, fields)
 
 @app.get("/api/v1/ticker/insider_roster_holders", operation_id="get_ticker_insider_roster_holders", tags=["Ticker"], summary="Ticker Insider Roster Holders",
 description="Get ticker insider roster holders",
 response_model=BaseResponse[list[InsiderRosterHolderItem]])
-async def ticker_insider_roster_holders(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS")):
+async def ticker_insider_roster_holders(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    fields: Optional[set] = fields_query(InsiderRosterHolderItem)):
     """Get insider roster holders data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get insider roster holders for (e.g., AAPL, 601398.SS)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of insider roster holder items for the specified ticker
     """
-    data = get_insider_roster_holders(symbol)
-    return success(data)
+    data = await fetch(request, ticker.get_insider_roster_holders, symbol)
+    return success(data, fields)
 
 @app.get("/api/v1/ticker/insider_purchases", operation_id="get_ticker_insider_purchases", tags=["Ticker"], summary="Ticker Insider Purchases",
 description="Get ticker insider purchases",
 response_model=BaseResponse[list[InsiderPurchaseItem]])
-async def ticker_insider_purchases(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS")):
+async def ticker_insider_purchases(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    fields: Optional[set] = fields_query(InsiderPurchaseItem)):
     """Get insider purchases data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get insider purchases for (e.g., AAPL, 601398.SS)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of insider purchase items for the specified ticker
     """
-    data = get_insider_purchases(symbol)
-    return success(data)
+    data = await fetch(request, ticker.get_insider_purchases, symbol)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/financial_metrics", operation_id="get_ticker_financial_metrics", tags=["Ticker"], summary="Ticker Financial Metrics",
 description="Get ticker financial metrics",
 response_model=BaseResponse[list[FinancialMetricItem]])
-async def ticker_financial_metrics(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"), freq: Optional[str] = Query(default='yearly', description="Financial metrics frequency, eg: yearly, quarterly")):
+async def ticker_financial_metrics(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"), freq: Optional[str] = Query(default='yearly', description="Financial metrics frequency, eg: yearly, quarterly"),
+    currency: Optional[str] = Query(default=None, description="Convert monetary values to this currency, eg: USD, CNY, HKD"),
+    fields: Optional[set] = fields_query(FinancialMetricItem)):
     """Get financial metrics data for a specific ticker symbol.
     
     Args:
         symbol: The ticker symbol to get financial metrics for (e.g., AAPL, 601398.SS)
         freq: Frequency of data - 'yearly' or 'quarterly' (default: yearly)
+        currency: Currency to convert monetary values to (default: no conversion)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of financial metric items for the specified ticker
     """
-    data = get_financial_metrics(symbol, freq)
-    return success(data)
+    data = await fetch(request, ticker.get_financial_metrics, symbol, freq, currency)
+    return success(data, fields)
 
 
 @app.get("/api/v1/ticker/financial_items", operation_id="get_ticker_financial_items", tags=["Ticker"], summary="Ticker Financial Items",
 description="Get ticker financial items",
 response_model=BaseResponse[list[FinancialItem]])
-async def ticker_financial_items(symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"), items: Optional[str] = Query(default=None, description="Financial items, eg: revenue_growth,market_cap"), freq: Optional[str] = Query(default='yearly', description="Financial items frequency, eg: yearly, quarterly")):
+async def ticker_financial_items(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"), items: Optional[str] = Query(default=None, description="Financial items, eg: revenue_growth,market_cap"), freq: Optional[str] = Query(default='yearly', description="Financial items frequency, eg: yearly, quarterly"),
+    currency: Optional[str] = Query(default=None, description="Convert monetary values to this currency, eg: USD, CNY, HKD"),
+    fields: Optional[set] = fields_query(FinancialItem)):
     """Get specific financial items data for a ticker symbol.
     
     Args:
         symbol: The ticker symbol to get financial items for (e.g., AAPL, 601398.SS)
         items: Comma-separated list of specific financial items to retrieve
         freq: Frequency of data - 'yearly' or 'quarterly' (default: yearly)
+        currency: Currency to convert monetary values to (default: no conversion)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of financial items for the specified ticker
     """
     if items is not None:
         items = items.split(',')
-    data = get_financial_items(symbol, items, freq)
-    return success(data)
+    data = await fetch(request, ticker.get_financial_items, symbol, items, freq, currency)
+    return success(data, fields)
+
+
+@app.get("/api/v1/ticker/peers", operation_id="get_ticker_peers", tags=["Ticker"], summary="Ticker Peers",
+description="Compare ticker financial metrics with its sector or industry",
+response_model=BaseResponse[PeerComparisonItem])
+async def ticker_peers(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    level: Literal['sector', 'industry'] = Query(default='industry', description="Peer group level, sector or industry"),
+    fields: Optional[set] = fields_query(PeerComparisonItem)):
+    """Rank the latest yearly financial metrics of a ticker within its sector or industry.
+    
+    Group medians and quantiles are precomputed in the background for the configured universe (PEER_UNIVERSE)
+    and updated whenever a symbol of the universe refreshes.
+    
+    Args:
+        symbol: The ticker symbol to compare (e.g., AAPL, 601398.SS)
+        level: Peer group level - 'sector' or 'industry' (default: industry)
+        fields: Comma separated fields to return (default: all fields)
+        
+    Returns:
+        Percentile ranks of the ticker's metrics and the statistics of its peer group
+    """
+    symbol = canonical_symbol(symbol)
+    record = peer_stats.member(symbol)
+    if record is None:
+        info = await fetch(request, ticker.get_ticker_info, symbol)
+        metrics = await fetch(request, ticker.get_financial_metrics, symbol)
+        record = {'sector': info.sector, 'industry': info.industry, 'values': latest_metrics(metrics)}
+    data = peer_stats.compare(symbol, record, level)
+    return success(data, fields)
 
 
 
@@ -294,25 +542,304 @@ async def ticker_financial_items(symbol: str = Query(..., description="Ticker sy
 @app.get("/api/v1/ticker/lookup", operation_id="get_ticker_lookup", tags=["Ticker"], summary="Ticker lookup",
 description="lookup ticker",
 response_model=BaseResponse[list[LookupItem]])
-async def ticker_lookup(query: str = Query(..., description="lookup query, eg: AAPL")):
+async def ticker_lookup(request: Request, query: str = Query(..., description="lookup query, eg: AAPL"),
+    fields: Optional[set] = fields_query(LookupItem)):
     """Look up ticker symbols based on a search query.
     
     Args:
         query: The search query to look up ticker symbols for (e.g., AAPL)
+        fields: Comma separated fields to return (default: all fields)
         
     Returns:
         List of matching ticker symbols and company names
     """
-    data = lookup_ticker(query)
+    data = await fetch(request, ticker.lookup_ticker, query)
+    return success(data, fields)
+
+
+@app.get("/api/v1/archive/prices", operation_id="get_archive_prices", tags=["Archive"], summary="Archived Prices",
+    description="Read prices from the local memory-mapped price archive without contacting upstream",
+    response_model=BaseResponse[list[TickerPriceItem]])
+async def archive_prices(request: Request, symbol: str = Query(..., description="Ticker symbols, eg: AAPL, 601398.SS"),
+    interval: str = Query(..., description="Time interval, eg: 1m,1d"),
+    start_date: Optional[str] = Query(default=None, description="Start date, eg: 2015-06-23"),
+    end_date: Optional[str] = Query(default=None, description="End date, eg: 2025-06-23"),
+    adjust: bool = Query(default=True, description="Return dividend adjusted prices, false for unadjusted prices"),
+    file_format: Literal['json', 'arrow', 'parquet'] = Query(default='json', alias='format', description="Response format, json, arrow or parquet")):
+    """Read archived historical prices for a specific ticker symbol.
+    
+    The archive stores unadjusted bars; adjusted prices are computed on read the same way as the prices endpoint.
+    Reads go through admission control and the client's scheduling like other data routes; Arrow and Parquet
+    responses run in the bulk lane.
+    
+    Args:
+        symbol: The ticker symbol to read prices for (e.g., AAPL, 601398.SS)
+        interval: Time interval of the archived bars (e.g., 1m, 1d)
+        start_date: Start date in YYYY-MM-DD format, inclusive (default: first archived bar)
+        end_date: End date in YYYY-MM-DD format, exclusive (default: last archived bar)
+        adjust: Whether to return dividend adjusted prices (default: true)
+        file_format: 'json' for the standard response, 'arrow' or 'parquet' for a binary file, passed as the `format` query parameter (default: json)
+        
+    Returns:
+        List of ticker price items, or an Arrow IPC stream / Parquet file
+    """
+    def read_archive():
+        # Reading, adjusting and serializing run in the thread pool, off the event loop
+        data = price_archive.read_frame(symbol, interval, start_date, end_date, adjust)
+        if file_format != 'json':
+            return export_util.export_frame(data.tz_convert('UTC').reset_index(), file_format)
+        return data.reset_index().to_dict(orient='records')
+
+    if file_format != 'json':
+        media_type, extension = export_util.EXPORT_FORMATS[file_format]
+        content = await fetch(request, read_archive, lane='bulk')
+        return Response(content=content, media_type=media_type,
+                        headers={"Content-Disposition": f'attachment; filename="{symbol}_{interval}.{extension}"'})
+    return success(await fetch(request, read_archive))
+
+
+EXPORT_RESPONSES = {200: {"content": {"application/vnd.apache.arrow.stream": {}, "application/vnd.apache.parquet": {}},
+                           "description": "Arrow IPC stream or Parquet file, one row per symbol and date"}}
+
+
+@app.get("/api/v1/export/prices", operation_id="export_prices", tags=["Export"], summary="Export Prices",
+    description="Export ticker prices of one or more symbols as an Arrow IPC stream or a Parquet file. Dates are in UTC.",
+    response_class=Response, responses=EXPORT_RESPONSES)
+async def export_prices(request: Request, symbols: str = Query(..., description="Comma separated ticker symbols, eg: AAPL,601398.SS"),
+    interval: str = Query(..., description="Time interval, eg: 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo"),
+    start_date: str = Query(..., description="Start date, eg: 2025-06-23"),
+    end_date: str = Query(..., description="End date, eg: 2025-06-23"),
+    adjust: bool = Query(default=True, description="Return dividend adjusted prices, false for unadjusted prices"),
+    file_format: Literal['arrow', 'parquet'] = Query(default='arrow', alias='format', description="Export format, arrow or parquet")):
+    """Export historical prices for one or more ticker symbols.
+    
+    Args:
+        symbols: Comma separated ticker symbols (e.g., AAPL,601398.SS)
+        interval: Time interval for the data (e.g., 1m, 1h, 1d)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        adjust: Whether to export dividend adjusted prices (default: true)
+        file_format: Export format, 'arrow' or 'parquet', passed as the `format` query parameter (default: arrow)
+        
+    Returns:
+        Arrow IPC stream or Parquet file; symbols without data are listed in the X-Missing-Symbols header,
+        symbols that failed to load in the X-Failed-Symbols header
+    """
+    return await fetch(request, export_response, "prices", symbols, lambda symbol: ticker.get_ticker_price_frame(symbol, interval, start_date, end_date, adjust), file_format, lane='bulk')
+
+
+@app.get("/api/v1/export/{statement}", operation_id="export_statement", tags=["Export"], summary="Export Statements",
+    description="Export income statements, balance sheets, cash flows or financial metrics of one or more symbols as an Arrow IPC stream or a Parquet file. Rows carry the same fields as the JSON endpoints, including derived fields.",
+    response_class=Response, responses=EXPORT_RESPONSES)
+async def export_statement(request: Request, statement: Literal['income_stmt', 'balance_sheet', 'cash_flow', 'financial_metrics'],
+    symbols: str = Query(..., description="Comma separated ticker symbols, eg: AAPL,601398.SS"),
+    freq: str = Query(default='yearly', description="Statement frequency, eg: yearly, quarterly or trailing"),
+    file_format: Literal['arrow', 'parquet'] = Query(default='arrow', alias='format', description="Export format, arrow or parquet")):
+    """Export financial statements or metrics for one or more ticker symbols.
+    
+    Args:
+        statement: 'income_stmt', 'balance_sheet', 'cash_flow' or 'financial_metrics'
+        symbols: Comma separated ticker symbols (e.g., AAPL,601398.SS)
+        freq: Frequency of data - 'yearly', 'quarterly', or 'trailing' (default: yearly)
+        file_format: Export format, 'arrow' or 'parquet', passed as the `format` query parameter (default: arrow)
+        
+    Returns:
+        Arrow IPC stream or Parquet file; symbols without data are listed in the X-Missing-Symbols header,
+        symbols that failed to load in the X-Failed-Symbols header
+    """
+    return await fetch(request, export_response, statement, symbols, lambda symbol: ticker.get_statement_export_frame(statement, symbol, freq), file_format, lane='bulk')
+
+
+@app.get("/api/v1/admin/cache/usage", operation_id="get_cache_usage", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Cache Usage",
+description="Get memory usage of the data caches",
+response_model=BaseResponse[list[CacheUsageItem]])
+async def admin_cache_usage():
+    """Get the current memory usage of each cached function.
+    
+    Returns:
+        List of cache usage items per function, plus a 'total' summary item
+    """
+    data = [{'name': name, **usage} for name, usage in cache_usage().items()]
     return success(data)
 
 
+def split_names(names: Optional[str]) -> Optional[list]:
+    """拆分逗号分隔的缓存函数名称，名称不存在时抛出 DataError"""
+    if not names:
+        return None
+    items = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in items if name not in cache_usage()]
+    if unknown:
+        raise DataError(f"Unknown cache names: {', '.join(unknown)}")
+    return items
+
+
+@app.get("/api/v1/admin/cache/entries", operation_id="get_cache_entries", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Cache Entries",
+description="List entries of the in-process data caches",
+response_model=BaseResponse[list[CacheEntryItem]])
+async def admin_cache_entries(names: Optional[str] = Query(default=None, description="Comma separated cached function names, eg: get_ticker_info,get_income_stmt"),
+    symbol: Optional[str] = Query(default=None, description="Only entries of this symbol, eg: AAPL"),
+    pattern: Optional[str] = Query(default=None, description="Only entries whose key matches this glob pattern, eg: *'quarterly'*"),
+    limit: int = Query(default=100, ge=1, le=10000, description="Maximum number of entries")):
+    """List unexpired entries of the in-process caches of this worker.
+    
+    Args:
+        names: Comma separated cached function names (default: all functions)
+        symbol: Only entries of this symbol
+        pattern: Only entries whose key, e.g. ('AAPL', 'quarterly'), matches this glob pattern
+        limit: Maximum number of entries (default: 100)
+        
+    Returns:
+        List of cache entries with their size, hits and time to expiry
+    """
+    ticker.load()
+    return success(await run_in_threadpool(cache_entries, split_names(names), symbol, pattern, limit))
+
+
+@app.post("/api/v1/admin/cache/invalidate", operation_id="invalidate_cache", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Invalidate Cache",
+description="Invalidate cached data by symbol or key pattern across all data fetchers",
+response_model=BaseResponse[list[CacheInvalidateItem]])
+async def admin_cache_invalidate(names: Optional[str] = Query(default=None, description="Comma separated cached function names, eg: get_ticker_info,get_income_stmt"),
+    symbol: Optional[str] = Query(default=None, description="Invalidate entries of this symbol, eg: AAPL"),
+    pattern: Optional[str] = Query(default=None, description="Invalidate entries whose key matches this glob pattern, eg: *'quarterly'*")):
+    """Invalidate cached data, e.g. all data of one symbol after an earnings release.
+    
+    Entries are removed from this worker, from the shared cache tier and, within a second, from the other workers.
+    Fetches already running do not write their results back. Invalidating a symbol across all functions also
+    refreshes its news on the next request.
+    
+    Args:
+        names: Comma separated cached function names (default: all functions)
+        symbol: Invalidate entries of this symbol
+        pattern: Invalidate entries whose key matches this glob pattern
+        
+    Returns:
+        Number of entries removed per cache
+    """
+    if not (names or symbol or pattern):
+        raise DataError("One of names, symbol or pattern is required")
+    ticker.load()
+    removed = await run_in_threadpool(cache_invalidate, split_names(names), symbol, pattern)
+    return success([{'name': name, 'removed': count} for name, count in removed.items()])
+
+
+@app.post("/api/v1/admin/cache/prefetch", operation_id="prefetch_cache", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Prefetch Cache",
+description="Fetch data of the given symbols into the caches",
+response_model=BaseResponse[list[CachePrefetchItem]])
+async def admin_cache_prefetch(request: Request, symbols: str = Query(..., description="Comma separated ticker symbols, eg: AAPL,601398.SS"),
+    names: Optional[str] = Query(default=None, description="Comma separated cached function names, eg: get_ticker_info,get_income_stmt")):
+    """Fetch data of the given symbols into the caches, with default arguments for everything but the symbol.
+    
+    Prefetches run in the bulk lane and go through admission control like other requests.
+    
+    Args:
+        symbols: Comma separated ticker symbols
+        names: Comma separated cached function names (default: every function that only needs a symbol)
+        
+    Returns:
+        Result per function and symbol
+    """
+    ticker.load()
+    selected = split_names(names)
+    functions = [(name, func) for name, func in prefetchable_functions() if selected is None or name in selected]
+    if selected is not None and len(functions) < len(selected):
+        prefetchable = {name for name, _ in functions}
+        raise DataError(f"Cannot prefetch by symbol: {', '.join(name for name in selected if name not in prefetchable)}")
+    jobs = [(name, func, symbol.strip()) for symbol in symbols.split(',') if symbol.strip() for name, func in functions]
+    results = await asyncio.gather(*(fetch(request, func, symbol, lane='bulk') for _, func, symbol in jobs),
+                                   return_exceptions=True)
+    data = []
+    for (name, _, symbol), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            data.append({'name': name, 'symbol': symbol, 'code': getattr(result, 'code', 1), 'msg': str(result)})
+        else:
+            data.append({'name': name, 'symbol': symbol, 'code': 0, 'msg': ''})
+    return success(data)
+
+
+@app.get("/api/v1/admin/clients", operation_id="get_client_usage", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Client Usage",
+description="Get upstream scheduling state of each client",
+response_model=BaseResponse[list[ClientUsageItem]])
+async def admin_client_usage():
+    """Get the upstream scheduling state of each client that has made requests.
+    
+    Returns:
+        List of client usage items with running and waiting upstream fetches
+    """
+    return success(scheduler.stats())
+
+
+@app.get("/api/v1/admin/admission", operation_id="get_admission_usage", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Admission Usage",
+description="Get admission control state of each route",
+response_model=BaseResponse[list[AdmissionUsageItem]])
+async def admin_admission_usage():
+    """Get the admission control state of each route.
+    
+    Returns:
+        List of admission usage items per route, plus a 'total' summary item
+    """
+    return success(admission.stats())
+
+
+@app.get("/api/v1/admin/loop", operation_id="get_loop_stats", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Event Loop Lag",
+description="Get event loop lag statistics and recent blocking calls",
+response_model=BaseResponse[LoopMonitorInfo])
+async def admin_loop_stats():
+    """Get event loop lag statistics and the most recent stalls, each attributed to a route and function.
+    
+    Returns:
+        Event loop lag statistics
+    """
+    return success(loop_monitor.stats())
+
+
+@app.get("/api/v1/admin/profiles", operation_id="get_profiles", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Request Profiles",
+description="List recorded request profiles",
+response_model=BaseResponse[list[ProfileItem]])
+async def admin_profiles():
+    """List profiles of requests sent with 'X-Profile: true' or 'profile=true', followed by the slowest requests
+    recorded by continuous sampling.
+    
+    Returns:
+        List of profile summaries
+    """
+    return success([profile.summary() for profile in profiler.profiles()])
+
+
+@app.get("/api/v1/admin/profiles/{profile_id}", operation_id="get_profile", tags=["Admin"], dependencies=[Depends(verify_admin)], summary="Request Profile",
+description="Get a recorded request profile as folded stacks for flame graph tools",
+response_class=PlainTextResponse)
+async def admin_profile(profile_id: str):
+    """Get a recorded request profile.
+    
+    Args:
+        profile_id: Profile id from the X-Profile-Id response header or the profile list
+        
+    Returns:
+        Folded stacks, one 'frame;frame;frame count' line per stack, readable by flamegraph.pl and speedscope
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise NoDataError(f"Profile {profile_id} not found")
+    return PlainTextResponse(profile.collapsed())
+
+
 
-mcp = FastApiMCP(app, describe_all_responses=True, headers=["authorization", "authentication", "x-api-key", "api-key", "x-token", "token"])
+startup.mark('routes')
+# 使用预先生成的 OpenAPI schema 时，不在启动时生成 schema 和转换 MCP 工具定义
+startup.load_openapi_schema(app)
+with startup.prebuilt_openapi(app):
+    mcp = FastApiMCP(app, describe_all_responses=True, exclude_tags=["Admin", "Export", "Archive", "Stream"], headers=["authorization", "authentication", "x-api-key", "api-key", "x-token", "token"])
 mcp.mount_http()
 mcp.mount_sse()
+startup.mark('mcp')
+startup.finish()
 
 if __name__ == "__main__":
+    if "--build-schema" in sys.argv:
+        # 生成 OpenAPI schema 写入 OPENAPI_SCHEMA_PATH，部署前执行
+        startup.write_openapi_schema(app)
+        sys.exit(0)
     import uvicorn
     port = int( os.environ.get("PM2_SERVE_PORT", 8000))
     print(f"Starting FastAPI app with MCP on port {port}")
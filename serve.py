@@ -0,0 +1,115 @@
+"""
+生产环境启动入口
+
+主进程先导入应用和 pandas / yfinance 等重量级依赖，绑定端口后 fork 多个 worker 进程，
+worker 共享监听 socket，并通过写时复制共享预先导入的模块；
+设置了 SYMBOL_LIST_PATH 时，导入应用时加载的 symbol 索引也由主进程预加载并共享，未设置时索引为空，
+各 worker 分别由各自的查询结果填充；
+基本面数据等缓存通过 SHARED_CACHE_PATH 指定的本地共享缓存层在 worker 之间共享。
+worker 异常退出时主进程重新启动新的 worker，收到 SIGTERM / SIGINT 时通知所有 worker 退出。
+
+python serve.py
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import logging
+from dotenv import load_dotenv
+load_dotenv()
+
+import uvicorn
+
+# worker 进程数，默认为 CPU 核数
+WORKERS = int(os.getenv("WORKERS", 0)) or os.cpu_count() or 1
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PM2_SERVE_PORT", os.getenv("PORT", 8000)))
+# 每个 worker 同时处理的连接数上限，超过时返回 503，0 表示不限制
+WORKER_LIMIT_CONCURRENCY = int(os.getenv("WORKER_LIMIT_CONCURRENCY", 0)) or None
+# 监听 socket 的等待连接队列长度
+WORKER_BACKLOG = int(os.getenv("WORKER_BACKLOG", 2048))
+WORKER_TIMEOUT_KEEP_ALIVE = int(os.getenv("WORKER_TIMEOUT_KEEP_ALIVE", 5))
+
+logger = logging.getLogger("serve")
+
+
+def preload():
+    """在 fork 之前导入应用及其依赖"""
+    from main import app
+    from src.common import startup
+    # 应用中延迟导入的模块也在 fork 之前导入
+    startup.warm_up()
+    return app
+
+
+def run_worker(config: uvicorn.Config, sockets: list):
+    """worker 进程入口，恢复默认的信号处理后运行 uvicorn"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(config)
+    server.run(sockets=sockets)
+
+
+def spawn(config: uvicorn.Config, sockets: list) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(config, sockets)
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info("Started worker %s", pid)
+    return pid
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    app = preload()
+    config = uvicorn.Config(app, host=HOST, port=PORT, backlog=WORKER_BACKLOG,
+                            limit_concurrency=WORKER_LIMIT_CONCURRENCY,
+                            timeout_keep_alive=WORKER_TIMEOUT_KEEP_ALIVE)
+    sockets = [config.bind_socket()]
+    # 预加载的对象不再参与垃圾回收扫描，避免 worker 中的 GC 修改共享页面导致复制
+    gc.freeze()
+
+    workers = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Serving on %s:%s with %s workers", HOST, PORT, WORKERS)
+    for _ in range(WORKERS):
+        workers.add(spawn(config, sockets))
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            logger.warning("Worker %s exited with status %s, restarting", pid, status)
+            # 避免 worker 启动即失败时反复快速重启
+            time.sleep(1)
+            workers.add(spawn(config, sockets))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,23 @@
+import os
+import math
+import functools
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timezone
-from src.common.cache import cache
-from src.common.util import convert_list_dict_camel_to_snake, to_model
-from src.common.finance_util import calculate_financial_metrics, calculate_income_stmt_missing, calculate_balance_sheet_missing, calculate_cash_flow_missing
+from src.common.cache import cache, register_invalidator, MISSING
+from src.common.errors import DataError, NoDataError
+from src.common.util import camel_to_snake, convert_list_dict_camel_to_snake, to_model
+from src.common.price_archive import try_archive_bars
+from src.common.news_store import NewsStore
+from src.common.peer_stats import peer_stats
+from src.common.symbol_index import symbol_index
+from src.common.price_util import get_base_interval, resample_prices, trading_session, indicator_start_date, trim_before, calculate_indicators, adjust_prices, corporate_actions
+from src.common.fx_util import CROSS_CURRENCY, PRICE_CURRENCY_COLUMNS, check_currency, split_currency, to_rate_series, cross_rates, convert_frame, statement_currency_columns
+from src.common.finance_util import calculate_financial_metrics, calculate_income_stmt_missing, calculate_balance_sheet_missing, calculate_cash_flow_missing, calculate_trailing, INCOME_STMT_STOCK_ITEMS, CASH_FLOW_STOCK_ITEMS, CASH_FLOW_OPENING_ITEMS
 from src.models.ticker_info_model import TickerInfo
 from src.models.ticker_prices_model import TickerPriceItem
+from src.models.ticker_corporate_actions_model import CorporateActionItem
+from src.models.ticker_indicators_model import TickerIndicatorItem
 from src.models.ticker_news_model import NewsItem
 from src.models.ticker_income_stmt_model import IncomeStmtItem
 from src.models.ticker_balance_sheet_model import BalanceSheetItem
@@ -16,9 +28,18 @@ from src.models.ticker_insider_purchases_model import InsiderPurchaseItem
 from src.models.ticker_financial_metrics_model import FinancialMetricItem
 from src.models.ticker_financial_items_model import FinancialItem
 from src.models.ticker_lookup_model import LookupItem
+from src.models.ticker_quote_model import QuoteItem
 
+# 实时报价的缓存时间，单位为秒
+QUOTE_CACHE_TIMEOUT = int(os.getenv("QUOTE_CACHE_TIMEOUT", 2))
 
-@cache(timeout=60*60*24)
+
+def _update_peer_info(info: TickerInfo, symbol: str):
+    """取得新的 symbol 信息后更新行业统计，包括读取共享缓存层的结果"""
+    peer_stats.update_info(symbol, info)
+
+
+@cache(timeout=60*60*24, shared=True, on_load=_update_peer_info)
 def get_ticker_info(symbol: str) -> TickerInfo:
     """
     获取 symbol 的信息
@@ -27,26 +48,178 @@ def get_ticker_info(symbol: str) -> TickerInfo:
     """
     yf_ticker = yf.Ticker(symbol)
     data1 = yf_ticker.get_info()
+    # 代码错误或已退市时，上游只返回少量无关字段
+    if not data1 or ('symbol' not in data1 and 'quoteType' not in data1):
+        raise NoDataError(f"No data found for symbol: {symbol}")
     # Convert dict to TickerInfo model
-    return to_model(data1, TickerInfo)
+    info = to_model(data1, TickerInfo)
+    return info
 
 
-@cache(timeout=60*60)
-def get_ticker_prices(symbol: str, interval: str, start_date: str, end_date: str) -> list[TickerPriceItem]:
+def _fast_info_value(fast_info, name: str):
+    """读取 fast_info 的字段，上游缺少该字段时返回 None"""
+    try:
+        value = getattr(fast_info, name)
+    except Exception:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+@cache(timeout=QUOTE_CACHE_TIMEOUT, single_flight=True)
+def get_ticker_quote(symbol: str) -> QuoteItem:
     """
-    获取 symbol 的价格数据
+    获取 symbol 的实时报价，使用 yfinance 的 fast_info，只包含价格、成交量、市值等少量字段
+    缓存时间很短，同一 symbol 的并发请求只访问一次上游
+    :param symbol: symbol 名称
+    :return: 报价
+    """
+    fast_info = yf.Ticker(symbol).fast_info
+    price = _fast_info_value(fast_info, 'last_price')
+    if price is None:
+        raise NoDataError(f"No quote found for symbol: {symbol}")
+    previous_close = _fast_info_value(fast_info, 'previous_close')
+    change = price - previous_close if previous_close else None
+    volume = _fast_info_value(fast_info, 'last_volume')
+    return QuoteItem(
+        symbol=symbol,
+        price=price,
+        previous_close=previous_close,
+        change=change,
+        change_percent=change / previous_close * 100 if change is not None else None,
+        open=_fast_info_value(fast_info, 'open'),
+        day_high=_fast_info_value(fast_info, 'day_high'),
+        day_low=_fast_info_value(fast_info, 'day_low'),
+        volume=int(volume) if volume is not None else None,
+        market_cap=_fast_info_value(fast_info, 'market_cap'),
+        currency=_fast_info_value(fast_info, 'currency'),
+        exchange=_fast_info_value(fast_info, 'exchange'),
+        updated_at=datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+    )
+
+
+@cache(timeout=60*60*24, shared=True)
+def get_fx_rates(base: str, quote: str) -> pd.Series:
+    """
+    获取币种对的每日汇率，每个币种对每天只访问一次上游
+    上游没有该币种对时经由 USD 换算
+    :param base: 基础币种，如 CNY
+    :param quote: 报价币种，如 USD
+    :return: index 为日期（升序），值为 1 单位基础币种兑换的报价币种数
+    """
+    yf_ticker = yf.Ticker(f"{base}{quote}=X")
+    rates = to_rate_series(yf_ticker.history(period='max', interval='1d'))
+    if rates.empty and CROSS_CURRENCY not in (base, quote):
+        rates = cross_rates(get_fx_rates(base, CROSS_CURRENCY), get_fx_rates(CROSS_CURRENCY, quote))
+    if rates.empty:
+        raise NoDataError(f"No exchange rate found for {base}/{quote}")
+    return rates
+
+
+def _convert_currency(symbol: str, data: pd.DataFrame, currency: str, columns, statement=False) -> pd.DataFrame:
+    """
+    将 symbol 的数据按日期换算为 currency
+    :param data: index 为日期的 DataFrame
+    :param currency: 目标币种
+    :param columns: 以货币计价的列
+    :param statement: 是否为财务报表，财务报表使用报表币种，价格使用交易币种
+    :return: 换算后的 DataFrame
+    """
+    currency = check_currency(currency)
+    info = get_ticker_info(symbol)
+    source = (info.financial_currency or info.currency) if statement else info.currency
+    if not source:
+        raise NoDataError(f"No currency found for symbol: {symbol}")
+    base, factor = split_currency(source)
+    if base != currency:
+        rates = get_fx_rates(base, currency)
+    elif factor != 1.0:
+        rates = pd.Series([1.0], index=pd.DatetimeIndex(['1970-01-01']))
+    else:
+        return data
+    return convert_frame(data, rates * factor, columns)
+
+
+@cache(timeout=60*60, max_bytes=128*1024*1024)
+def get_ticker_raw_price_frame(symbol: str, interval: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    获取 symbol 的未复权价格数据 DataFrame，复权价格和分红拆股都由它在本地计算，同一区间只访问一次上游
+    可以由基础周期聚合得到的周期（5m,15m,1h 由 1m 聚合，1wk,1mo 由 1d 聚合），使用基础周期的缓存数据聚合，
+    只有基础周期没有缓存时才访问上游
     :param symbol: symbol 名称
     :param interval: 时间间隔 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo
     :param start_date: 开始日期  2025-06-23
     :param end_date: 结束日期  2025-06-23
-    :return: symbol 的价格数据
+    :return: index 为 date（交易所时区），列为 open, high, low, close, volume, dividends, stock_splits, adj_close；
+        日内数据的 attrs['trading_session'] 为交易时段的开始时刻，用于聚合
     """
+    base_interval = get_base_interval(interval, start_date, end_date)
+    if base_interval is not None:
+        base_data = get_ticker_raw_price_frame(symbol, base_interval, start_date, end_date)
+        return resample_prices(base_data, interval, base_data.attrs.get('trading_session', ()))
+
     yf_ticker = yf.Ticker(symbol)
-    data = yf_ticker.history(interval=interval, start=start_date, end=end_date, prepost=True)
+    data = yf_ticker.history(interval=interval, start=start_date, end=end_date, prepost=True, auto_adjust=False)
     # 分组名称Date 修改
     data.index.name = 'date'
     # 表头命名修改
-    data.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume', 'Dividends': 'dividends', 'Stock Splits': 'stock_splits'}, inplace=True)
+    data.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Adj Close': 'adj_close', 'Volume': 'volume', 'Dividends': 'dividends', 'Stock Splits': 'stock_splits'}, inplace=True)
+    if interval[-1] in ('m', 'h'):
+        data.attrs['trading_session'] = trading_session(yf_ticker.history_metadata)
+    try_archive_bars(symbol, interval, data)
+    return data
+
+
+def get_ticker_price_frame(symbol: str, interval: str, start_date: str, end_date: str, adjust=True) -> pd.DataFrame:
+    """
+    获取 symbol 的价格数据 DataFrame，由缓存的未复权数据计算
+    聚合周期先对基础周期复权再聚合，除息日所在的周线、月线与上游一致
+    :param symbol: symbol 名称
+    :param interval: 时间间隔 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo
+    :param start_date: 开始日期  2025-06-23
+    :param end_date: 结束日期  2025-06-23
+    :param adjust: True 返回分红复权价格，False 返回未复权价格
+    :return: index 为 date（交易所时区），列为 open, high, low, close, volume, dividends, stock_splits
+    """
+    if not adjust:
+        return get_ticker_raw_price_frame(symbol, interval, start_date, end_date).drop(columns='adj_close', errors='ignore')
+    base_interval = get_base_interval(interval, start_date, end_date)
+    if base_interval is not None:
+        session = get_ticker_raw_price_frame(symbol, base_interval, start_date, end_date).attrs.get('trading_session', ())
+        return resample_prices(get_ticker_price_frame(symbol, base_interval, start_date, end_date), interval, session)
+    return adjust_prices(get_ticker_raw_price_frame(symbol, interval, start_date, end_date))
+
+
+@cache(timeout=60*60)
+def get_corporate_actions(symbol: str, start_date: str, end_date: str) -> tuple[CorporateActionItem, ...]:
+    """
+    获取 symbol 的分红和拆股，由缓存的未复权日线提取，与价格数据共用同一次上游获取
+    :param symbol: symbol 名称
+    :param start_date: 开始日期  2025-06-23
+    :param end_date: 结束日期  2025-06-23
+    :return: 按日期升序的分红和拆股
+    """
+    data = corporate_actions(get_ticker_raw_price_frame(symbol, '1d', start_date, end_date))
+    data = data.reset_index().to_dict(orient='records')
+    return [to_model(item, CorporateActionItem) for item in data]
+
+
+@cache(timeout=60*60, max_bytes=128*1024*1024)
+def get_ticker_prices(symbol: str, interval: str, start_date: str, end_date: str, currency: str = None, adjust=True) -> tuple[TickerPriceItem, ...]:
+    """
+    获取 symbol 的价格数据
+    :param symbol: symbol 名称
+    :param interval: 时间间隔 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo
+    :param start_date: 开始日期  2025-06-23
+    :param end_date: 结束日期  2025-06-23
+    :param currency: 换算的目标币种，None 时为交易币种
+    :param adjust: True 返回分红复权价格，False 返回未复权价格
+    :return: symbol 的价格数据
+    """
+    data = get_ticker_price_frame(symbol, interval, start_date, end_date, adjust)
+    if currency is not None:
+        data = _convert_currency(symbol, data, currency, PRICE_CURRENCY_COLUMNS)
 
     # convert  pd.DataFrame to list
     data = data.reset_index()
@@ -55,11 +228,48 @@ def get_ticker_prices(symbol: str, interval: str, start_date: str, end_date: str
     price_items = [to_model(item, TickerPriceItem) for item in data]
     return price_items
 
+@cache(timeout=60*60, max_bytes=64*1024*1024)
+def get_ticker_indicator_frame(symbol: str, interval: str, start_date: str, end_date: str, window=14) -> pd.DataFrame:
+    """
+    获取 symbol 的技术指标 DataFrame，基于缓存的价格数据计算
+    价格数据从开始日期之前预热（见 indicator_start_date），计算后去掉开始日期之前的行，第一根 K 线的指标也是完整的
+    :param symbol: symbol 名称
+    :param interval: 时间间隔 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo
+    :param start_date: 开始日期  2025-06-23
+    :param end_date: 结束日期  2025-06-23
+    :param window: 指标窗口大小
+    :return: index 为 date，列为各项技术指标
+    """
+    data = get_ticker_price_frame(symbol, interval, indicator_start_date(start_date, interval, window), end_date)
+    return trim_before(calculate_indicators(data, interval, window), start_date)
+
+
 @cache(timeout=60*60)
-def get_ticker_news(symbol: str, count=10) -> list[NewsItem]:
+def get_ticker_indicators(symbol: str, interval: str, start_date: str, end_date: str, window=14, latest=True) -> tuple[TickerIndicatorItem, ...]:
+    """
+    获取 symbol 的技术指标：收益率、SMA、EMA、RSI、ATR、波动率、52 周最高/最低
+    :param symbol: symbol 名称
+    :param interval: 时间间隔 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo
+    :param start_date: 开始日期  2025-06-23
+    :param end_date: 结束日期  2025-06-23
+    :param window: 指标窗口大小
+    :param latest: True 只返回最后一根 K 线的指标，False 返回整个序列
+    :return: symbol 的技术指标
+    """
+    data = get_ticker_indicator_frame(symbol, interval, start_date, end_date, window)
+    if latest:
+        data = data.tail(1)
+    data = data.reset_index()
+    data = data.to_dict(orient='records')
+    indicator_items = [to_model(item, TickerIndicatorItem) for item in data]
+    return indicator_items
+
+
+def fetch_ticker_news(symbol: str, count=10) -> list[NewsItem]:
     """
-    获取 symbol 的新闻数据
+    从上游获取 symbol 最新的新闻数据
     :param symbol: symbol 名称
+    :param count: 新闻数量
     :return: symbol 的新闻数据
     """
     yf_ticker = yf.Ticker(symbol)
@@ -72,67 +282,143 @@ def get_ticker_news(symbol: str, count=10) -> list[NewsItem]:
     return news_items
 
 
-@cache(timeout=60*60*24)
-def get_income_stmt(symbol: str, freq="yearly") -> list[IncomeStmtItem]:
+news_store = NewsStore(fetch_ticker_news)
+register_invalidator('news', news_store.invalidate)
+
+
+def get_ticker_news(symbol: str, count=10, since: str = None) -> list[NewsItem]:
     """
-    获取 symbol 的分红数据
+    获取 symbol 的新闻数据，文章按 id 合并保存，较小的 count 由已获取的文章提供
+    :param symbol: symbol 名称
+    :param count: 新闻数量
+    :param since: 只返回发布时间晚于该时间的新闻  2025-07-31T12:00:00Z
+    :return: symbol 的新闻数据
+    """
+    return news_store.get(symbol, count, since)
+
+
+# 只查询新闻存储：已有文章未过期且足以回答请求时返回结果，不排队
+get_ticker_news.cached = news_store.cached
+
+
+def _to_statement_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    将上游财务报表转为 index 为 date、列为报表项目（下划线命名）的 DataFrame
+    :param data: 上游财务报表，行为报表项目（驼峰命名），列为报表日期
+    :return: 财务报表 DataFrame
+    """
+    data = data.T.apply(pd.to_numeric, errors='coerce')
+    data.rename(columns=camel_to_snake, inplace=True)
+    data.index.name = 'date'
+    return data
+
+
+@cache(timeout=60*60*24, shared=True)
+def get_income_stmt_frame(symbol: str, freq="yearly") -> pd.DataFrame:
+    """
+    获取 symbol 的利润表 DataFrame
+    freq 为 trailing 时由季度利润表（缓存或上游获取）在本地计算 TTM，不单独访问上游的 trailing 报表
     :param symbol: symbol 名称
     :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
-    :return: symbol 的分红数据
+    :return: index 为 date，列为利润表项目
     """
+    if freq == 'trailing':
+        return calculate_trailing(get_income_stmt_frame(symbol, 'quarterly'), INCOME_STMT_STOCK_ITEMS)
     yf_ticker = yf.Ticker(symbol)
-    data = yf_ticker.get_income_stmt(freq=freq, as_dict=True)
-    # dict key to list, key attr name is date
-    data = [{**item, 'date': key} for key, item in data.items()]
-    convert_list_dict_camel_to_snake(data)
+    return _to_statement_frame(yf_ticker.get_income_stmt(freq=freq, as_dict=False))
+
+
+@cache(timeout=60*60*24, shared=True)
+def get_balance_sheet_frame(symbol: str, freq="yearly") -> pd.DataFrame:
+    """
+    获取 symbol 的资产负债表 DataFrame
+    资产负债表都是时点数据，没有 trailing 报表，需要 TTM 对应的资产负债表时使用季度报表
+    :param symbol: symbol 名称
+    :param freq: 时间间隔 "yearly" or "quarterly"
+    :return: index 为 date，列为资产负债表项目
+    :raises DataError: freq 为 trailing
+    """
+    if freq == 'trailing':
+        raise DataError("Balance sheets have no trailing frequency, use quarterly")
+    yf_ticker = yf.Ticker(symbol)
+    return _to_statement_frame(yf_ticker.get_balance_sheet(freq=freq, as_dict=False))
+
+
+@cache(timeout=60*60*24, shared=True)
+def get_cash_flow_frame(symbol: str, freq="yearly") -> pd.DataFrame:
+    """
+    获取 symbol 的现金流量表 DataFrame
+    freq 为 trailing 时由季度现金流量表（缓存或上游获取）在本地计算 TTM，不单独访问上游的 trailing 报表
+    :param symbol: symbol 名称
+    :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :return: index 为 date，列为现金流量表项目
+    """
+    if freq == 'trailing':
+        return calculate_trailing(get_cash_flow_frame(symbol, 'quarterly'), CASH_FLOW_STOCK_ITEMS, CASH_FLOW_OPENING_ITEMS)
+    yf_ticker = yf.Ticker(symbol)
+    return _to_statement_frame(yf_ticker.get_cash_flow(freq=freq, as_dict=False))
+
+
+@cache(timeout=60*60*24, shared=True)
+def get_income_stmt(symbol: str, freq="yearly", currency: str = None) -> tuple[IncomeStmtItem, ...]:
+    """
+    获取 symbol 的利润表
+    :param symbol: symbol 名称
+    :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :param currency: 换算的目标币种，None 时为报表币种
+    :return: symbol 的利润表
+    """
+    data = get_income_stmt_frame(symbol, freq)
+    if currency is not None:
+        data = _convert_currency(symbol, data, currency, statement_currency_columns(data), statement=True)
+    data = data.reset_index().to_dict(orient='records')
     # Convert list of dicts to IncomeStmtItem models
     income_stmt_items = [to_model(item, IncomeStmtItem) for item in data]
-    for item in income_stmt_items:
-        calculate_income_stmt_missing(item)
+    # 在写入缓存前补全缺失字段，模型不可变，补全结果生成新对象
+    income_stmt_items = [item.model_copy(update=calculate_income_stmt_missing(item)) for item in income_stmt_items]
     return income_stmt_items
 
 
-def get_balance_sheet(symbol: str, freq="yearly") -> list[BalanceSheetItem]:
+@cache(timeout=60*60*24, shared=True)
+def get_balance_sheet(symbol: str, freq="yearly", currency: str = None) -> tuple[BalanceSheetItem, ...]:
     """
     获取 symbol 的资产负债表
     :param symbol: symbol 名称
-    :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :param freq: 时间间隔 "yearly" or "quarterly"，没有 trailing
+    :param currency: 换算的目标币种，None 时为报表币种
     :return: symbol 的资产负债表
     """
-    yf_ticker = yf.Ticker(symbol)
-    data = yf_ticker.get_balance_sheet(freq=freq, as_dict=True)
-    # dict key to list, key attr name is date
-    data = [{**item, 'date': key} for key, item in data.items()]
-    convert_list_dict_camel_to_snake(data)
-    
+    data = get_balance_sheet_frame(symbol, freq)
+    if currency is not None:
+        data = _convert_currency(symbol, data, currency, statement_currency_columns(data), statement=True)
+    data = data.reset_index().to_dict(orient='records')
     # Convert list of dicts to BalanceSheetItem models
     balance_sheet_items = [to_model(item, BalanceSheetItem) for item in data]
-    for item in balance_sheet_items:
-        calculate_balance_sheet_missing(item)
+    balance_sheet_items = [item.model_copy(update=calculate_balance_sheet_missing(item)) for item in balance_sheet_items]
     return balance_sheet_items
 
-def get_cash_flow(symbol: str, freq="yearly") -> list[CashFlowItem]:
+
+@cache(timeout=60*60*24, shared=True)
+def get_cash_flow(symbol: str, freq="yearly", currency: str = None) -> tuple[CashFlowItem, ...]:
     """
     获取 symbol 的现金流量表
     :param symbol: symbol 名称
     :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :param currency: 换算的目标币种，None 时为报表币种
     :return: symbol 的现金流量表
     """
-    yf_ticker = yf.Ticker(symbol)
-    data = yf_ticker.get_cash_flow(freq=freq, as_dict=True)
-    # dict key to list, key attr name is date
-    data = [{**item, 'date': key} for key, item in data.items()]
-    convert_list_dict_camel_to_snake(data)
-    
+    data = get_cash_flow_frame(symbol, freq)
+    if currency is not None:
+        data = _convert_currency(symbol, data, currency, statement_currency_columns(data), statement=True)
+    data = data.reset_index().to_dict(orient='records')
     # Convert list of dicts to CashFlowItem models
     cash_flow_items = [to_model(item, CashFlowItem) for item in data]
-    for item in cash_flow_items:
-        calculate_cash_flow_missing(item)
+    cash_flow_items = [item.model_copy(update=calculate_cash_flow_missing(item)) for item in cash_flow_items]
     return cash_flow_items
 
 
-@cache(timeout=60*60*24)
-def get_insider_transactions(symbol: str) -> list[InsiderTransactionItem]:
+@cache(timeout=60*60*24, shared=True)
+def get_insider_transactions(symbol: str) -> tuple[InsiderTransactionItem, ...]:
     """
     获取内部人交易数据
     :param symbol: ticker名称
@@ -152,8 +438,8 @@ def get_insider_transactions(symbol: str) -> list[InsiderTransactionItem]:
     insider_transaction_items = [to_model(item, InsiderTransactionItem) for item in data]
     return insider_transaction_items
 
-@cache(timeout=60*60*24)
-def get_insider_roster_holders(symbol: str) -> list[InsiderRosterHolderItem]:
+@cache(timeout=60*60*24, shared=True)
+def get_insider_roster_holders(symbol: str) -> tuple[InsiderRosterHolderItem, ...]:
     """
     获取内部人持股数据
     :param symbol: ticker名称
@@ -174,7 +460,7 @@ def get_insider_roster_holders(symbol: str) -> list[InsiderRosterHolderItem]:
 
 
 @cache(timeout=60*60)
-def get_insider_purchases(symbol: str) -> list[InsiderPurchaseItem]:
+def get_insider_purchases(symbol: str) -> tuple[InsiderPurchaseItem, ...]:
     """
     获取内部人购买数据
     :param symbol: ticker名称
@@ -193,34 +479,85 @@ def get_insider_purchases(symbol: str) -> list[InsiderPurchaseItem]:
     insider_purchase_items = [to_model(item, InsiderPurchaseItem) for item in data]
     return insider_purchase_items
 
-@cache(timeout=60*60)
-def get_financial_metrics(symbol: str, freq="yearly") -> list[FinancialMetricItem]:
+def _update_peer_metrics(metrics, symbol: str, freq="yearly", currency: str = None):
+    """取得新的财务指标后更新行业统计，行业统计使用年度指标"""
+    if freq == 'yearly' and currency is None:
+        peer_stats.update_metrics(symbol, metrics)
+
+
+@cache(timeout=60*60, shared=True, on_load=_update_peer_metrics)
+def get_financial_metrics(symbol: str, freq="yearly", currency: str = None) -> tuple[FinancialMetricItem, ...]:
     """
     获取 symbol 的财务指标数据
     :param symbol: symbol 名称
     :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :param currency: 换算的目标币种，None 时不换算
     :return: symbol 的财务指标数据
     """
-    response = get_financial_items(symbol, None, freq)
+    response = get_financial_items(symbol, None, freq, currency)
     #  FinancialItem to FinancialMetricItem
     financial_metrics_items = [to_model(item.model_dump(), FinancialMetricItem) for item in response]
     return financial_metrics_items
 
 
-def get_financial_items(symbol: str, items: list[str] = None, freq="yearly") -> list[FinancialItem]:
+def _to_items_frame(items) -> pd.DataFrame:
+    """
+    将数据模型列表转为 DataFrame，字段与 JSON 接口返回的一致
+    :param items: 数据模型列表，包含 date 字段
+    :return: index 为 date，列为模型字段（不含 symbol），items 为空时返回空 DataFrame
+    """
+    data = pd.DataFrame([item.model_dump(exclude={'symbol'}) for item in items])
+    return data.set_index('date') if not data.empty else data
+
+
+def get_financial_metrics_frame(symbol: str, freq="yearly") -> pd.DataFrame:
+    """
+    获取 symbol 的财务指标 DataFrame
+    :param symbol: symbol 名称
+    :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :return: index 为 date，列为财务指标
+    """
+    return _to_items_frame(get_financial_metrics(symbol, freq))
+
+
+def get_statement_export_frame(statement: str, symbol: str, freq="yearly") -> pd.DataFrame:
+    """
+    获取用于导出的财务报表或财务指标 DataFrame，由 JSON 接口缓存的结果转换，
+    包含 calculate_*_missing 补全的字段，与 JSON 接口返回的数据一致
+    :param statement: income_stmt, balance_sheet, cash_flow 或 financial_metrics
+    :param symbol: symbol 名称
+    :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :return: index 为 date，列为报表项目或财务指标
+    """
+    fetch_items = {
+        'income_stmt': get_income_stmt,
+        'balance_sheet': get_balance_sheet,
+        'cash_flow': get_cash_flow,
+        'financial_metrics': get_financial_metrics,
+    }[statement]
+    return _to_items_frame(fetch_items(symbol, freq))
+
+
+@cache(timeout=60*60)
+def get_financial_items(symbol: str, items: tuple[str, ...] = None, freq="yearly", currency: str = None) -> tuple[FinancialItem, ...]:
     """
     获取 symbol 的财务指标数据
+    指定 currency 时报表和价格先换算为同一币种再计算，交易币种与报表币种不同时估值指标也保持一致
     :param symbol: symbol 名称
     :param items: 财务指标列表, 如果为 None, 则返回 计算的财务指标
     :param freq: 时间间隔 "yearly" or "quarterly" or "trailing"
+    :param currency: 换算的目标币种，None 时不换算
     :return: symbol 的财务指标数据
     """
     if items is not None and 'date' not in items:
-        items.append('date')
+        items = [*items, 'date']
 
-    income_stmt_list = get_income_stmt(symbol, freq)
-    balance_sheet_list = get_balance_sheet(symbol, freq)
-    cash_flow_list = get_cash_flow(symbol, freq)
+    income_stmt_list = get_income_stmt(symbol, freq, currency)
+    if not income_stmt_list:
+        raise NoDataError(f"No financial statements found for symbol: {symbol}")
+    # TTM 报表与同一季末的季度资产负债表组合
+    balance_sheet_list = get_balance_sheet(symbol, 'quarterly' if freq == 'trailing' else freq, currency)
+    cash_flow_list = get_cash_flow(symbol, freq, currency)
 
     # 检查 income_stmt_list， balance_sheet_list，cash_flow_list， 按 date 倒序
     income_stmt_list = sorted(income_stmt_list, key=lambda x: x.date, reverse=True)
@@ -248,6 +585,8 @@ def get_financial_items(symbol: str, items: list[str] = None, freq="yearly") ->
     income_stmt_list = [item for item in income_stmt_list if item.date.strftime('%Y-%m') in year_months]
     balance_sheet_list = [item for item in balance_sheet_list if item.date.strftime('%Y-%m') in year_months]
     cash_flow_list = [item for item in cash_flow_list if item.date.strftime('%Y-%m') in year_months]
+    if not income_stmt_list:
+        raise NoDataError(f"No complete financial statements found for symbol: {symbol}")
 
     # 获取最大 date 和 最小 date
     max_date = None
@@ -265,7 +604,9 @@ def get_financial_items(symbol: str, items: list[str] = None, freq="yearly") ->
     min_date = min_date.strftime('%Y-%m-%d')
 
     # prices 升序排列
-    prices = get_ticker_prices(symbol, '1d', min_date, max_date)
+    prices = get_ticker_prices(symbol, '1d', min_date, max_date, currency)
+    if not prices:
+        raise NoDataError(f"No prices found for symbol: {symbol}")
 
     # 计算财务指标
     financial_items = []
@@ -310,10 +651,43 @@ def get_financial_items(symbol: str, items: list[str] = None, freq="yearly") ->
     financial_items = [to_model(item, FinancialItem) for item in financial_items]
     return financial_items
 
-@cache(timeout=60*60)
+def _lookup_ticker(query: str, fetch_upstream) -> list[LookupItem]:
+    """
+    搜索 symbol 名称，symbol 或名称与关键词完全相同时直接返回本地结果；
+    否则使用上游结果，并补充上游结果中没有的本地匹配，上游结果加入本地索引
+    :param fetch_upstream: 获取上游结果的函数，lookup_ticker_upstream 或只查询其缓存的 lookup_ticker_upstream.cached
+    :return: 搜索结果列表，fetch_upstream 未命中缓存时返回 MISSING
+    """
+    local_items, exact = symbol_index.match(query)
+    if exact:
+        return local_items
+    try:
+        lookup_items = fetch_upstream(query.strip())
+    except DataError:
+        # 上游没有结果或暂时失败时使用本地的部分匹配
+        if local_items:
+            return local_items
+        raise
+    if lookup_items is MISSING:
+        return MISSING
+    symbol_index.add(lookup_items)
+    symbols = {item.symbol for item in lookup_items}
+    return [*lookup_items, *(item for item in local_items if item.symbol not in symbols)]
+
+
 def lookup_ticker(query: str) -> list[LookupItem]:
     """
-    搜索 symbol 名称
+    搜索 symbol 名称，先在本地 symbol 索引中搜索，见 _lookup_ticker
+    :param query: 搜索关键词
+    :return: 搜索结果列表
+    """
+    return _lookup_ticker(query, lookup_ticker_upstream)
+
+
+@cache(timeout=60*60, shared=True)
+def lookup_ticker_upstream(query: str) -> tuple[LookupItem, ...]:
+    """
+    从上游搜索 symbol 名称
     :param query: 搜索关键词
     :return: 搜索结果列表
     """
@@ -330,3 +704,7 @@ def lookup_ticker(query: str) -> list[LookupItem]:
     # Convert list of dicts to LookupItem models
     lookup_items = [to_model(item, LookupItem) for item in stock_data]
     return lookup_items
+
+
+# 只查询缓存：本地完全匹配或上游结果已缓存时返回结果，不排队
+lookup_ticker.cached = functools.partial(_lookup_ticker, fetch_upstream=lookup_ticker_upstream.cached)
@@ -0,0 +1,139 @@
+import os
+import json
+import asyncio
+from collections import deque
+from src.common.errors import OverloadedError
+
+# 同时处理的请求数（不含缓存命中），0 表示不限制
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", 64))
+# 各个路由同时处理的请求数，JSON 对象，例如 {"/api/v1/ticker/prices": 16}
+ADMISSION_ROUTE_LIMITS = json.loads(os.getenv("ADMISSION_ROUTE_LIMITS", "") or "{}")
+# 等待队列长度，队列已满时直接拒绝
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 128))
+# 在等待队列中的最长时间，单位为秒，超时后拒绝
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 5))
+# Retry-After 的范围，单位为秒
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionController:
+    """
+    准入控制，只在事件循环线程中使用
+    全局和每个路由的同时处理数有空闲时直接处理，否则进入有界的等待队列，
+    队列已满或等待超时时抛出 OverloadedError（503 + Retry-After），避免请求堆积到客户端超时
+    """
+
+    def __init__(self, max_inflight: int = ADMISSION_MAX_INFLIGHT, route_limits: dict = None,
+                 queue_size: int = ADMISSION_QUEUE_SIZE, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.max_inflight = max_inflight
+        self.route_limits = ADMISSION_ROUTE_LIMITS if route_limits is None else route_limits
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.route_active = {}
+        self.shed = {}
+        # 请求处理时间的指数移动平均，用于估算 Retry-After
+        self.latency = 1.0
+        self._waiters = deque()
+
+    def _can_run(self, route: str) -> bool:
+        if self.max_inflight and self.active >= self.max_inflight:
+            return False
+        limit = self.route_limits.get(route)
+        return not limit or self.route_active.get(route, 0) < limit
+
+    def _start(self, route: str):
+        self.active += 1
+        self.route_active[route] = self.route_active.get(route, 0) + 1
+
+    def _dispatch(self):
+        """按到达顺序处理等待中的请求，被路由限制的请求不阻塞其他路由"""
+        for entry in list(self._waiters):
+            future, route = entry
+            if future.done():
+                self._waiters.remove(entry)
+            elif self._can_run(route):
+                self._waiters.remove(entry)
+                self._start(route)
+                future.set_result(None)
+
+    def retry_after(self) -> float:
+        """按排队数量和平均处理时间估算可以重试的时间"""
+        capacity = self.max_inflight or max(self.active, 1)
+        seconds = (len(self._waiters) + 1) * self.latency / capacity
+        return min(max(seconds, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def _reject(self, route: str, reason: str):
+        self.shed[route] = self.shed.get(route, 0) + 1
+        raise OverloadedError(f"Service overloaded: {reason}", self.retry_after())
+
+    async def acquire(self, route: str):
+        """
+        获取处理名额，需要与 release 成对调用
+        :param route: 路由路径
+        """
+        if self._can_run(route):
+            self._start(route)
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject(route, "queue is full")
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, route)
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self._reject(route, "queue wait timed out")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(route, None)
+            self._remove(entry)
+            raise
+
+    def _remove(self, entry):
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+
+    def release(self, route: str, elapsed: float = None):
+        """
+        释放处理名额
+        :param elapsed: 处理时间，单位为秒，None 表示不计入平均处理时间
+        """
+        self.active -= 1
+        self.route_active[route] -= 1
+        if elapsed is not None:
+            self.latency = self.latency * 0.9 + elapsed * 0.1
+        self._dispatch()
+
+    def stats(self) -> list:
+        """
+        获取各个路由的准入状态
+        :return: [{route, limit, active, waiting, shed}]，以及 total 汇总
+        """
+        routes = set(self.route_active) | set(self.shed) | set(self.route_limits)
+        waiting = {}
+        for future, route in self._waiters:
+            if not future.done():
+                waiting[route] = waiting.get(route, 0) + 1
+        usage = [{
+            'route': route,
+            'limit': self.route_limits.get(route),
+            'active': self.route_active.get(route, 0),
+            'waiting': waiting.get(route, 0),
+            'shed': self.shed.get(route, 0),
+        } for route in sorted(routes)]
+        usage.append({
+            'route': 'total',
+            'limit': self.max_inflight or None,
+            'active': self.active,
+            'waiting': sum(waiting.values()),
+            'shed': sum(self.shed.values()),
+        })
+        return usage
+
+
+admission = AdmissionController()
@@ -1,30 +1,656 @@
+import os
+import sys
 import time
+import threading
 import functools
+import copy
+import inspect
+import heapq
+import fnmatch
+import itertools
+from collections import namedtuple
+from src.common.errors import DataError, NoDataError
+from src.common.canonical import CANONICAL_PARAMS, canonical_symbol
+from src.common.deadline import check_deadline, remaining
+from src.common import shared_cache
 
+# 全局缓存内存预算，单位为字节，0 表示不限制
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# 负缓存时间，单位为秒：上游返回空结果（没有数据）时使用
+NEGATIVE_CACHE_TIMEOUT = int(os.getenv("NEGATIVE_CACHE_TIMEOUT", 5 * 60))
+# 负缓存时间，单位为秒：上游抛出 DataError 时使用，异常可能是暂时的，缓存时间更短
+NEGATIVE_ERROR_TIMEOUT = int(os.getenv("NEGATIVE_ERROR_TIMEOUT", 30))
+# 估算列表大小时的采样个数，超过该长度的同构列表按样本外推
+SIZE_SAMPLE_COUNT = 16
+# 同步其他进程失效操作的间隔，单位为秒
+INVALIDATION_SYNC_INTERVAL = 1.0
+# 失效时每次持有锁删除的条目数，避免长时间阻塞读取
+INVALIDATION_BATCH = 256
 
-def cache(timeout: int, *lru_args, **lru_kwargs):
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize", "bytes", "max_bytes", "evictions",
+                                     "negative_hits", "negative_entries"])
+
+_lock = threading.RLock()
+_registry = {}
+# 已注册的缓存存储占用的字节数合计，随条目加入、删除更新
+_total = 0
+# 淘汰堆中条目的序号，相同权重时按加入顺序，且不比较缓存键
+_sequence = itertools.count()
+# 不使用 cache 装饰器、自行保存数据的组件按 symbol 失效的函数 {名称: invalidate(symbol) -> 失效条目数}
+_invalidators = {}
+# 已同步的共享缓存失效记录 id
+_invalidation_id = None
+# 同步失效操作的后台线程
+_sync_thread = None
+# cached 未命中时的返回值
+MISSING = object()
+
+
+def estimate_size(value, _seen=None) -> int:
+    """
+    估算对象占用的内存字节数
+    列表/元组超过 SIZE_SAMPLE_COUNT 个元素时，按前几个元素的平均大小外推，避免遍历大列表
+    :param value: 任意对象
+    :return: 字节数
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    # pandas DataFrame / Series
+    if callable(getattr(value, 'memory_usage', None)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    # numpy array
+    if hasattr(value, 'nbytes') and hasattr(value, 'dtype'):
+        return int(value.nbytes)
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value) if not isinstance(value, (list, tuple)) else value
+        if len(items) > SIZE_SAMPLE_COUNT:
+            sample = items[:SIZE_SAMPLE_COUNT]
+            sample_size = sum(estimate_size(item, _seen) for item in sample)
+            return size + sample_size * len(items) // len(sample)
+        return size + sum(estimate_size(item, _seen) for item in items)
+    # Pydantic 模型及普通对象
+    if hasattr(value, '__dict__'):
+        return size + estimate_size(value.__dict__, _seen)
+    return size
+
+
+class _CacheEntry:
+    """缓存条目，negative 为 True 时表示负缓存，value 为空结果或异常对象"""
+    __slots__ = ('value', 'size', 'cost', 'expiration', 'hits', 'negative')
+
+    def __init__(self, value, size: int, cost: float, expiration: float, negative: bool = False):
+        self.value = value
+        self.size = size
+        self.cost = cost
+        self.expiration = expiration
+        self.hits = 0
+        self.negative = negative
+
+    def score(self) -> float:
+        """
+        淘汰权重，越小越先被淘汰
+        重新获取的代价（耗时）越高、命中越多，权重越大；占用内存越大，权重越小
+        """
+        return self.cost * (self.hits + 1) / max(self.size, 1)
+
+
+class _CacheStore:
+    """
+    单个函数的缓存存储，调用方需持有 _lock
+    淘汰候选保存在两个惰性删除的小顶堆中：按过期时间和按 score，条目删除或替换后堆中的旧记录在出堆时跳过；
+    score 只会随命中增加，堆顶记录的 score 过时时更新后放回，选出淘汰条目不需要遍历所有条目
     """
-    缓存装饰器，用于缓存函数的返回值，缓存时间为 timeout 秒
+
+    def __init__(self, name: str, timeout: int, max_bytes: int = None, maxsize: int = None,
+                 negative_timeout: int = NEGATIVE_CACHE_TIMEOUT):
+        self.name = name
+        # 被缓存的函数、签名、缓存键中 symbol 参数的位置，由 cache 装饰器设置
+        self.func = None
+        self.signature = None
+        self.symbol_index = None
+        self.shared = False
+        # 每次失效时加一，失效前开始的获取不再写入缓存
+        self.generation = 0
+        self.timeout = timeout
+        self.negative_timeout = negative_timeout
+        self.max_bytes = max_bytes
+        self.maxsize = maxsize
+        self.entries = {}
+        self.bytes = 0
+        # 是否计入全局字节数，同名函数重新注册后旧的存储不再计入
+        self.registered = False
+        # [(过期时间, 序号, 缓存键, 条目)]、[(score, 序号, 缓存键, 条目)]
+        self._expirations = []
+        self._scores = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.negative_hits = 0
+
+    def negative_entries(self) -> int:
+        return sum(1 for entry in self.entries.values() if entry.negative)
+
+    def over_budget(self) -> bool:
+        if self.max_bytes and self.bytes > self.max_bytes:
+            return True
+        return bool(self.maxsize) and len(self.entries) > self.maxsize
+
+    def _resize(self, delta: int):
+        global _total
+        self.bytes += delta
+        if self.registered:
+            _total += delta
+
+    def add(self, key, entry: _CacheEntry):
+        """加入条目，替换相同缓存键的旧条目"""
+        self.remove(key)
+        self.entries[key] = entry
+        self._resize(entry.size)
+        sequence = next(_sequence)
+        heapq.heappush(self._expirations, (entry.expiration, sequence, key, entry))
+        heapq.heappush(self._scores, (entry.score(), sequence, key, entry))
+        # 已删除条目的旧记录过多时重建堆
+        if len(self._scores) > 2 * len(self.entries) + 64:
+            self._expirations = [item for item in self._expirations if self.entries.get(item[2]) is item[3]]
+            self._scores = [item for item in self._scores if self.entries.get(item[2]) is item[3]]
+            heapq.heapify(self._expirations)
+            heapq.heapify(self._scores)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self._resize(-entry.size)
+        return entry
+
+    def clear(self):
+        self._resize(-self.bytes)
+        self.entries.clear()
+        self._expirations = []
+        self._scores = []
+
+    def victim(self, now: float):
+        """
+        应当最先淘汰的条目：已过期的条目中最早过期的，没有时为 score 最小的条目
+        :return: ((是否未过期, score), 缓存键)，没有条目时返回 None
+        """
+        while self._expirations:
+            expiration, _, key, entry = self._expirations[0]
+            if self.entries.get(key) is not entry:
+                heapq.heappop(self._expirations)
+                continue
+            if expiration <= now:
+                return (False, entry.score()), key
+            break
+        while self._scores:
+            score, sequence, key, entry = self._scores[0]
+            if self.entries.get(key) is not entry:
+                heapq.heappop(self._scores)
+                continue
+            current = entry.score()
+            if current != score:
+                heapq.heapreplace(self._scores, (current, sequence, key, entry))
+                continue
+            return (True, score), key
+        return None
+
+    def symbol_of(self, key):
+        if self.symbol_index is None or len(key) <= self.symbol_index:
+            return None
+        return key[self.symbol_index]
+
+    def matches(self, key, symbol: str = None, pattern: str = None) -> bool:
+        if symbol is not None and self.symbol_of(key) != symbol:
+            return False
+        return pattern is None or fnmatch.fnmatchcase(repr(key), pattern)
+
+    def prefetchable(self) -> bool:
+        """除 symbol 外的参数都有默认值时，可以只按 symbol 预取"""
+        if self.symbol_index is None:
+            return False
+        return all(parameter.default is not inspect.Parameter.empty
+                   for name, parameter in self.signature.parameters.items() if name != 'symbol')
+
+
+def _evict_one(stores, now: float) -> bool:
+    """
+    从给定的缓存存储中淘汰一个条目，已过期的条目优先，其次淘汰 score 最小的条目
+    每个存储只比较堆顶，耗时与存储数和堆大小的对数成正比
+    :return: 是否淘汰成功
+    """
+    victim = None
+    victim_rank = None
+    for store in stores:
+        candidate = store.victim(now)
+        if candidate is not None and (victim_rank is None or candidate[0] < victim_rank):
+            victim_rank, victim = candidate[0], (store, candidate[1])
+    if victim is None:
+        return False
+    store, key = victim
+    store.remove(key)
+    store.evictions += 1
+    return True
+
+
+def _total_bytes() -> int:
+    return _total
+
+
+def _register(store: _CacheStore):
+    """注册缓存存储，同名函数重新定义时，旧的存储不再计入全局预算"""
+    global _total
+    with _lock:
+        old = _registry.get(store.name)
+        if old is not None:
+            old.registered = False
+            _total -= old.bytes
+        store.registered = True
+        _registry[store.name] = store
+
+
+def _enforce_budget(store: _CacheStore):
+    """淘汰条目直到函数预算和全局预算都满足，调用方需持有 _lock"""
+    now = time.monotonic()
+    while store.over_budget():
+        if not _evict_one([store], now):
+            break
+    while CACHE_MAX_BYTES and _total_bytes() > CACHE_MAX_BYTES:
+        if not _evict_one(_registry.values(), now):
+            break
+
+
+def freeze(value):
+    """
+    将函数结果转为只读对象后再写入缓存，缓存命中时直接共享同一个对象，不需要防御性拷贝
+    列表转为元组；数据模型本身声明为 frozen，不允许修改属性；
+    DataFrame、Series 的底层数组设为只读，原地修改数值时抛出异常，需要修改时先 copy()；
+    只读标记只保护数值，替换或新增列、rename(inplace=True)、修改 index、name 和 attrs 无法拦截，
+    使用缓存结果的代码不能原地修改它们，应当使用返回新对象的操作
+    :param value: 函数结果
+    :return: 只读结果
+    """
+    if isinstance(value, list):
+        return tuple(value)
+    blocks = getattr(getattr(value, '_mgr', None), 'blocks', None)
+    if blocks is not None:
+        for block in blocks:
+            flags = getattr(block.values, 'flags', None)
+            if flags is not None:
+                flags.writeable = False
+    return value
+
+
+def is_empty(value) -> bool:
+    """判断函数结果是否为空，空结果写入负缓存"""
+    return value is None or (hasattr(value, '__len__') and len(value) == 0)
+
+
+def _detach_error(e: Exception) -> Exception:
+    """复制异常对象，不保留 traceback，避免负缓存持有调用栈中的大对象"""
+    try:
+        return copy.copy(e)
+    except Exception:
+        return DataError(str(e))
+
+
+def _make_key(args, kwargs):
+    key = args
+    if kwargs:
+        key += (object,) + tuple(sorted(kwargs.items()))
+    return key
+
+
+def _canonical_call(signature: inspect.Signature, args, kwargs):
+    """
+    按函数签名绑定参数并补全默认值，再按参数名称统一参数值（见 CANONICAL_PARAMS），
+    位置参数与关键字参数、省略默认值、symbol 大小写、日期格式等不同写法得到相同的缓存键
+    :return: (args, kwargs, 缓存键)，参数无法绑定时按原参数返回，由函数自身报错
+    """
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return args, kwargs, _make_key(args, kwargs)
+    bound.apply_defaults()
+    for name, value in bound.arguments.items():
+        canonicalize = CANONICAL_PARAMS.get(name)
+        if canonicalize is not None and value is not None:
+            bound.arguments[name] = canonicalize(value)
+    return bound.args, bound.kwargs, tuple(bound.arguments.values())
+
+
+def cache_usage() -> dict:
+    """
+    获取各个缓存函数当前的内存使用情况
+    :return: {函数名: {entries, bytes, max_bytes, hits, misses, evictions, negative_entries, negative_hits}}，
+        以及 total 汇总
+    """
+    with _lock:
+        usage = {
+            name: {
+                'entries': len(store.entries),
+                'bytes': store.bytes,
+                'max_bytes': store.max_bytes,
+                'hits': store.hits,
+                'misses': store.misses,
+                'evictions': store.evictions,
+                'negative_entries': store.negative_entries(),
+                'negative_hits': store.negative_hits,
+            }
+            for name, store in _registry.items()
+        }
+        usage['total'] = {
+            'entries': sum(item['entries'] for item in usage.values()),
+            'bytes': _total_bytes(),
+            'max_bytes': CACHE_MAX_BYTES,
+            'hits': sum(item['hits'] for item in usage.values()),
+            'misses': sum(item['misses'] for item in usage.values()),
+            'evictions': sum(item['evictions'] for item in usage.values()),
+            'negative_entries': sum(item['negative_entries'] for item in usage.values()),
+            'negative_hits': sum(item['negative_hits'] for item in usage.values()),
+        }
+    return usage
+
+
+def register_invalidator(name: str, invalidate):
+    """
+    注册自行保存数据的组件（例如新闻），cache_invalidate 按 symbol 失效时一并调用
+    :param name: 名称
+    :param invalidate: invalidate(symbol) -> 失效条目数
+    """
+    _invalidators[name] = invalidate
+
+
+def _stores(names: list = None) -> list:
+    with _lock:
+        if not names:
+            return list(_registry.values())
+        return [_registry[name] for name in names if name in _registry]
+
+
+def cache_entries(names: list = None, symbol: str = None, pattern: str = None, limit: int = 100) -> list:
+    """
+    列出当前进程中未过期的缓存条目
+    :param names: 缓存函数名称，None 表示所有函数
+    :param symbol: 只列出该 symbol 的条目
+    :param pattern: 只列出缓存键（repr）匹配该 glob 模式的条目，例如 *'AAPL'*'quarterly'*
+    :param limit: 最多返回的条目数
+    :return: [{name, key, symbol, bytes, hits, negative, expires_in}]
+    """
+    symbol = canonical_symbol(symbol) if symbol else None
+    now = time.monotonic()
+    items = []
+    for store in _stores(names):
+        # 只在复制条目列表时持有锁，过滤在锁外进行
+        with _lock:
+            entries = list(store.entries.items())
+        for key, entry in entries:
+            if entry.expiration <= now or not store.matches(key, symbol, pattern):
+                continue
+            items.append({
+                'name': store.name,
+                'key': repr(key),
+                'symbol': store.symbol_of(key),
+                'bytes': entry.size,
+                'hits': entry.hits,
+                'negative': entry.negative,
+                'expires_in': entry.expiration - now,
+            })
+            if len(items) >= limit:
+                return items
+    return items
+
+
+def _invalidate_local(names: list = None, symbol: str = None, pattern: str = None) -> dict:
+    """
+    删除当前进程中匹配的缓存条目
+    :return: {函数名: 删除的条目数}
+    """
+    removed = {}
+    for store in _stores(names):
+        if symbol is not None and store.symbol_index is None:
+            continue
+        with _lock:
+            store.generation += 1
+            keys = list(store.entries)
+        matched = [key for key in keys if store.matches(key, symbol, pattern)]
+        for start in range(0, len(matched), INVALIDATION_BATCH):
+            with _lock:
+                for key in matched[start:start + INVALIDATION_BATCH]:
+                    store.remove(key)
+        if matched:
+            removed[store.name] = len(matched)
+    if symbol is not None and pattern is None and not names:
+        for name, invalidate in list(_invalidators.items()):
+            count = invalidate(symbol)
+            if count:
+                removed[name] = count
+    return removed
+
+
+def _sync_invalidations():
+    """应用其他进程通过共享缓存记录的失效操作"""
+    global _invalidation_id
+    items, _invalidation_id = shared_cache.invalidations_since(_invalidation_id)
+    for names, symbol, pattern in items:
+        _invalidate_local(names, symbol, pattern)
+
+
+def _sync_loop():
+    # 第一次只记录当前最大的 id，启动前的失效操作不影响本进程的缓存
+    while True:
+        _sync_invalidations()
+        time.sleep(INVALIDATION_SYNC_INTERVAL)
+
+
+def start_invalidation_sync():
+    """
+    启动后台线程，每 INVALIDATION_SYNC_INTERVAL 秒应用其他进程的失效操作，查询缓存时不访问共享缓存层
+    未配置共享缓存或已启动时不执行
+    """
+    global _sync_thread
+    with _lock:
+        if not shared_cache.enabled() or _sync_thread is not None:
+            return
+        _sync_thread = threading.Thread(target=_sync_loop, name="cache-invalidations", daemon=True)
+        _sync_thread.start()
+
+
+def cache_invalidate(names: list = None, symbol: str = None, pattern: str = None) -> dict:
+    """
+    按 symbol 或缓存键模式失效缓存，包括共享缓存层和其他进程的进程内缓存（最多延迟 INVALIDATION_SYNC_INTERVAL 秒）
+    正在进行的获取不会把失效前的结果写回缓存；只按 symbol 失效所有函数时，注册的其他组件（新闻）也一并失效
+    :param names: 缓存函数名称，None 表示所有函数
+    :param symbol: 只失效该 symbol 的条目
+    :param pattern: 只失效缓存键（repr）匹配该 glob 模式的条目
+    :return: {名称: 失效的条目数}，共享缓存层的条目数记在 shared 中
+    """
+    symbol = canonical_symbol(symbol) if symbol else None
+    removed = _invalidate_local(names, symbol, pattern)
+    if shared_cache.enabled():
+        shared_names = [store.name for store in _stores(names) if store.shared]
+        if shared_names:
+            removed['shared'] = shared_cache.invalidate(shared_names, symbol, pattern)
+    return removed
+
+
+def prefetchable_functions() -> list:
+    """可以只按 symbol 预取的缓存函数 [(名称, 函数)]"""
+    return [(store.name, store.func) for store in _stores() if store.prefetchable()]
+
+
+def cache(timeout: int, max_bytes: int = None, maxsize: int = None, negative_timeout: int = None,
+          canonical: bool = True, shared: bool = False, single_flight: bool = False, on_load=None):
+    """
+    缓存装饰器，用于缓存函数的返回值，每个条目缓存时间为 timeout 秒
+    缓存上限按内存字节数计算，同时受函数预算 max_bytes 和全局预算 CACHE_MAX_BYTES 限制，
+    超出预算时优先淘汰已过期的条目，其次淘汰 重新获取耗时 * 命中次数 / 占用字节数 最小的条目
+    函数预算可以通过环境变量 CACHE_MAX_BYTES_<函数名大写> 覆盖
+    结果经 freeze 转为只读对象后缓存，列表结果以元组返回
+    空结果和 DataError（NoDataError 等）写入负缓存，缓存时间较短，期间相同参数的调用直接返回空结果或重新抛出异常，不再访问上游；
+    其他异常（网络错误、程序错误等）不写入缓存，下次调用重新获取
+    canonical 为 True 时，参数先统一写法再生成缓存键，函数也以统一后的参数调用
+    未命中时如果当前请求已超过截止时间，抛出 DeadlineExceededError，不调用函数
+    shared 为 True 且配置了 SHARED_CACHE_PATH 时，非空结果同时写入多进程共享的缓存层，进程内未命中时先查询共享缓存
+    single_flight 为 True 时，相同参数同时未命中的调用只有一个访问上游，其余等待其结果，用于缓存时间很短的热点数据
+    on_load 在每次取得新结果（调用函数或读取共享缓存层）后以 on_load(结果, *参数) 调用，用于维护依赖结果的其他状态；
+    进程内缓存命中时结果没有变化，不调用
     :param timeout: 缓存时间，单位为秒
-    :param lru_args: lru_cache 的参数
-    :param lru_kwargs: lru_cache 的参数
+    :param max_bytes: 该函数的缓存内存预算，单位为字节，None 表示只受全局预算限制
+    :param maxsize: 该函数最多缓存的条目数，None 表示不限制
+    :param negative_timeout: 空结果的负缓存时间，单位为秒，默认为 NEGATIVE_CACHE_TIMEOUT
+    :param canonical: 是否统一参数写法，False 时缓存键为原始参数
+    :param shared: 是否使用多进程共享的缓存层
+    :param single_flight: 是否合并相同参数的并发未命中
+    :param on_load: 取得新的非空结果后调用的函数，None 表示不调用
     :return: 装饰器
     """
 
     def wrapper_cache(func):
-        func = functools.lru_cache(*lru_args, **lru_kwargs)(func)
-        func.delta = timeout
-        func.expiration = time.monotonic() + func.delta
+        env_max_bytes = os.getenv(f"CACHE_MAX_BYTES_{func.__name__.upper()}")
+        store = _CacheStore(func.__qualname__, timeout,
+                            int(env_max_bytes) if env_max_bytes else max_bytes, maxsize,
+                            NEGATIVE_CACHE_TIMEOUT if negative_timeout is None else negative_timeout)
+        signature = inspect.signature(func)
+        # 缓存键中 symbol 参数的位置，写入共享缓存时记录 symbol，按 symbol 失效时使用
+        symbol_index = list(signature.parameters).index('symbol') if canonical and 'symbol' in signature.parameters else None
+        store.signature = signature
+        store.symbol_index = symbol_index
+        store.shared = shared
+        _register(store)
+
+        def put(key, value, cost: float, expiration: float, negative: bool, generation: int):
+            size = estimate_size(value)
+            # 超过函数预算的单个结果不缓存
+            if store.max_bytes and size > store.max_bytes:
+                return
+            with _lock:
+                # 获取期间缓存已失效，结果可能是失效前的数据
+                if store.generation != generation:
+                    return
+                store.add(key, _CacheEntry(value, size, cost, expiration, negative))
+                _enforce_budget(store)
+
+        def lookup(key):
+            """查询缓存，未命中或已过期时返回 MISSING，负缓存的异常重新抛出"""
+            with _lock:
+                entry = store.entries.get(key)
+                if entry is None or entry.expiration <= time.monotonic():
+                    return MISSING
+                entry.hits += 1
+                if entry.negative:
+                    store.negative_hits += 1
+                else:
+                    store.hits += 1
+                value = entry.value
+            if isinstance(value, BaseException):
+                raise copy.copy(value)
+            return value
+
+        def make_key(args, kwargs):
+            if canonical:
+                return _canonical_call(signature, args, kwargs)
+            return args, kwargs, _make_key(args, kwargs)
+
+        # 正在访问上游的缓存键 {key: Event}，single_flight 时使用
+        flights = {}
 
         @functools.wraps(func)
         def wrapped_func(*args, **kwargs):
-            if time.monotonic() >= func.expiration:
-                func.cache_clear()
-                func.expiration = time.monotonic() + func.delta
-            return func(*args, **kwargs)
+            args, kwargs, key = make_key(args, kwargs)
+            value = lookup(key)
+            if value is not MISSING:
+                return value
+            if not single_flight:
+                return load(args, kwargs, key)
+            with _lock:
+                flight = flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = flights[key] = threading.Event()
+            if not leader:
+                # 等待同一个键的获取完成，结果未写入缓存（不可缓存的异常）时自己获取
+                flight.wait(remaining())
+                value = lookup(key)
+                if value is not MISSING:
+                    return value
+                return load(args, kwargs, key)
+            try:
+                return load(args, kwargs, key)
+            finally:
+                with _lock:
+                    flights.pop(key, None)
+                flight.set()
+
+        def load(args, kwargs, key):
+            """缓存未命中时获取并写入缓存"""
+            with _lock:
+                store.misses += 1
+                generation = store.generation
+            if shared and shared_cache.enabled():
+                start = time.monotonic()
+                found = shared_cache.get(store.name, key)
+                if found is not None:
+                    value, expires_at = found
+                    value = freeze(value)
+                    end = time.monotonic()
+                    put(key, value, end - start, end + expires_at - time.time(), False, generation)
+                    if on_load is not None:
+                        on_load(value, *args, **kwargs)
+                    return value
+            # 请求已超过截止时间时不再访问上游
+            check_deadline()
+
+            start = time.monotonic()
+            try:
+                value = freeze(func(*args, **kwargs))
+            except Exception as e:
+                end = time.monotonic()
+                if isinstance(e, DataError) and e.cacheable:
+                    timeout_seconds = store.negative_timeout if isinstance(e, NoDataError) else NEGATIVE_ERROR_TIMEOUT
+                    put(key, _detach_error(e), end - start, end + timeout_seconds, True, generation)
+                raise
+            end = time.monotonic()
+            if is_empty(value):
+                put(key, value, end - start, end + store.negative_timeout, True, generation)
+            else:
+                put(key, value, end - start, end + store.timeout, False, generation)
+                if shared and shared_cache.enabled() and store.generation == generation:
+                    shared_cache.put(store.name, key, value, time.time() + store.timeout, store.symbol_of(key))
+                if on_load is not None:
+                    on_load(value, *args, **kwargs)
+            return value
+
+        def cache_info() -> CacheInfo:
+            with _lock:
+                return CacheInfo(store.hits, store.misses, store.maxsize, len(store.entries),
+                                 store.bytes, store.max_bytes, store.evictions,
+                                 store.negative_hits, store.negative_entries())
+
+        def cache_clear():
+            with _lock:
+                store.generation += 1
+                store.clear()
+            if shared and shared_cache.enabled():
+                shared_cache.clear(store.name)
+
+        def cached(*args, **kwargs):
+            """只查询缓存，不调用函数：命中时返回缓存的结果，未命中时返回 MISSING"""
+            return lookup(make_key(args, kwargs)[2])
 
-        wrapped_func.cache_info = func.cache_info
-        wrapped_func.cache_clear = func.cache_clear
+        store.func = wrapped_func
+        wrapped_func.cached = cached
+        wrapped_func.cache_info = cache_info
+        wrapped_func.cache_clear = cache_clear
         return wrapped_func
 
-    return wrapper_cache
\ No newline at end of file
+    return wrapper_cache
@@ -0,0 +1,97 @@
+from datetime import date, datetime
+
+# symbol 后缀别名，统一为 Yahoo 使用的交易所后缀
+SYMBOL_SUFFIX_ALIASES = {
+    'SH': 'SS',
+}
+# 时间间隔别名，同一数据的不同写法统一为一种
+INTERVAL_ALIASES = {
+    '1h': '60m',
+    '1w': '1wk',
+}
+# 报表周期别名
+FREQ_ALIASES = {
+    'annual': 'yearly',
+    'year': 'yearly',
+    'quarter': 'quarterly',
+    'ttm': 'trailing',
+}
+
+
+def canonical_symbol(symbol: str) -> str:
+    """
+    统一 symbol 的写法：去除空格并转大写，交易所后缀别名替换，港股代码补齐为 4 位
+    aapl -> AAPL, 601398.sh -> 601398.SS, 700.hk / 00700.HK -> 0700.HK
+    """
+    if not isinstance(symbol, str):
+        return symbol
+    symbol = symbol.strip().upper()
+    code, dot, suffix = symbol.rpartition('.')
+    if not dot or not code:
+        return symbol
+    suffix = SYMBOL_SUFFIX_ALIASES.get(suffix, suffix)
+    if suffix == 'HK' and code.isdigit():
+        code = code.lstrip('0').zfill(4)
+    return f"{code}.{suffix}"
+
+
+def canonical_date(value) -> str:
+    """统一日期的写法为 2025-06-01，支持 2025-6-1、2025/06/01 以及 date 对象，无法解析时原样返回"""
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    for date_format in ('%Y-%m-%d', '%Y/%m/%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(text, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return value
+
+
+def canonical_interval(interval: str) -> str:
+    """统一时间间隔的写法：1H -> 60m, 1D -> 1d, 1W -> 1wk"""
+    if not isinstance(interval, str):
+        return interval
+    interval = interval.strip()
+    # 1M 可能表示月，转小写后会变成分钟，保持原样
+    if not interval.endswith('M'):
+        interval = interval.lower()
+    return INTERVAL_ALIASES.get(interval, interval)
+
+
+def canonical_freq(freq: str) -> str:
+    """统一报表周期的写法：Annual -> yearly, Quarter -> quarterly, TTM -> trailing"""
+    if not isinstance(freq, str):
+        return freq
+    freq = freq.strip().lower()
+    return FREQ_ALIASES.get(freq, freq)
+
+
+def canonical_currency(currency: str) -> str:
+    """统一币种的写法：usd -> USD"""
+    if not isinstance(currency, str):
+        return currency
+    return currency.strip().upper()
+
+
+def canonical_items(items) -> tuple:
+    """统一财务指标列表的写法：去除空格和重复项并排序，转为元组，可以作为缓存键"""
+    if isinstance(items, str):
+        items = items.split(',')
+    if not isinstance(items, (list, tuple, set, frozenset)):
+        return items
+    return tuple(sorted({item.strip() for item in items if isinstance(item, str) and item.strip()}))
+
+
+# 按参数名称统一参数值，cache 装饰器据此生成缓存键，并以统一后的参数调用函数
+CANONICAL_PARAMS = {
+    'symbol': canonical_symbol,
+    'start_date': canonical_date,
+    'end_date': canonical_date,
+    'interval': canonical_interval,
+    'freq': canonical_freq,
+    'currency': canonical_currency,
+    'items': canonical_items,
+}
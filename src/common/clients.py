@@ -0,0 +1,51 @@
+import os
+import json
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+# 单个 token 的兼容配置，作为名为 default 的客户端
+API_TOKEN = os.getenv("API_TOKEN", "secret-token")
+# 多个客户端的配置，JSON 数组，每项为 Client 的字段，例如
+# [{"name": "backfill", "token": "t1", "weight": 1, "max_concurrency": 2, "rate": 5, "lane": "bulk"}]
+# 只有 admin 为 true 的客户端可以调用管理接口，API_TOKEN 的 default 客户端为管理员
+API_CLIENTS = os.getenv("API_CLIENTS", "")
+# 客户端未配置时的默认值
+CLIENT_MAX_CONCURRENCY = int(os.getenv("CLIENT_MAX_CONCURRENCY", 4))
+CLIENT_RATE = float(os.getenv("CLIENT_RATE", 0))
+
+LANES = ('interactive', 'bulk')
+
+
+class Client(BaseModel):
+    """API 客户端"""
+    name: str = Field(..., description="Client name")
+    token: Optional[str] = Field(None, description="Bearer token of the client")
+    weight: float = Field(1.0, gt=0, description="Share of upstream capacity relative to other clients")
+    max_concurrency: int = Field(CLIENT_MAX_CONCURRENCY, ge=0, description="Upstream fetches running at the same time, 0 for no limit")
+    rate: float = Field(CLIENT_RATE, ge=0, description="Upstream fetches per second, 0 for no limit")
+    burst: Optional[int] = Field(None, ge=1, description="Fetches allowed in a burst above the rate, default rate rounded up")
+    lane: Literal['interactive', 'bulk'] = Field('interactive', description="Default lane of the client's requests")
+    admin: bool = Field(False, description="Whether the client may call the admin endpoints")
+
+
+def load_clients() -> dict:
+    """
+    加载客户端配置
+    :return: {token: Client}
+    """
+    clients = {API_TOKEN: Client(name='default', token=API_TOKEN, admin=True)}
+    if API_CLIENTS:
+        for item in json.loads(API_CLIENTS):
+            client = Client(**item)
+            clients[client.token] = client
+    return clients
+
+
+clients = load_clients()
+# 未携带 token 的请求（MCP、文档等跳过认证的路径）
+anonymous_client = Client(name='anonymous')
+
+
+def get_client(token: str) -> Optional[Client]:
+    """根据 token 获取客户端，token 无效时返回 None"""
+    return clients.get(token)
@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import contextvars
+from fastapi.requests import Request
+from src.common.errors import DeadlineExceededError
+
+# 请求的默认截止时间，单位为秒，0 表示不限制
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", 30))
+# 各个路由的默认截止时间，JSON 对象，例如 {"/api/v1/export/prices": 300}
+REQUEST_ROUTE_TIMEOUTS = json.loads(os.getenv("REQUEST_ROUTE_TIMEOUTS", "") or "{}")
+# 请求头，客户端指定的截止时间，单位为秒
+TIMEOUT_HEADER = "x-request-timeout"
+
+# 当前请求的截止时间（time.monotonic），随上下文传递到线程池中执行的数据获取函数
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+def request_timeout(request: Request, route: str) -> float:
+    """
+    获取请求的截止时间：请求头 X-Request-Timeout，其次为路由的默认值，最后为 REQUEST_TIMEOUT
+    :return: 秒数，None 表示不限制
+    """
+    timeout = request.headers.get(TIMEOUT_HEADER)
+    try:
+        timeout = float(timeout) if timeout else None
+    except ValueError:
+        timeout = None
+    if timeout is None:
+        timeout = REQUEST_ROUTE_TIMEOUTS.get(route, REQUEST_TIMEOUT)
+    return timeout if timeout and timeout > 0 else None
+
+
+def set_deadline(timeout: float):
+    """设置当前上下文的截止时间，返回用于恢复的 token"""
+    return _deadline.set(None if timeout is None else time.monotonic() + timeout)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining(default: float = None) -> float:
+    """
+    当前上下文距截止时间的秒数，不超过 default
+    :param default: 没有截止时间时的返回值，同时作为上限
+    :return: 秒数，可能小于等于 0；没有截止时间且没有 default 时返回 None
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    left = deadline - time.monotonic()
+    return left if default is None else min(left, default)
+
+
+def check_deadline():
+    """已超过截止时间时抛出 DeadlineExceededError"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
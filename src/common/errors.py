@@ -0,0 +1,49 @@
+class DataError(Exception):
+    """
+    数据服务异常基类
+    code 为响应中的错误码，cacheable 表示该异常是否可以写入负缓存，
+    status_code 为 HTTP 状态码，retry_after 不为 None 时通过 Retry-After 响应头返回
+    """
+    code = 1
+    cacheable = True
+    status_code = 200
+    retry_after = None
+
+
+class NoDataError(DataError):
+    """上游没有数据，例如代码拼写错误、后缀错误或已退市"""
+    code = 2
+
+
+class RateLimitError(DataError):
+    """客户端超过请求频率限制"""
+    code = 3
+    cacheable = False
+    status_code = 429
+
+    def __init__(self, msg: str, retry_after: float):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class OverloadedError(DataError):
+    """服务过载，请求未被接受"""
+    code = 3
+    cacheable = False
+    status_code = 503
+
+    def __init__(self, msg: str, retry_after: float):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(DataError):
+    """请求超过截止时间，尚未开始的上游获取不再执行"""
+    cacheable = False
+    status_code = 504
+
+
+class ClientDisconnectedError(DataError):
+    """客户端已断开连接，排队中的请求被丢弃"""
+    cacheable = False
+    status_code = 499
@@ -0,0 +1,46 @@
+import io
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 导出格式对应的 media type 和文件扩展名
+EXPORT_FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def concat_symbol_frames(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    将多个 symbol 的 DataFrame 合并为一个，第一列为 symbol
+    带时区的 date 统一转为 UTC，不同交易所的数据才能放在同一列
+    :param frames: {symbol: DataFrame}，index 为 date
+    :return: 合并后的 DataFrame，列为 symbol, date 及数据列
+    """
+    parts = []
+    for symbol, frame in frames.items():
+        if isinstance(frame.index, pd.DatetimeIndex) and frame.index.tz is not None:
+            frame = frame.tz_convert('UTC')
+        frame = frame.reset_index()
+        frame.insert(0, 'symbol', symbol)
+        parts.append(frame)
+    if not parts:
+        return pd.DataFrame(columns=['symbol', 'date'])
+    return pd.concat(parts, ignore_index=True)
+
+
+def export_frame(data: pd.DataFrame, file_format: str) -> bytes:
+    """
+    将 DataFrame 导出为 Arrow IPC stream 或 Parquet 文件，直接按列转换，不创建逐行的 Python 对象
+    :param data: 待导出的 DataFrame
+    :param file_format: 导出格式 arrow 或 parquet
+    :return: 导出的二进制内容
+    """
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = io.BytesIO()
+    if file_format == 'parquet':
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
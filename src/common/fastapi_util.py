@@ -1,14 +1,21 @@
 from typing import Any, Optional, TypeVar, Generic
-from fastapi.responses import JSONResponse
+from fastapi import Depends, Query
+from fastapi.responses import JSONResponse, Response
 from fastapi.requests import Request
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
 import math
+import logging
+from src.common.errors import DataError, NoDataError, DeadlineExceededError
+from src.common.startup import lazy_import
+
+export_util = lazy_import('src.common.export_util')
+logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
 class BaseResponse(BaseModel, Generic[T]):
-    code: int = Field(default=0, description="Status code, 0 for success, 1 for error")
+    code: int = Field(default=0, description="Status code, 0 for success, 1 for error, 2 for no data found, 3 for rate limited or overloaded")
     data: Optional[T] = Field(default=None, description="Data field, None for no data")
     msg: Optional[str] = Field(default="", description="Message field")
 
@@ -17,7 +24,7 @@ def handle_nan_values(data):
     """Recursively handle NaN values in data structures"""
     if isinstance(data, dict):
         return {key: handle_nan_values(value) for key, value in data.items()}
-    elif isinstance(data, list):
+    elif isinstance(data, (list, tuple)):
         return [handle_nan_values(item) for item in data]
     elif isinstance(data, float) and math.isnan(data):
         return None
@@ -28,14 +35,55 @@ def handle_nan_values(data):
         return data
 
 
-def success(data)->BaseResponse:
+def project_fields(data, fields: set):
+    """
+    只序列化 fields 中的字段，模型通过 model_dump(include=...) 序列化，不生成其余字段
+    :param data: 模型或模型列表
+    :param fields: 字段名称集合
+    :return: 字典或字典列表
+    """
+    if isinstance(data, (list, tuple)):
+        return [project_fields(item, fields) for item in data]
+    if hasattr(data, 'model_dump'):
+        return data.model_dump(include=fields)
+    if isinstance(data, dict):
+        return {key: value for key, value in data.items() if key in fields}
+    return data
+
+
+def fields_query(model: type[BaseModel]):
+    """
+    fields 查询参数，逗号分隔的字段名称，按 model 的字段校验
+    :param model: 返回数据的模型
+    :return: 依赖项，解析结果为字段名称集合，未指定时为 None
+    """
+    example = ','.join(list(model.model_fields)[:3])
+
+    def parse_fields(fields: Optional[str] = Query(default=None, description=f"Comma separated fields to return, default all fields, eg: {example}")) -> Optional[set]:
+        if not fields:
+            return None
+        selected = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = selected - model.model_fields.keys()
+        if unknown:
+            raise DataError(f"Unknown fields for {model.__name__}: {','.join(sorted(unknown))}")
+        return selected
+
+    return Depends(parse_fields)
+
+
+def success(data, fields: set = None)->BaseResponse:
     """
     :param data:
+    :param fields: 只返回的字段，None 返回全部字段
     :return:
     """
-    # Handle NaN values before returning the response
-    clean_data = handle_nan_values(data)
-    return BaseResponse(code=0, data=clean_data)
+    if fields is None:
+        # Handle NaN values before returning the response
+        clean_data = handle_nan_values(data)
+        return BaseResponse(code=0, data=clean_data)
+    # 投影后的数据不再经过 response_model 校验，否则未选择的字段会以 null 补全
+    clean_data = handle_nan_values(project_fields(data, fields))
+    return JSONResponse(content=jsonable_encoder(BaseResponse(code=0, data=clean_data)))
 
 def error(msg, code=1)->JSONResponse:
     """
@@ -48,12 +96,65 @@ def error(msg, code=1)->JSONResponse:
     return BaseResponse(code=code, msg=msg)
 
 
+def export_response(name: str, symbols: str, fetch, file_format: str) -> Response:
+    """
+    按 symbol 获取 DataFrame，合并后导出为 Arrow IPC stream 或 Parquet 文件
+    没有数据的 symbol 会被跳过，并通过响应头 X-Missing-Symbols 返回；
+    获取失败的 symbol 同样跳过，通过响应头 X-Failed-Symbols 返回，不影响其他 symbol 的导出；
+    请求超过截止时间时后续 symbol 都无法获取，直接抛出异常
+    :param name: 导出文件名称
+    :param symbols: 逗号分隔的 symbol 列表
+    :param fetch: 获取单个 symbol DataFrame 的函数
+    :param file_format: 导出格式 arrow 或 parquet
+    :return: Response 对象
+    """
+    frames = {}
+    missing = []
+    failed = []
+    for symbol in symbols.split(','):
+        symbol = symbol.strip()
+        if not symbol:
+            continue
+        try:
+            frame = fetch(symbol)
+        except DeadlineExceededError:
+            raise
+        except NoDataError:
+            frame = None
+        except DataError as e:
+            logger.warning("Failed to export %s %s: %s", name, symbol, e)
+            failed.append(symbol)
+            continue
+        except Exception:
+            logger.exception("Failed to export %s %s", name, symbol)
+            failed.append(symbol)
+            continue
+        if frame is None or frame.empty:
+            missing.append(symbol)
+        else:
+            frames[symbol] = frame
+
+    media_type, extension = export_util.EXPORT_FORMATS[file_format]
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{extension}"'}
+    if missing:
+        headers["X-Missing-Symbols"] = ",".join(missing)
+    if failed:
+        headers["X-Failed-Symbols"] = ",".join(failed)
+    content = export_util.export_frame(export_util.concat_symbol_frames(frames), file_format)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
 async def exception_handler(request: Request, e: Exception) -> JSONResponse:
     """
-    异常处理函数
+    异常处理函数，DataError 的错误码、HTTP 状态码和 Retry-After 取自异常的属性
     :param request: 请求对象
     :param e: 异常对象
     :return: JSONResponse 对象
     """
-    return error(msg=str(e))
+    response = error(msg=str(e), code=getattr(e, 'code', 1))
+    headers = None
+    retry_after = getattr(e, 'retry_after', None)
+    if retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+    return JSONResponse(content=jsonable_encoder(response), status_code=getattr(e, 'status_code', 200), headers=headers)
 
@@ -231,12 +231,8 @@ def calculate_income_stmt_missing(income_stmt:IncomeStmtItem):
         if ebit is not None and depreciation is not None:
             calculated_values['ebitda'] = ebit + depreciation
 
-    # 更新原始对象
+    # 只返回补全的字段，由调用方通过 model_copy(update=...) 生成新对象，不修改原始对象
     target_keys = ['gross_profit', 'operating_income', 'ebit', 'ebitda', 'cost_of_revenue']
-    for key, value in calculated_values.items():
-        if key in target_keys:
-            setattr(income_stmt, key, value)
-
     return {k: v for k, v in calculated_values.items() if k in target_keys}
 
 
@@ -284,12 +280,8 @@ def calculate_balance_sheet_missing(balance_sheet:BalanceSheetItem):
         if current_assets is not None and current_liabilities is not None:
             calculated_values['working_capital'] = current_assets - current_liabilities
 
-    # 更新原始对象
+    # 只返回补全的字段
     target_keys = ['net_debt', 'current_assets', 'current_liabilities', 'accounts_receivable', 'inventory', 'working_capital']
-    for key, value in calculated_values.items():
-        if key in target_keys:
-            setattr(balance_sheet, key, value)
-
     return {k: v for k, v in calculated_values.items() if k in target_keys}
 
 
@@ -302,14 +294,45 @@ def calculate_cash_flow_missing(cash_flow:CashFlowItem):
         if dividends_paid is not None:
             calculated_values['common_stock_dividend_paid'] = dividends_paid
 
-    # 更新原始对象
+    # 只返回补全的字段
     target_keys = ['common_stock_dividend_paid']
-    for key, value in calculated_values.items():
-        if key in target_keys:
-            setattr(cash_flow, key, value)
-
     return {k: v for k, v in calculated_values.items() if k in target_keys}
 
+# TTM 按季度累加的季度数
+TRAILING_QUARTERS = 4
+# 连续 4 个季度的首尾报表日期间隔范围，超出时说明中间缺少季度
+TRAILING_SPAN = (pd.Timedelta(days=250), pd.Timedelta(days=300))
+# 利润表中的存量或比率项目，TTM 取最近一个季度的值，其余项目为 4 个季度之和
+INCOME_STMT_STOCK_ITEMS = ('tax_rate_for_calcs', 'diluted_average_shares', 'basic_average_shares')
+# 现金流量表中的存量项目，期末现金取最近一个季度，期初现金取 4 个季度中最早一个季度的期初
+CASH_FLOW_STOCK_ITEMS = ('end_cash_position',)
+CASH_FLOW_OPENING_ITEMS = ('beginning_cash_position',)
+
+
+def calculate_trailing(data: pd.DataFrame, stock_items=(), opening_items=()) -> pd.DataFrame:
+    """
+    由季度报表计算 TTM 报表，每个有连续 4 个季度的报表日期得到一行
+    流量项目为滚动 4 个季度之和，存量项目取最近一个季度的值，全部向量化计算；
+    4 个季度中任一季度缺少的流量项目结果为空，不以部分季度的和代替
+    :param data: 季度报表，index 为 date，列为报表项目
+    :param stock_items: 取最近一个季度值的项目
+    :param opening_items: 取 4 个季度中最早一个季度值的项目
+    :return: TTM 报表，结构与 data 相同，按 date 倒序
+    """
+    data = data.sort_index()
+    flow_items = [column for column in data.columns if column not in stock_items and column not in opening_items]
+    result = data[flow_items].rolling(TRAILING_QUARTERS, min_periods=TRAILING_QUARTERS).sum()
+    for column in stock_items:
+        if column in data.columns:
+            result[column] = data[column]
+    for column in opening_items:
+        if column in data.columns:
+            result[column] = data[column].shift(TRAILING_QUARTERS - 1)
+    span = data.index.to_series().diff(TRAILING_QUARTERS - 1)
+    result = result[(span >= TRAILING_SPAN[0]) & (span <= TRAILING_SPAN[1])]
+    return result[list(data.columns)].sort_index(ascending=False)
+
+
 if __name__ == '__main__':
     # Test code would need to import the model classes and create instances
     # This is just a placeholder to show the structure
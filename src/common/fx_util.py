@@ -0,0 +1,108 @@
+import re
+import numpy as np
+import pandas as pd
+from src.common.errors import DataError
+
+# 以辅币计价的币种（伦敦、约翰内斯堡、特拉维夫交易所的价格），转为主币种及换算系数
+MINOR_CURRENCIES = {
+    'GBp': ('GBP', 0.01),
+    'GBX': ('GBP', 0.01),
+    'ZAc': ('ZAR', 0.01),
+    'ILA': ('ILS', 0.01),
+}
+# 没有直接汇率时经由该币种换算
+CROSS_CURRENCY = 'USD'
+# 价格数据中以货币计价的列，volume、stock_splits 不换算
+PRICE_CURRENCY_COLUMNS = ('open', 'high', 'low', 'close', 'dividends')
+# 财务报表中不以货币计价的项目，其余数值列都按汇率换算
+STATEMENT_NON_CURRENCY_COLUMNS = frozenset({
+    'tax_rate_for_calcs',
+    'diluted_average_shares',
+    'basic_average_shares',
+    'treasury_shares_number',
+    'ordinary_shares_number',
+    'share_issued',
+})
+
+
+def check_currency(currency: str) -> str:
+    """
+    校验目标币种
+    :param currency: ISO 4217 币种代码，如 USD
+    :return: 大写的币种代码
+    """
+    if not isinstance(currency, str) or not re.fullmatch(r'[A-Z]{3}', currency.strip().upper()):
+        raise DataError(f"Invalid currency: {currency}")
+    return currency.strip().upper()
+
+
+def split_currency(currency: str) -> tuple:
+    """
+    辅币转为主币种
+    :param currency: 上游返回的币种，如 GBp
+    :return: (主币种, 换算系数)，如 ('GBP', 0.01)
+    """
+    if currency in MINOR_CURRENCIES:
+        return MINOR_CURRENCIES[currency]
+    return currency.upper(), 1.0
+
+
+def to_rate_series(data: pd.DataFrame) -> pd.Series:
+    """
+    上游汇率日线转为汇率序列
+    :param data: 上游日线，index 为带时区的日期，列包含 Close
+    :return: index 为不带时区的日期（升序），值为收盘汇率
+    """
+    if data is None or data.empty or 'Close' not in data:
+        return pd.Series(dtype='float64')
+    index = data.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    rates = pd.Series(data['Close'].to_numpy(dtype='float64'), index=index.normalize(), name='rate')
+    rates = rates[np.isfinite(rates.to_numpy()) & (rates.to_numpy() > 0)]
+    return rates[~rates.index.duplicated(keep='last')].sort_index()
+
+
+def cross_rates(base: pd.Series, quote: pd.Series) -> pd.Series:
+    """
+    经由中间币种的汇率：A/C = A/B * B/C，按 base 的日期对齐 quote
+    """
+    if base.empty or quote.empty:
+        return pd.Series(dtype='float64')
+    return pd.Series(base.to_numpy() * asof_rates(quote, base.index), index=base.index, name='rate')
+
+
+def asof_rates(rates: pd.Series, dates) -> np.ndarray:
+    """
+    按日期取当日或之前最近一个交易日的汇率，早于汇率数据的日期使用最早的汇率
+    :param rates: index 为不带时区的日期（升序）的汇率序列
+    :param dates: 日期，带时区时按当地日期对齐
+    :return: 与 dates 等长的汇率数组
+    """
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    positions = np.searchsorted(rates.index.to_numpy(), dates.normalize().to_numpy(), side='right') - 1
+    return rates.to_numpy()[np.clip(positions, 0, None)]
+
+
+def convert_frame(data: pd.DataFrame, rates: pd.Series, columns) -> pd.DataFrame:
+    """
+    按日期换算 DataFrame 中以货币计价的列
+    :param data: index 为日期的 DataFrame，不修改
+    :param rates: 汇率序列
+    :param columns: 需要换算的列，不存在的列忽略
+    :return: 换算后的 DataFrame
+    """
+    columns = [column for column in columns if column in data.columns]
+    if data.empty or not columns:
+        return data
+    data = data.copy()
+    data[columns] = data[columns].to_numpy(dtype='float64') * asof_rates(rates, data.index)[:, None]
+    return data
+
+
+def statement_currency_columns(data: pd.DataFrame) -> list:
+    """财务报表中以货币计价的数值列"""
+    return [column for column in data.columns
+            if column not in STATEMENT_NON_CURRENCY_COLUMNS and pd.api.types.is_numeric_dtype(data[column])]
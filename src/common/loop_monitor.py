@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+
+# 为 false 时不监控事件循环
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+# 测量事件循环延迟的间隔，单位为秒
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.1))
+# 单个回调阻塞事件循环超过该时间时记录调用栈，单位为秒
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", 0.1))
+# 保存最近多少次阻塞
+LOOP_STALL_HISTORY = int(os.getenv("LOOP_STALL_HISTORY", 50))
+# 计算延迟分位数使用的最近测量次数
+LAG_WINDOW = 600
+# 记录的调用栈最大深度
+STACK_LIMIT = 30
+# 项目代码的模块前缀，用于将阻塞归因到具体函数
+PROJECT_MODULES = ('src.', 'main')
+
+logger = logging.getLogger(__name__)
+# 处理中的请求 {任务: scope}，事件循环阻塞时通过当前任务找到对应的请求
+_requests = {}
+
+
+class LoopMonitor:
+    """
+    事件循环延迟监控
+    事件循环中每 LOOP_MONITOR_INTERVAL 执行一次心跳，心跳实际执行时间与预期的差值即为延迟；
+    监视线程发现心跳停止超过 LOOP_BLOCK_THRESHOLD 时，抓取事件循环线程的调用栈，
+    并通过当前任务的上下文找到对应的请求，心跳恢复后按实际阻塞时间记录并输出日志
+    """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = LOOP_BLOCK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.loop = None
+        self.lags = deque(maxlen=LAG_WINDOW)
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.stalled_seconds = 0.0
+        self.stalls = deque(maxlen=LOOP_STALL_HISTORY)
+        self._beat = None
+        self._expected = None
+        self._loop_thread = None
+        # 监视线程抓取的、尚未结束的阻塞
+        self._pending = None
+
+    def start(self):
+        """在事件循环中启动监控，同一个事件循环只启动一次"""
+        loop = asyncio.get_running_loop()
+        if not LOOP_MONITOR_ENABLED or self.loop is loop:
+            return
+        self.loop = loop
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._expected = self._beat + self.interval
+        loop.call_later(self.interval, self._tick, loop)
+        threading.Thread(target=self._watch, args=(loop,), name="loop-monitor", daemon=True).start()
+
+    def _tick(self, loop):
+        if loop is not self.loop or loop.is_closed():
+            return
+        now = time.perf_counter()
+        lag = max(now - self._expected, 0.0)
+        self._beat = now
+        self._expected = now + self.interval
+        self.lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            self._record(lag)
+        loop.call_later(self.interval, self._tick, loop)
+
+    def _record(self, lag: float):
+        """心跳恢复后记录阻塞，监视线程没有抓到调用栈时（阻塞时间刚超过阈值）只记录时间"""
+        stall = self._pending
+        self._pending = None
+        if stall is None:
+            stall = {'started_at': time.time() - lag, 'route': None, 'path': None, 'function': None, 'stack': []}
+        stall['duration'] = lag
+        self.stall_count += 1
+        self.stalled_seconds += lag
+        self.stalls.append(stall)
+        logger.warning("Event loop blocked for %.0fms route=%s function=%s%s", lag * 1000, stall['route'],
+                       stall['function'], "".join(f"\n  {line}" for line in stall['stack']),
+                       extra={'loop_stall': {key: value for key, value in stall.items() if key != 'stack'}})
+
+    def _watch(self, loop):
+        """监视线程，心跳停止超过阈值时抓取一次调用栈"""
+        captured = None
+        while self.loop is loop and not loop.is_closed():
+            time.sleep(self.threshold / 2)
+            beat = self._beat
+            if time.perf_counter() - beat - self.interval < self.threshold or captured == beat:
+                continue
+            captured = beat
+            try:
+                self._pending = self._capture(loop, beat)
+            except Exception:
+                logger.exception("Failed to capture event loop stack")
+
+    def _capture(self, loop, beat: float) -> dict:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.extract_stack(frame, limit=STACK_LIMIT) if frame is not None else []
+        del frame
+        # 阻塞事件循环的请求：由 LoopMonitorMiddleware 记录的当前任务的 scope
+        scope = _requests.get(asyncio.current_task(loop))
+        function = None
+        for entry in reversed(stack):
+            module = _module_name(entry.filename)
+            if module is not None:
+                function = f"{module}.{entry.name}"
+                break
+        return {
+            'started_at': time.time() - (time.perf_counter() - beat - self.interval),
+            'route': getattr(scope.get('route'), 'path', None) if scope else None,
+            'path': scope.get('path') if scope else None,
+            'function': function,
+            'stack': [f"{entry.filename}:{entry.lineno} {entry.name}" for entry in stack],
+        }
+
+    def stats(self) -> dict:
+        """
+        获取事件循环延迟统计
+        :return: {lag, lag_p50, lag_p99, max_lag, stall_count, stalled_seconds, stalls}，时间单位为秒
+        """
+        lags = sorted(self.lags)
+
+        def percentile(p):
+            return lags[min(int(len(lags) * p), len(lags) - 1)] if lags else None
+
+        return {
+            'enabled': self.loop is not None,
+            'interval': self.interval,
+            'threshold': self.threshold,
+            'lag': self.lags[-1] if self.lags else None,
+            'lag_p50': percentile(0.5),
+            'lag_p99': percentile(0.99),
+            'max_lag': self.max_lag,
+            'stall_count': self.stall_count,
+            'stalled_seconds': self.stalled_seconds,
+            'stalls': list(reversed(self.stalls)),
+        }
+
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _module_name(filename: str):
+    """项目代码的文件名转为模块名，其他文件返回 None"""
+    path = os.path.abspath(filename)
+    if not path.startswith(_ROOT_DIR + os.sep) or not path.endswith('.py'):
+        return None
+    module = os.path.relpath(path, _ROOT_DIR)[:-3].replace(os.sep, '.')
+    return module if module.startswith(PROJECT_MODULES) else None
+
+
+loop_monitor = LoopMonitor()
+
+
+class LoopMonitorMiddleware:
+    """记录处理请求的任务对应的 scope，事件循环阻塞时用于找到对应的路由"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        task = asyncio.current_task()
+        _requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _requests.pop(task, None)
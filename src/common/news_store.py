@@ -0,0 +1,217 @@
+import os
+import copy
+import time
+import threading
+import pandas as pd
+from collections import OrderedDict
+from src.common.cache import MISSING, NEGATIVE_CACHE_TIMEOUT, NEGATIVE_ERROR_TIMEOUT
+from src.common.canonical import canonical_symbol
+from src.common.deadline import remaining
+from src.common.errors import DataError, NoDataError
+
+# 新闻刷新间隔，单位为秒，超过该时间后再次请求会访问上游并合并新文章
+NEWS_CACHE_TIMEOUT = int(os.getenv("NEWS_CACHE_TIMEOUT", 60 * 60))
+# 每个 symbol 最多保留的文章数
+NEWS_MAX_ITEMS = 200
+# 最多保留的 symbol 数，超过时淘汰最久未访问的 symbol
+NEWS_MAX_SYMBOLS = 2000
+
+_MIN_TIME = pd.Timestamp.min.tz_localize('UTC')
+
+
+def _pub_time(value):
+    """解析发布时间，无法解析时返回 None，不带时区的时间按 UTC 处理"""
+    if not value:
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp
+
+
+def _since_time(value):
+    """
+    解析请求参数 since
+    :raises DataError: since 无法解析
+    """
+    if value is None or value == '':
+        return None
+    since = _pub_time(value)
+    if since is None:
+        raise DataError(f"Invalid since: {value}")
+    return since
+
+
+class _SymbolNews:
+    """单个 symbol 的新闻，items 按发布时间从新到旧排列"""
+    __slots__ = ('items', 'complete', 'refreshed', 'error', 'error_expires')
+
+    def __init__(self):
+        self.items = ()
+        # 上游返回的文章少于请求数量时，表示已经拿到了全部文章
+        self.complete = False
+        self.refreshed = 0.0
+        # 负缓存：上游抛出的 DataError 及其过期时间，期间的请求直接重新抛出，不访问上游
+        self.error = None
+        self.error_expires = 0.0
+
+
+class NewsStore:
+    """
+    按 symbol 保存新闻，文章以 id 去重
+    每次访问上游得到的最新文章与已有文章合并：两者有重叠时说明中间没有遗漏，合并后整体仍是连续的最新文章；
+    没有重叠时中间可能缺失文章，丢弃旧文章。较小的 count 直接由已有的较大结果提供
+    同一个 symbol 同时需要访问上游的请求只有一个访问上游，其余等待其结果；
+    上游抛出的 DataError 写入短时间的负缓存，其他异常不缓存
+    """
+
+    def __init__(self, fetch, timeout: int = NEWS_CACHE_TIMEOUT, max_items: int = NEWS_MAX_ITEMS,
+                 max_symbols: int = NEWS_MAX_SYMBOLS):
+        """
+        :param fetch: 访问上游的函数 fetch(symbol, count)，返回按发布时间从新到旧排列的文章列表
+        """
+        self.fetch = fetch
+        self.timeout = timeout
+        self.max_items = max_items
+        self.max_symbols = max_symbols
+        self._lock = threading.Lock()
+        self._symbols = OrderedDict()
+        # 正在访问上游的 symbol {symbol: Event}
+        self._flights = {}
+
+    def _covers(self, news: _SymbolNews, count: int, since) -> bool:
+        """已有文章是否足以回答本次请求，每个 symbol 最多保留 max_items 篇，已满时也足以回答更大的 count"""
+        if news.complete or len(news.items) >= min(count, self.max_items):
+            return True
+        # 指定 since 时，已有文章最旧的一篇早于 since 即可
+        if since is not None and news.items:
+            oldest = _pub_time(news.items[-1].pub_date)
+            return oldest is not None and oldest <= since
+        return False
+
+    def _merge(self, news: _SymbolNews, fetched: list, count: int):
+        """合并上游结果，调用方需持有 _lock"""
+        fetched_ids = {item.id for item in fetched}
+        overlapped = not news.items or any(item.id in fetched_ids for item in news.items)
+        items = {item.id: item for item in news.items} if overlapped else {}
+        items.update((item.id, item) for item in fetched)
+        items = sorted(items.values(), key=lambda item: _pub_time(item.pub_date) or _MIN_TIME, reverse=True)
+        news.complete = len(fetched) < count
+        if len(items) > self.max_items:
+            items = items[:self.max_items]
+            news.complete = False
+        news.items = tuple(items)
+        news.refreshed = time.monotonic()
+
+    def _news(self, symbol: str) -> _SymbolNews:
+        """
+        symbol 的新闻，不存在时创建，调用方需持有 _lock
+        每次创建后淘汰最久未访问的 symbol，只有负缓存或正在获取的 symbol 也计入数量
+        """
+        news = self._symbols.get(symbol)
+        if news is None:
+            news = self._symbols[symbol] = _SymbolNews()
+            while len(self._symbols) > self.max_symbols:
+                self._symbols.popitem(last=False)
+        self._symbols.move_to_end(symbol)
+        return news
+
+    def _lookup(self, news: _SymbolNews, count: int, since):
+        """
+        已有文章未过期且足以回答本次请求时返回结果，否则返回 None；负缓存未过期时重新抛出异常
+        调用方需持有 _lock
+        """
+        if news.error is not None and time.monotonic() < news.error_expires:
+            raise copy.copy(news.error)
+        # 没有文章的 symbol 按负缓存时间刷新
+        timeout = self.timeout if news.items else NEGATIVE_CACHE_TIMEOUT
+        fresh = news.refreshed and time.monotonic() - news.refreshed < timeout
+        if fresh and self._covers(news, count, since):
+            return self._select(news.items, count, since)
+        return None
+
+    def cached(self, symbol: str, count: int = 10, since: str = None):
+        """
+        只查询已有文章，不访问上游，参数与 get 相同
+        :return: 文章列表，已有文章过期或不足以回答本次请求时返回 MISSING
+        """
+        symbol = canonical_symbol(symbol)
+        since = _since_time(since)
+        with self._lock:
+            news = self._symbols.get(symbol)
+            result = None if news is None else self._lookup(news, count, since)
+        return MISSING if result is None else result
+
+    def get(self, symbol: str, count: int = 10, since: str = None) -> list:
+        """
+        获取 symbol 最新的 count 篇文章
+        :param symbol: symbol 名称
+        :param count: 文章数量
+        :param since: 只返回发布时间晚于该时间的文章，用于轮询新文章  2025-07-31T12:00:00Z
+        :return: 文章列表，按发布时间从新到旧排列
+        :raises DataError: since 无法解析
+        """
+        symbol = canonical_symbol(symbol)
+        since = _since_time(since)
+        with self._lock:
+            result = self._lookup(self._news(symbol), count, since)
+            if result is not None:
+                return result
+            flight = self._flights.get(symbol)
+            leader = flight is None
+            if leader:
+                flight = self._flights[symbol] = threading.Event()
+
+        if not leader:
+            # 等待同一个 symbol 的获取完成，其结果不足以回答本次请求时自己获取
+            flight.wait(remaining())
+            with self._lock:
+                result = self._lookup(self._news(symbol), count, since)
+                if result is not None:
+                    return result
+
+        try:
+            fetched = self.fetch(symbol, count)
+        except DataError as e:
+            if e.cacheable:
+                with self._lock:
+                    news = self._news(symbol)
+                    news.error = copy.copy(e)
+                    timeout = NEGATIVE_CACHE_TIMEOUT if isinstance(e, NoDataError) else NEGATIVE_ERROR_TIMEOUT
+                    news.error_expires = time.monotonic() + timeout
+            raise
+        finally:
+            if leader:
+                with self._lock:
+                    self._flights.pop(symbol, None)
+                flight.set()
+
+        with self._lock:
+            news = self._news(symbol)
+            news.error = None
+            self._merge(news, fetched, count)
+            return self._select(news.items, count, since)
+
+    @staticmethod
+    def _select(items: tuple, count: int, since) -> list:
+        if since is not None:
+            items = [item for item in items if (_pub_time(item.pub_date) or since) > since]
+        return list(items[:count])
+
+    def invalidate(self, symbol: str) -> int:
+        """
+        下次请求时重新访问上游，已有文章保留用于合并
+        :return: 失效的 symbol 数
+        """
+        with self._lock:
+            news = self._symbols.get(canonical_symbol(symbol))
+            if news is None or not (news.refreshed or news.error is not None):
+                return 0
+            news.refreshed = 0.0
+            news.error = None
+            return 1
+
+    def clear(self):
+        with self._lock:
+            self._symbols.clear()
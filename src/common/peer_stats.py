@@ -0,0 +1,282 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from src.common.clients import Client
+from src.common.canonical import canonical_symbol
+from src.common.errors import DataError, NoDataError
+from src.common.scheduler import scheduler
+
+# 参与行业统计的 symbol，逗号分隔
+PEER_UNIVERSE = os.getenv("PEER_UNIVERSE", "")
+# 参与行业统计的 symbol 列表文件，每行一个或逗号分隔，# 开头的行为注释，与 PEER_UNIVERSE 合并
+PEER_UNIVERSE_PATH = os.getenv("PEER_UNIVERSE_PATH", "")
+# 后台刷新统计的间隔，单位为秒
+PEER_REFRESH_INTERVAL = float(os.getenv("PEER_REFRESH_INTERVAL", 60 * 60))
+# 参与统计的财务指标，逗号分隔，为 FinancialMetricItem 的字段
+PEER_METRICS = [name.strip() for name in os.getenv("PEER_METRICS", ",".join([
+    'price_to_earnings_ratio', 'price_to_book_ratio', 'price_to_sales_ratio', 'enterprise_value_to_ebitda_ratio',
+    'free_cash_flow_yield', 'gross_margin', 'operating_margin', 'net_margin', 'return_on_equity',
+    'return_on_assets', 'return_on_invested_capital', 'current_ratio', 'debt_to_equity', 'revenue_growth',
+    'earnings_growth',
+])).split(",") if name.strip()]
+# 分组层级，对应 TickerInfo 的字段
+LEVELS = ('sector', 'industry')
+
+logger = logging.getLogger(__name__)
+# 后台刷新在调度器中使用的客户端
+peer_client = Client(name='peers', lane='bulk')
+
+
+def load_universe(symbols: str = PEER_UNIVERSE, path: str = PEER_UNIVERSE_PATH) -> list:
+    """
+    读取参与统计的 symbol
+    :param symbols: 逗号分隔的 symbol
+    :param path: symbol 列表文件
+    :return: 去重后的 symbol 列表
+    """
+    parts = symbols.split(',')
+    if path:
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip().startswith('#'):
+                        parts.extend(line.split(','))
+        except OSError:
+            logger.exception("Failed to load peer universe %s", path)
+    return list(dict.fromkeys(canonical_symbol(part) for part in parts if part.strip()))
+
+
+def _finite(value):
+    return value if isinstance(value, (int, float)) and math.isfinite(value) else None
+
+
+def _quantile(values: list, q: float):
+    """已排序列表的分位数，相邻两个值之间线性插值"""
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def latest_metrics(metrics) -> dict:
+    """
+    最近一期的统计指标
+    :param metrics: FinancialMetricItem 列表
+    :return: {指标: 值}，只包含有效的数值
+    """
+    items = [item for item in metrics if item.date is not None]
+    if not items:
+        return {}
+    latest = max(items, key=lambda item: item.date)
+    values = {}
+    for name in PEER_METRICS:
+        value = _finite(getattr(latest, name, None))
+        if value is not None:
+            values[name] = float(value)
+    return values
+
+
+class PeerStats:
+    """
+    行业统计表，按 sector / industry 分组保存每个指标排序后的取值
+    symbol 的信息或财务指标刷新时只移除旧值、插入新值，不重新计算整个分组；
+    分组的中位数、分位数在变化后第一次读取时计算并保存，百分位排名为一次二分查找
+    可以在多个线程中使用
+    """
+
+    def __init__(self, universe: list = None, interval: float = PEER_REFRESH_INTERVAL):
+        self.universe = set(load_universe() if universe is None else universe)
+        self.interval = interval
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        # {symbol: {'sector', 'industry', 'values': {指标: 值}}}
+        self._members = {}
+        # {(层级, 名称): {指标: 排序后的取值}}
+        self._groups = {}
+        # {(层级, 名称): {指标: 统计}}，分组变化时删除
+        self._summaries = {}
+        self._task = None
+
+    def _group_keys(self, record: dict) -> list:
+        return [(level, record[level]) for level in LEVELS if record.get(level)]
+
+    def _apply(self, symbol: str, record: dict):
+        """替换 symbol 在各分组中的取值，调用时已持有锁"""
+        old = self._members.get(symbol)
+        if old is not None:
+            for key in self._group_keys(old):
+                group = self._groups.get(key, {})
+                for name, value in old['values'].items():
+                    values = group.get(name)
+                    if values:
+                        index = bisect_left(values, value)
+                        if index < len(values) and values[index] == value:
+                            del values[index]
+                self._summaries.pop(key, None)
+        self._members[symbol] = record
+        for key in self._group_keys(record):
+            group = self._groups.setdefault(key, {})
+            for name, value in record['values'].items():
+                insort(group.setdefault(name, []), value)
+            self._summaries.pop(key, None)
+
+    def update_info(self, symbol: str, info):
+        """
+        symbol 的信息刷新，更新其所在的分组，不在统计范围内的 symbol 忽略
+        :param info: TickerInfo
+        """
+        if symbol not in self.universe:
+            return
+        sector, industry = getattr(info, 'sector', None), getattr(info, 'industry', None)
+        with self._lock:
+            old = self._members.get(symbol)
+            if old is not None and old['sector'] == sector and old['industry'] == industry:
+                return
+            values = old['values'] if old is not None else {}
+            self._apply(symbol, {'sector': sector, 'industry': industry, 'values': values})
+
+    def update_metrics(self, symbol: str, metrics):
+        """
+        symbol 的财务指标刷新，使用最近一期的指标更新统计，不在统计范围内的 symbol 忽略
+        :param metrics: FinancialMetricItem 列表
+        """
+        if symbol not in self.universe:
+            return
+        values = latest_metrics(metrics)
+        with self._lock:
+            old = self._members.get(symbol)
+            if old is not None and old['values'] == values:
+                return
+            record = {'sector': None, 'industry': None} if old is None else dict(old)
+            record['values'] = values
+            self._apply(symbol, record)
+
+    def remove(self, symbol: str):
+        """symbol 没有数据时从统计中移除"""
+        with self._lock:
+            if symbol in self._members:
+                self._apply(symbol, {'sector': None, 'industry': None, 'values': {}})
+                del self._members[symbol]
+
+    def member(self, symbol: str):
+        """
+        统计范围内 symbol 的分组和指标
+        :return: {'sector', 'industry', 'values'}，还没有取得信息或财务指标时返回 None
+        """
+        with self._lock:
+            record = self._members.get(symbol)
+        if record is None or not record['values'] or not (record['sector'] or record['industry']):
+            return None
+        return record
+
+    def summary(self, level: str, name: str) -> dict:
+        """
+        分组的统计
+        :return: {指标: {count, min, p25, median, p75, max}}
+        """
+        key = (level, name)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = {
+                    metric: {
+                        'count': len(values),
+                        'min': values[0],
+                        'p25': _quantile(values, 0.25),
+                        'median': _quantile(values, 0.5),
+                        'p75': _quantile(values, 0.75),
+                        'max': values[-1],
+                    } for metric, values in self._groups.get(key, {}).items() if values
+                }
+            return summary
+
+    def rank(self, level: str, name: str, metric: str, value: float):
+        """
+        取值在分组中的百分位排名，相同的值取平均排名
+        :return: 0 ~ 100，分组中没有该指标时返回 None
+        """
+        with self._lock:
+            values = self._groups.get((level, name), {}).get(metric)
+            if not values:
+                return None
+            return (bisect_left(values, value) + bisect_right(values, value)) / 2 / len(values) * 100
+
+    def compare(self, symbol: str, record: dict, level: str = 'industry') -> dict:
+        """
+        symbol 与同一分组的比较
+        :param record: symbol 的分组和指标，{'sector', 'industry', 'values'}
+        :param level: 分组层级 sector 或 industry
+        :return: {symbol, level, group, sector, industry, peers, refreshed_at, metrics}
+        """
+        name = record.get(level)
+        if not name:
+            raise NoDataError(f"No {level} found for symbol: {symbol}")
+        summary = self.summary(level, name)
+        if not summary:
+            raise NoDataError(f"No peers found for {level}: {name}")
+        with self._lock:
+            peers = sum(1 for member in self._members.values() if member.get(level) == name)
+        metrics = []
+        for metric in PEER_METRICS:
+            stats = summary.get(metric)
+            if stats is None:
+                continue
+            value = record['values'].get(metric)
+            metrics.append({
+                'name': metric,
+                'value': value,
+                'percentile': None if value is None else self.rank(level, name, metric, value),
+                **stats,
+            })
+        return {
+            'symbol': symbol,
+            'level': level,
+            'group': name,
+            'sector': record.get('sector'),
+            'industry': record.get('industry'),
+            'peers': peers,
+            'refreshed_at': self.refreshed_at,
+            'metrics': metrics,
+        }
+
+    def start(self, fetch_info, fetch_metrics):
+        """
+        在事件循环中启动后台刷新，统计范围为空或已启动时不执行
+        :param fetch_info: 获取信息的阻塞函数 fetch_info(symbol)，返回 TickerInfo
+        :param fetch_metrics: 获取财务指标的阻塞函数 fetch_metrics(symbol)，返回 FinancialMetricItem 列表
+        """
+        if not self.universe or self._task is not None:
+            return
+        self._task = asyncio.ensure_future(self._refresh(fetch_info, fetch_metrics))
+
+    async def _refresh(self, fetch_info, fetch_metrics):
+        """
+        依次刷新统计范围内的 symbol，通过 bulk 通道执行，不与交互请求争抢执行位；
+        缓存未过期时直接使用缓存；接口请求或其他进程取得新结果时，由缓存的 on_load 同时更新统计
+        """
+        while True:
+            for symbol in sorted(self.universe):
+                try:
+                    info = await scheduler.run(peer_client, 'bulk', fetch_info, symbol)
+                    self.update_info(symbol, info)
+                    metrics = await scheduler.run(peer_client, 'bulk', fetch_metrics, symbol)
+                    self.update_metrics(symbol, metrics)
+                except asyncio.CancelledError:
+                    raise
+                except NoDataError:
+                    self.remove(symbol)
+                except DataError as e:
+                    logger.warning("Failed to refresh peer stats %s: %s", symbol, e)
+                except Exception:
+                    logger.exception("Failed to refresh peer stats %s", symbol)
+            self.refreshed_at = time.time()
+            await asyncio.sleep(self.interval)
+
+
+peer_stats = PeerStats()
@@ -0,0 +1,211 @@
+import os
+import re
+import struct
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.common.canonical import canonical_symbol, canonical_interval
+from src.common.errors import DataError
+from src.common.price_util import adjust_prices
+
+# 是否把上游获取的价格数据写入本地归档
+PRICE_ARCHIVE_ENABLED = os.getenv("PRICE_ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes")
+# 本地归档目录
+PRICE_ARCHIVE_DIR = os.getenv("PRICE_ARCHIVE_DIR", "data/price_archive")
+# 同时保持内存映射的归档文件数，超出时关闭最久未读取的文件
+PRICE_ARCHIVE_MAX_OPEN = int(os.getenv("PRICE_ARCHIVE_MAX_OPEN", 256))
+
+# 文件格式：固定长度文件头 + 按列连续存放的定长数组
+# 文件头：magic(8) + 行数 int64(8) + 交易所时区名称(64)
+# 数据：date 为 int64 UTC 纳秒时间戳，其余列为 float64，每列 行数 * 8 字节
+# 版本 2 保存未复权价格和上游的 adj_close，读取时在本地复权；版本 1 保存复权价格，没有 adj_close 列
+MAGIC = b'AOBARS2\0'
+LEGACY_MAGIC = b'AOBARS1\0'
+HEADER = struct.Struct('<8sq64s')
+COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'dividends', 'stock_splits', 'adj_close')
+LEGACY_COLUMNS = COLUMNS[:-1]
+# 读取结果中的列，与 get_ticker_price_frame 的返回值相同
+PRICE_COLUMNS = LEGACY_COLUMNS
+# 可以归档的时间间隔（统一写法后），同时限制归档路径中的目录名
+INTERVALS = frozenset({'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1d', '5d', '1wk', '1mo', '3mo'})
+# 归档文件名允许的 symbol 字符
+SYMBOL_PATTERN = re.compile(r'[A-Z0-9.^=-]+')
+
+logger = logging.getLogger(__name__)
+_write_locks = {}
+_write_locks_lock = threading.Lock()
+# {路径: ((修改时间, 大小), 映射结果)}，按最近读取排序
+_mmaps = OrderedDict()
+_mmaps_lock = threading.Lock()
+
+
+def _archive_path(symbol: str, interval: str) -> str:
+    """
+    归档文件路径，symbol 和 interval 来自请求参数，校验后才用于拼接路径
+    :raises DataError: symbol 或 interval 不合法
+    """
+    interval = canonical_interval(interval)
+    if interval not in INTERVALS:
+        raise DataError(f"Invalid interval: {interval}")
+    symbol = canonical_symbol(symbol)
+    if not isinstance(symbol, str) or not SYMBOL_PATTERN.fullmatch(symbol):
+        raise DataError(f"Invalid symbol: {symbol}")
+    directory = os.path.abspath(os.path.join(PRICE_ARCHIVE_DIR, interval))
+    path = os.path.abspath(os.path.join(directory, f"{symbol}.bars"))
+    # 解析 .. 之后仍须位于归档目录下
+    if os.path.dirname(path) != directory:
+        raise DataError(f"Invalid symbol: {symbol}")
+    return path
+
+
+def _write_lock(path: str) -> threading.Lock:
+    with _write_locks_lock:
+        return _write_locks.setdefault(path, threading.Lock())
+
+
+def _open(path: str):
+    """
+    以只读方式内存映射归档文件，同一个文件未修改时复用已有的映射
+    最多保持 PRICE_ARCHIVE_MAX_OPEN 个映射，超出时移除最久未读取的，已返回的数组切片仍然有效
+    :return: (时区名称, {列名: np.memmap}, 是否为复权价格的旧版本文件)，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _mmaps_lock:
+        cached = _mmaps.get(path)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            _mmaps.move_to_end(path)
+            return cached[1]
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    magic, rows, timezone = HEADER.unpack(buffer[:HEADER.size].tobytes())
+    if magic not in (MAGIC, LEGACY_MAGIC):
+        raise ValueError(f"Invalid price archive file: {path}")
+    legacy = magic == LEGACY_MAGIC
+    offset = HEADER.size
+    columns = {'date': buffer[offset:offset + rows * 8].view(np.int64)}
+    offset += rows * 8
+    for column in (LEGACY_COLUMNS if legacy else COLUMNS):
+        columns[column] = buffer[offset:offset + rows * 8].view(np.float64)
+        offset += rows * 8
+    result = (timezone.rstrip(b'\0').decode() or None, columns, legacy)
+    with _mmaps_lock:
+        _mmaps[path] = ((stat.st_mtime_ns, stat.st_size), result)
+        _mmaps.move_to_end(path)
+        while len(_mmaps) > PRICE_ARCHIVE_MAX_OPEN:
+            _mmaps.popitem(last=False)
+    return result
+
+
+def read_bars(symbol: str, interval: str, start_date: str = None, end_date: str = None) -> dict:
+    """
+    读取归档的 K 线数据，返回内存映射数组的切片，不拷贝数据
+    :param symbol: symbol 名称
+    :param interval: 时间间隔
+    :param start_date: 开始日期（包含）  2025-06-23，None 表示不限制
+    :param end_date: 结束日期（不包含）  2025-06-23，None 表示不限制
+    :return: {'timezone': 时区名称, 'adjusted': 价格是否已复权, 'date': int64 UTC 纳秒时间戳数组, 'open': float64 数组, ...}，
+             版本 2 的文件为未复权价格并包含 adj_close，版本 1 的文件为复权价格；没有归档时返回 None
+    """
+    opened = _open(_archive_path(symbol, interval))
+    if opened is None:
+        return None
+    timezone, columns, legacy = opened
+    dates = columns['date']
+    start = 0
+    end = len(dates)
+    # 日期按交易所时区解释，与上游 history 的 start/end 一致
+    if start_date is not None:
+        start = int(np.searchsorted(dates, pd.Timestamp(start_date, tz=timezone).value, side='left'))
+    if end_date is not None:
+        end = int(np.searchsorted(dates, pd.Timestamp(end_date, tz=timezone).value, side='left'))
+    bars = {name: values[start:end] for name, values in columns.items()}
+    bars['timezone'] = timezone
+    bars['adjusted'] = legacy
+    return bars
+
+
+def read_frame(symbol: str, interval: str, start_date: str = None, end_date: str = None, adjust: bool = True) -> pd.DataFrame:
+    """
+    读取归档的 K 线数据为 DataFrame，结构与 get_ticker_price_frame 的返回值相同
+    复权时读取 start_date 之后的全部 K 线，以最后一根归档 K 线的 adj_close 为基准复权后再截取到 end_date，
+    与 get_ticker_price_frame 的复权方式一致
+    :param symbol: symbol 名称
+    :param interval: 时间间隔
+    :param start_date: 开始日期（包含）  2025-06-23，None 表示不限制
+    :param end_date: 结束日期（不包含）  2025-06-23，None 表示不限制
+    :param adjust: True 返回分红复权价格，False 返回未复权价格
+    :return: index 为 date（交易所时区），列为 open, high, low, close, volume, dividends, stock_splits，没有归档时返回空 DataFrame
+    :raises DataError: 旧版本的归档只有复权价格，adjust 为 False 时抛出
+    """
+    bars = read_bars(symbol, interval, start_date, None if adjust else end_date)
+    if bars is None:
+        return pd.DataFrame(columns=list(PRICE_COLUMNS), index=pd.DatetimeIndex([], name='date', tz='UTC'))
+    if bars['adjusted'] and not adjust:
+        raise DataError(f"Archive of {symbol} {interval} holds adjusted prices only")
+    index = pd.DatetimeIndex(pd.to_datetime(bars['date'], utc=True), name='date')
+    if bars['timezone']:
+        index = index.tz_convert(bars['timezone'])
+    columns = PRICE_COLUMNS if bars['adjusted'] else COLUMNS
+    data = pd.DataFrame({column: bars[column] for column in columns}, index=index)
+    if not adjust:
+        return data.drop(columns='adj_close')
+    if not bars['adjusted']:
+        data = adjust_prices(data)
+    if end_date is not None:
+        data = data[data.index < pd.Timestamp(end_date, tz=bars['timezone'])]
+    return data
+
+
+def archive_bars(symbol: str, interval: str, data: pd.DataFrame):
+    """
+    将未复权的价格数据合并写入本地归档，相同时间的 K 线以新数据为准
+    旧版本的归档为复权价格，不与未复权价格合并，直接以新数据替换
+    先写临时文件再原子替换，读取方始终看到完整的文件
+    :param symbol: symbol 名称
+    :param interval: 时间间隔
+    :param data: 未复权的价格数据，index 为带时区的 date，列为 open, high, low, close, volume, dividends, stock_splits, adj_close
+    """
+    if data.empty:
+        return
+    path = _archive_path(symbol, interval)
+    index = data.index if data.index.tz is not None else data.index.tz_localize('UTC')
+    timezone = str(index.tz)
+    # 缺少 adj_close 时记为 NaN，读取时不按上游复权比例校准
+    frame = pd.DataFrame({column: data[column].to_numpy(dtype=np.float64) if column in data.columns
+                          else np.nan if column == 'adj_close' else 0.0
+                          for column in COLUMNS}, index=index.tz_convert('UTC').as_unit('ns').asi8)
+
+    with _write_lock(path):
+        existing = read_bars(symbol, interval)
+        if existing is not None and existing['adjusted']:
+            logger.info("Replacing adjusted price archive of %s %s with unadjusted bars", symbol, interval)
+        elif existing is not None and len(existing['date']):
+            old = pd.DataFrame({column: np.array(existing[column]) for column in COLUMNS},
+                               index=np.array(existing['date']))
+            frame = pd.concat([old, frame])
+            frame = frame[~frame.index.duplicated(keep='last')]
+        frame = frame.sort_index()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(frame), timezone.encode()[:64]))
+            f.write(frame.index.to_numpy(dtype=np.int64).tobytes())
+            for column in COLUMNS:
+                f.write(frame[column].to_numpy(dtype=np.float64).tobytes())
+        os.replace(tmp_path, path)
+
+
+def try_archive_bars(symbol: str, interval: str, data: pd.DataFrame):
+    """PRICE_ARCHIVE_ENABLED 时写入本地归档，写入失败只记录日志，不影响请求"""
+    if not PRICE_ARCHIVE_ENABLED:
+        return
+    try:
+        archive_bars(symbol, interval, data)
+    except Exception:
+        logger.exception("Failed to archive prices of %s %s", symbol, interval)
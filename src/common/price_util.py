@@ -0,0 +1,295 @@
+import math
+import pandas as pd
+from datetime import datetime, timedelta
+
+# 日内周期，可由 1m 数据聚合
+INTRADAY_RESAMPLE_RULES = {
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '60m': pd.Timedelta(minutes=60),
+    '90m': pd.Timedelta(minutes=90),
+    '1h': pd.Timedelta(hours=1),
+}
+# 日以上周期，可由 1d 数据聚合，与 Yahoo 一致：周线从周一开始，月线、季线从月初开始
+CALENDAR_RESAMPLE_RULES = {
+    '1wk': 'W-MON',
+    '1mo': 'MS',
+    '3mo': 'QS',
+}
+# Yahoo 只提供最近 30 天的 1m 数据，且单次请求不超过 8 天
+MINUTE_DATA_MAX_AGE = timedelta(days=29)
+MINUTE_DATA_MAX_SPAN = timedelta(days=8)
+# 相邻两根 1m K 线间隔超过该值时视为新的交易时段（午休、盘前盘后切换、跨日）
+SESSION_GAP = pd.Timedelta(minutes=30)
+
+OHLCV_AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'dividends': 'sum',
+    'adj_close': 'last',
+}
+
+
+def get_base_interval(interval: str, start_date: str, end_date: str):
+    """
+    获取可以聚合得到 interval 的基础周期
+    :param interval: 目标周期
+    :param start_date: 开始日期  2025-06-23
+    :param end_date: 结束日期  2025-06-23
+    :return: 基础周期 1m 或 1d，无法由基础周期聚合时返回 None
+    """
+    if interval in CALENDAR_RESAMPLE_RULES:
+        return '1d'
+    if interval in INTRADAY_RESAMPLE_RULES:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        if datetime.now() - start <= MINUTE_DATA_MAX_AGE and end - start <= MINUTE_DATA_MAX_SPAN:
+            return '1m'
+    return None
+
+
+def trading_session(metadata) -> tuple:
+    """
+    交易所各交易时段在一天中的起始时刻，用于日内 K 线的聚合起点
+    :param metadata: 上游价格数据的元数据（yfinance 的 history_metadata），使用其中的 currentTradingPeriod
+    :return: 盘前开始、常规交易开始、常规交易结束（盘后开始）距当天零点的时长，升序，缺失的时刻不包含
+    """
+    periods = metadata.get('currentTradingPeriod') if metadata else None
+    if not isinstance(periods, dict):
+        return ()
+    moments = [
+        (periods.get('pre') or {}).get('start'),
+        (periods.get('regular') or {}).get('start'),
+        (periods.get('regular') or {}).get('end'),
+    ]
+    return tuple(sorted({moment - moment.normalize() for moment in moments if isinstance(moment, pd.Timestamp)}))
+
+
+def _intraday_buckets(index: pd.DatetimeIndex, rule: pd.Timedelta, session: tuple = ()) -> pd.DatetimeIndex:
+    """
+    计算日内 K 线所属的聚合区间起点，时间在交易所时区下计算
+    有交易时段时，盘前、常规交易、盘后分别以各自的开始时刻为起点按 rule 切分，区间不跨越时段，与上游一致
+    （如 60m K 线为 04:00 ... 09:00, 09:30, 10:30 ... 15:30, 16:00 ...）；
+    连续的 K 线中断超过 SESSION_GAP（如午休）后，以中断后的第一根 K 线为起点；
+    没有交易时段时，每段连续的 K 线都以第一根 K 线为起点
+    :param session: trading_session 返回的各时段开始时刻
+    """
+    times = index.to_series()
+    day = times.dt.normalize()
+    new_session = (times.diff() > SESSION_GAP) | (day != day.shift())
+    session_start = times.groupby(new_session.cumsum()).transform('first')
+    start = session_start
+    if session:
+        offsets = pd.TimedeltaIndex(session)
+        position = offsets.searchsorted(times - day, side='right') - 1
+        anchor = day + pd.Series(offsets[position.clip(0)], index=times.index)
+        # 中断后才开始的 K 线（如午休后）不使用当天的时段起点
+        start = anchor.where((position >= 0) & (session_start - anchor <= SESSION_GAP), session_start)
+    offset = (times - start) // rule * rule
+    return pd.DatetimeIndex(start + offset)
+
+
+def resample_prices(data: pd.DataFrame, interval: str, session: tuple = ()) -> pd.DataFrame:
+    """
+    将基础周期的 OHLCV 数据聚合为更大的周期
+    :param data: 基础周期数据，index 为交易所时区的 date，列为 open, high, low, close, volume, dividends, stock_splits
+    :param interval: 目标周期，INTRADAY_RESAMPLE_RULES 或 CALENDAR_RESAMPLE_RULES 中的周期
+    :param session: 日内聚合使用的交易时段，trading_session 的返回值
+    :return: 聚合后的数据，结构与 data 相同
+    """
+    columns = [column for column in OHLCV_AGGREGATIONS if column in data.columns]
+    aggregations = {column: OHLCV_AGGREGATIONS[column] for column in columns}
+    frame = data[columns].copy()
+    # 同一区间内多次拆股按乘积合并，没有拆股的 0 按 1 参与计算
+    if 'stock_splits' in data.columns:
+        frame['stock_splits'] = data['stock_splits'].replace(0, 1)
+        aggregations['stock_splits'] = 'prod'
+
+    if interval in CALENDAR_RESAMPLE_RULES:
+        grouped = frame.resample(CALENDAR_RESAMPLE_RULES[interval], label='left', closed='left')
+    else:
+        grouped = frame.groupby(_intraday_buckets(frame.index, INTRADAY_RESAMPLE_RULES[interval], session))
+    result = grouped.agg(aggregations).dropna(subset=['open'])
+
+    if 'stock_splits' in result.columns:
+        result['stock_splits'] = result['stock_splits'].replace(1, 0)
+    result.index.name = data.index.name
+    return result
+
+
+def dividend_factors(data: pd.DataFrame) -> pd.Series:
+    """
+    每根 K 线的分红复权系数
+    除息日的系数为 1 - 分红 / 前收盘价，除息日之前的 K 线累乘之后所有除息日的系数，全部向量化计算
+    :param data: 未复权的价格数据，列包含 close, dividends
+    :return: 与 data 同 index 的复权系数，最后一根 K 线为 1
+    """
+    if 'dividends' not in data.columns or data.empty:
+        return pd.Series(1.0, index=data.index)
+    prev_close = data['close'].shift(1)
+    dividends = data['dividends'].fillna(0)
+    valid = (dividends > 0) & (prev_close > dividends)
+    ratios = (1 - dividends / prev_close).where(valid, 1.0)
+    # 除息日的系数作用于它之前的 K 线
+    return ratios[::-1].cumprod()[::-1].shift(-1, fill_value=1.0)
+
+
+def adjust_prices(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    由未复权价格计算复权价格，与上游 auto_adjust 一致：开高低收乘以复权系数，成交量、分红、拆股不变
+    上游的未复权价格已按拆股调整，只需按分红复权；有 adj_close 列时以最后一根 K 线上游的复权比例为基准，
+    区间结束之后的分红同样计入，结果与上游复权价格一致
+    :param data: 未复权的价格数据，列为 open, high, low, close, volume, dividends, stock_splits, adj_close
+    :return: 复权后的价格数据，不含 adj_close 列
+    """
+    factors = dividend_factors(data)
+    if 'adj_close' in data.columns and not data.empty:
+        last_close, last_adj_close = data['close'].iloc[-1], data['adj_close'].iloc[-1]
+        if last_close > 0 and last_adj_close > 0:
+            factors = factors * (last_adj_close / last_close)
+    result = data.drop(columns='adj_close', errors='ignore')
+    columns = [column for column in ('open', 'high', 'low', 'close') if column in result.columns]
+    result[columns] = result[columns].mul(factors, axis=0)
+    return result
+
+
+def corporate_actions(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    从未复权的日线中提取分红和拆股
+    :param data: 未复权的价格数据，列包含 close, dividends, stock_splits
+    :return: index 为 date，列为 action（dividend / split）、value（每股分红 / 拆股比例）、
+             prev_close（前收盘价）、factor（该事件对之前价格的复权系数）
+    """
+    prev_close = data['close'].shift(1)
+    frames = []
+    if 'dividends' in data.columns:
+        dividends = data['dividends'].fillna(0)
+        mask = dividends > 0
+        ratios = 1 - dividends[mask] / prev_close[mask]
+        frames.append(pd.DataFrame({'action': 'dividend', 'value': dividends[mask], 'prev_close': prev_close[mask],
+                                    'factor': ratios.where(ratios > 0)}))
+    if 'stock_splits' in data.columns:
+        splits = data['stock_splits'].fillna(0)
+        mask = splits > 0
+        frames.append(pd.DataFrame({'action': 'split', 'value': splits[mask], 'prev_close': prev_close[mask],
+                                    'factor': 1 / splits[mask]}))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=['action', 'value', 'prev_close', 'factor'],
+                            index=pd.DatetimeIndex([], name=data.index.name))
+    result = pd.concat(frames).sort_index(kind='stable')
+    result.index.name = data.index.name
+    return result
+
+
+# 每年的 K 线数量，用于年化波动率，日内周期不做年化
+PERIODS_PER_YEAR = {
+    '1d': 252,
+    '5d': 52,
+    '1wk': 52,
+    '1mo': 12,
+    '3mo': 4,
+}
+# 指标在开始日期之前需要的历史数据：52 周最高/最低需要 365 天，其余指标另外需要 window 根 K 线
+INDICATOR_LOOKBACK = timedelta(days=365)
+# 日以上周期每根 K 线覆盖的日历天数，留有节假日的余量
+CALENDAR_DAYS_PER_BAR = {
+    '1d': 1.5,
+    '5d': 7.5,
+    '1wk': 7,
+    '1mo': 31,
+    '3mo': 92,
+}
+# 每个交易日的常规交易时长，用于估算日内周期 window 根 K 线覆盖的交易日数
+TRADING_DAY = pd.Timedelta(hours=6, minutes=30)
+# Yahoo 日内数据可以获取的最长时间：1m 为 30 天，60m/1h 为 730 天，其余为 60 天
+INTRADAY_MAX_AGE = {
+    '1m': MINUTE_DATA_MAX_AGE,
+    '60m': timedelta(days=729),
+    '1h': timedelta(days=729),
+}
+INTRADAY_DEFAULT_MAX_AGE = timedelta(days=59)
+
+
+def indicator_start_date(start_date: str, interval: str, window: int = 14) -> str:
+    """
+    计算指标需要的价格数据的开始日期，开始日期之前的数据只用于预热，使第一根 K 线的指标完整
+    日以上周期向前取 365 天加 window 根 K 线；日内周期上游不提供一年的数据，只向前取 window 根 K 线，
+    且不早于上游可以获取的最长时间
+    :param start_date: 开始日期  2025-06-23
+    :param interval: 价格数据的周期
+    :param window: 指标窗口大小
+    :return: 预热数据的开始日期  2024-06-07
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    if interval in CALENDAR_DAYS_PER_BAR:
+        lookback = INDICATOR_LOOKBACK + timedelta(days=math.ceil(window * CALENDAR_DAYS_PER_BAR[interval]))
+        return (start - lookback).strftime('%Y-%m-%d')
+    if interval == '1m' or interval in INTRADAY_RESAMPLE_RULES:
+        bar = INTRADAY_RESAMPLE_RULES.get(interval, pd.Timedelta(minutes=1))
+        # 交易日折算为日历天数，另加周末和节假日的余量
+        lookback = timedelta(days=math.ceil(math.ceil(window * bar / TRADING_DAY) * 7 / 5) + 3)
+        earliest = datetime.now() - INTRADAY_MAX_AGE.get(interval, INTRADAY_DEFAULT_MAX_AGE)
+        return max(start - lookback, min(start, earliest)).strftime('%Y-%m-%d')
+    return start_date
+
+
+def trim_before(data: pd.DataFrame, start_date: str) -> pd.DataFrame:
+    """
+    去掉开始日期之前的行
+    :param data: index 为 date 的数据，带时区时按该时区的日期比较
+    :param start_date: 开始日期  2025-06-23
+    """
+    start = pd.Timestamp(start_date)
+    if getattr(data.index, 'tz', None) is not None:
+        start = start.tz_localize(data.index.tz)
+    return data[data.index >= start]
+
+
+def calculate_indicators(data: pd.DataFrame, interval: str, window: int = 14) -> pd.DataFrame:
+    """
+    基于 OHLCV 数据计算技术指标，全部使用 pandas 滚动窗口向量化计算
+    RSI 和 ATR 使用 Wilder 平滑；52 周最高/最低按时间窗口 365 天计算，与周期无关
+    :param data: 价格数据，index 为 date，列为 open, high, low, close, volume
+    :param interval: 价格数据的周期，用于年化波动率
+    :param window: 指标窗口大小
+    :return: index 为 date，列为 close, returns, sma, ema, rsi, atr, volatility, high_52w, low_52w
+    """
+    close = data['close']
+    high = data['high']
+    low = data['low']
+    returns = close.pct_change()
+
+    # RSI
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    # ATR
+    pre_close = close.shift()
+    true_range = pd.concat([high - low, (high - pre_close).abs(), (low - pre_close).abs()], axis=1).max(axis=1)
+    atr = true_range.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+    volatility = returns.rolling(window).std()
+    if interval in PERIODS_PER_YEAR:
+        volatility = volatility * PERIODS_PER_YEAR[interval] ** 0.5
+
+    indicators = pd.DataFrame({
+        'close': close,
+        'returns': returns,
+        'sma': close.rolling(window).mean(),
+        'ema': close.ewm(span=window, adjust=False, min_periods=window).mean(),
+        'rsi': rsi,
+        'atr': atr,
+        'volatility': volatility,
+        'high_52w': high.rolling('365D').max(),
+        'low_52w': low.rolling('365D').min(),
+    }, index=data.index)
+    indicators.index.name = data.index.name
+    return indicators
@@ -0,0 +1,286 @@
+import os
+import sys
+import time
+import heapq
+import uuid
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import Counter, deque
+
+# 单个请求按需采样的间隔，单位为秒
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+# 保存最近多少个按需采样的结果
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", 20))
+# 同时进行的按需采样上限，超出时请求照常处理但不采样
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", 4))
+# 为 true 时以较低频率持续采样所有请求，记录最慢的请求
+PROFILE_CONTINUOUS = os.getenv("PROFILE_CONTINUOUS", "false").lower() == "true"
+PROFILE_CONTINUOUS_INTERVAL = float(os.getenv("PROFILE_CONTINUOUS_INTERVAL", 0.05))
+# 持续采样时，处理时间超过该值的请求才记录，单位为秒
+PROFILE_SLOW_THRESHOLD = float(os.getenv("PROFILE_SLOW_THRESHOLD", 1.0))
+# 持续采样时保存最慢的多少个请求
+PROFILE_SLOW_KEEP = int(os.getenv("PROFILE_SLOW_KEEP", 20))
+# 请求头或查询参数，值为 true 时采样该请求
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "profile"
+# 响应头，返回采样结果的 id
+PROFILE_ID_HEADER = b"x-profile-id"
+# 长连接路径不参与持续采样
+CONTINUOUS_EXCLUDED_PATHS = ("/mcp", "/sse")
+
+logger = logging.getLogger(__name__)
+_current = contextvars.ContextVar('profile', default=None)
+
+
+class Profile:
+    """
+    单个请求的采样结果
+    采样事件循环线程（只在该请求的任务运行时）和通过 bind 执行该请求数据获取的线程池线程，
+    调用栈按 flame graph 的 folded 格式聚合：frame;frame;frame 次数
+    """
+
+    def __init__(self, trigger: str, interval: float, path: str, loop, task):
+        self.id = uuid.uuid4().hex[:16]
+        self.trigger = trigger
+        self.interval = interval
+        self.path = path
+        self.route = None
+        self.client = None
+        self.loop = loop
+        self.task = task
+        self.loop_thread = threading.get_ident()
+        self.threads = set()
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.next_at = self.start
+        self.started = False
+
+    def sample(self, frames: dict):
+        """记录一次采样，frames 为 sys._current_frames() 的结果"""
+        self.samples += 1
+        threads = list(self.threads)
+        if asyncio.current_task(self.loop) is self.task:
+            threads.append(self.loop_thread)
+        for ident in threads:
+            frame = frames.get(ident)
+            if frame is not None:
+                self.stacks[_fold(frame)] += 1
+
+    def collapsed(self) -> str:
+        """folded 格式的采样结果，可以直接用于 flamegraph.pl、speedscope 等工具"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            'id': self.id,
+            'trigger': self.trigger,
+            'route': self.route,
+            'path': self.path,
+            'client': self.client,
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'interval': self.interval,
+            'samples': self.samples,
+        }
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+class Profiler:
+    """
+    采样线程，同时采样所有进行中的请求，每个请求按自己的间隔采样
+    没有进行中的请求时休眠
+    """
+
+    def __init__(self):
+        self._active = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._history = deque(maxlen=PROFILE_HISTORY)
+        # 最慢请求的小顶堆 [(duration, id, Profile)]
+        self._slowest = []
+
+    def begin(self, profile: Profile, limit: int = None) -> bool:
+        """
+        开始采样
+        :param limit: 同一触发方式同时采样的请求上限，None 表示不限制
+        :return: 是否开始采样，达到上限时返回 False
+        """
+        with self._lock:
+            if limit is not None and sum(1 for active in self._active if active.trigger == profile.trigger) >= limit:
+                return False
+            self._active.add(profile)
+            profile.started = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return True
+
+    def end(self, profile: Profile, keep: bool):
+        """
+        结束采样
+        :param keep: 是否保存采样结果，持续采样的请求只在足够慢时保存
+        """
+        profile.duration = time.perf_counter() - profile.start
+        with self._lock:
+            self._active.discard(profile)
+            if not keep or not profile.started:
+                return
+            if profile.trigger == 'request':
+                self._history.append(profile)
+            elif profile.duration >= PROFILE_SLOW_THRESHOLD:
+                entry = (profile.duration, profile.id, profile)
+                if len(self._slowest) < PROFILE_SLOW_KEEP:
+                    heapq.heappush(self._slowest, entry)
+                elif entry > self._slowest[0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            now = time.perf_counter()
+            due = [profile for profile in active if profile.next_at <= now]
+            if due:
+                frames = sys._current_frames()
+                for profile in due:
+                    try:
+                        profile.sample(frames)
+                    except Exception:
+                        logger.exception("Failed to sample profile %s", profile.id)
+                    profile.next_at = now + profile.interval
+                del frames
+            delay = min(profile.next_at for profile in active) - time.perf_counter()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+
+    def profiles(self) -> list:
+        """保存的采样结果，按需采样的在前，最慢请求按处理时间降序"""
+        with self._lock:
+            slowest = [entry[2] for entry in sorted(self._slowest, reverse=True)]
+            return list(reversed(self._history)) + slowest
+
+    def get(self, profile_id: str):
+        for profile in self.profiles():
+            if profile.id == profile_id:
+                return profile
+        return None
+
+
+profiler = Profiler()
+
+
+def bind(func):
+    """
+    当前请求正在采样时，返回在执行期间将所在线程加入采样的函数，用于在线程池中执行的数据获取函数
+    """
+    profile = _current.get()
+    if profile is None or not profile.started:
+        return func
+
+    def wrapper(*args, **kwargs):
+        ident = threading.get_ident()
+        profile.threads.add(ident)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.threads.discard(ident)
+    return wrapper
+
+
+def _requested(scope) -> bool:
+    """请求头 X-Profile 或查询参数 profile 为 true"""
+    for name, value in scope.get('headers', ()):
+        if name == PROFILE_HEADER:
+            return value.lower() in (b'true', b'1')
+    query = scope.get('query_string', b'').decode('latin-1')
+    for part in query.split('&'):
+        name, _, value = part.partition('=')
+        if name == PROFILE_QUERY:
+            return value.lower() in ('true', '1')
+    return False
+
+
+def start_requested(state) -> bool:
+    """
+    开始按需采样，在 verify_token 识别出客户端之后调用，未认证的请求不采样
+    同时进行的按需采样达到 PROFILE_MAX_CONCURRENT 时不采样
+    :param state: 请求的 request.state
+    :return: 是否开始采样
+    """
+    profile = getattr(state, 'profile', None)
+    if profile is None or profile.started or getattr(state, 'client', None) is None:
+        return False
+    return profiler.begin(profile, PROFILE_MAX_CONCURRENT)
+
+
+class ProfileMiddleware:
+    """
+    采样请求的 ASGI 中间件
+    携带 X-Profile: true 请求头或 profile=true 查询参数的请求在认证后由 start_requested 开始按 PROFILE_INTERVAL 采样，
+    响应头 X-Profile-Id 返回采样结果的 id；开启 PROFILE_CONTINUOUS 时其余请求按较低频率采样，只保存最慢的请求
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        path = scope.get('path', '')
+        if _requested(scope):
+            trigger, interval = 'request', PROFILE_INTERVAL
+        elif PROFILE_CONTINUOUS and not path.startswith(CONTINUOUS_EXCLUDED_PATHS):
+            trigger, interval = 'slow', PROFILE_CONTINUOUS_INTERVAL
+        else:
+            return await self.app(scope, receive, send)
+
+        profile = Profile(trigger, interval, path, asyncio.get_running_loop(), asyncio.current_task())
+        keep = True
+        if trigger == 'request':
+            # 认证之前不采样，由 start_requested 开始
+            scope.setdefault('state', {})['profile'] = profile
+
+        async def send_wrapper(message):
+            nonlocal keep
+            if message['type'] == 'http.response.start':
+                # verify_token 识别出的客户端
+                client = scope.get('state', {}).get('client')
+                profile.client = getattr(client, 'name', None)
+                profile.route = getattr(scope.get('route'), 'path', None)
+                headers = message.get('headers', [])
+                if any(name.lower() == b'content-type' and value.startswith(b'text/event-stream') for name, value in headers):
+                    # 流式响应的处理时间不代表请求的处理时间
+                    keep = False
+                elif profile.started and trigger == 'request':
+                    message = {**message, 'headers': [*headers, (PROFILE_ID_HEADER, profile.id.encode())]}
+            await send(message)
+
+        token = _current.set(profile)
+        if trigger != 'request':
+            profiler.begin(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            profiler.end(profile, keep)
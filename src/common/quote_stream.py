@@ -0,0 +1,211 @@
+import os
+import json
+import asyncio
+import logging
+from src.common.clients import Client
+from src.common.canonical import canonical_symbol
+from src.common.errors import DataError, NoDataError, RateLimitError, OverloadedError
+from src.common.scheduler import scheduler
+
+# 每个 symbol 访问上游的间隔，单位为秒，所有订阅者共享
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", 5))
+# 没有数据变化时发送心跳的间隔，单位为秒
+STREAM_HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", 15))
+# 单个连接最多订阅的 symbol 数
+STREAM_MAX_SYMBOLS = int(os.getenv("STREAM_MAX_SYMBOLS", 50))
+# 单个客户端所有连接合计最多订阅的 symbol 数，同一 symbol 在多个连接中订阅时分别计算
+STREAM_CLIENT_MAX_SYMBOLS = int(os.getenv("STREAM_CLIENT_MAX_SYMBOLS", 200))
+# 所有客户端合计最多轮询的不同 symbol 数
+STREAM_MAX_POLLED_SYMBOLS = int(os.getenv("STREAM_MAX_POLLED_SYMBOLS", 1000))
+# 比较变化时忽略的字段
+IGNORED_FIELDS = ('updated_at',)
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """
+    单个连接的订阅，只在事件循环线程中使用
+    未发送的变化按 symbol 合并，消费慢的连接只会收到每个 symbol 合并后的最新变化，占用的内存不超过订阅的 symbol 数
+    """
+
+    def __init__(self, client: Client, symbols: list):
+        self.client = client
+        self.symbols = symbols
+        self.pending = {}
+        self._event = asyncio.Event()
+
+    def push(self, symbol: str, message: dict):
+        pending = self.pending.get(symbol)
+        # 错误消息与报价之间不合并
+        if pending is None or 'error' in pending or 'error' in message:
+            self.pending[symbol] = dict(message)
+        else:
+            pending.update(message)
+        self._event.set()
+
+    async def next(self, timeout: float) -> list:
+        """
+        等待并取出未发送的消息
+        :param timeout: 最长等待时间，单位为秒
+        :return: 消息列表，超时时为空列表
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._event.clear()
+        messages = list(self.pending.values())
+        self.pending = {}
+        return messages
+
+
+class QuoteHub:
+    """
+    报价订阅中心，只在事件循环线程中使用
+    每个被订阅的 symbol 只有一个轮询任务，每 STREAM_POLL_INTERVAL 通过调度器获取一次报价，
+    与上一次的报价比较后只把变化的字段推送给所有订阅者；新订阅者先收到完整的最新报价（或错误）
+    轮询轮流记在订阅该 symbol 的客户端名下，受各客户端的调度权重和速率限制
+    每个客户端订阅的 symbol 数和轮询的不同 symbol 总数有上限，最后一个订阅者取消订阅后停止轮询
+    """
+
+    def __init__(self, fetch_quote, interval: float = STREAM_POLL_INTERVAL,
+                 client_max_symbols: int = STREAM_CLIENT_MAX_SYMBOLS, max_polled_symbols: int = STREAM_MAX_POLLED_SYMBOLS):
+        """
+        :param fetch_quote: 获取报价的阻塞函数 fetch_quote(symbol)，返回报价模型
+        :param client_max_symbols: 单个客户端合计最多订阅的 symbol 数
+        :param max_polled_symbols: 最多轮询的不同 symbol 数
+        """
+        self.fetch_quote = fetch_quote
+        self.interval = interval
+        self.client_max_symbols = client_max_symbols
+        self.max_polled_symbols = max_polled_symbols
+        # {symbol: {Subscriber: None}}，按订阅顺序
+        self._subscribers = {}
+        self._latest = {}
+        self._pollers = {}
+        # {客户端名称: 订阅的 symbol 数}
+        self._client_symbols = {}
+
+    def check(self, client: Client, symbols: list) -> list:
+        """
+        检查订阅是否超过上限
+        :return: 统一写法并去重后的 symbol 列表
+        """
+        symbols = list(dict.fromkeys(canonical_symbol(symbol) for symbol in symbols))
+        subscribed = self._client_symbols.get(client.name, 0)
+        if subscribed + len(symbols) > self.client_max_symbols:
+            raise RateLimitError(f"Client {client.name} streams {subscribed} symbols, at most {self.client_max_symbols}",
+                                 self.interval)
+        new = sum(1 for symbol in symbols if symbol not in self._pollers)
+        if len(self._pollers) + new > self.max_polled_symbols:
+            raise OverloadedError(f"At most {self.max_polled_symbols} symbols are streamed", self.interval)
+        return symbols
+
+    def subscribe(self, client: Client, symbols: list) -> Subscriber:
+        """
+        订阅 symbol 的报价
+        :param client: 订阅的客户端
+        :raises RateLimitError: 客户端订阅的 symbol 数超过上限
+        :raises OverloadedError: 轮询的不同 symbol 数超过上限
+        """
+        symbols = self.check(client, symbols)
+        subscriber = Subscriber(client, symbols)
+        self._client_symbols[client.name] = self._client_symbols.get(client.name, 0) + len(symbols)
+        for symbol in symbols:
+            self._subscribers.setdefault(symbol, {})[subscriber] = None
+            latest = self._latest.get(symbol)
+            if latest is not None:
+                subscriber.push(symbol, latest)
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.ensure_future(self._poll(symbol))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        name = subscriber.client.name
+        remaining = self._client_symbols.get(name, 0) - len(subscriber.symbols)
+        if remaining > 0:
+            self._client_symbols[name] = remaining
+        else:
+            self._client_symbols.pop(name, None)
+        for symbol in subscriber.symbols:
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.pop(subscriber, None)
+            if not subscribers:
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+                poller = self._pollers.pop(symbol, None)
+                if poller is not None:
+                    poller.cancel()
+
+    def _publish(self, symbol: str, message: dict):
+        for subscriber in self._subscribers.get(symbol, ()):
+            subscriber.push(symbol, message)
+
+    def _poll_client(self, symbol: str, polls: int) -> Client:
+        """第 polls 次轮询记在名下的客户端，在订阅该 symbol 的客户端之间轮换"""
+        clients = list({subscriber.client.name: subscriber.client for subscriber in self._subscribers[symbol]}.values())
+        return clients[polls % len(clients)]
+
+    async def _poll(self, symbol: str):
+        polls = 0
+        while True:
+            try:
+                client = self._poll_client(symbol, polls)
+                polls += 1
+                quote = await scheduler.run(client, client.lane, self.fetch_quote, symbol)
+                data = quote.model_dump()
+                latest = self._latest.get(symbol)
+                if latest is None or 'error' in latest:
+                    self._latest[symbol] = data
+                    self._publish(symbol, data)
+                else:
+                    delta = {key: value for key, value in data.items()
+                             if key not in IGNORED_FIELDS and latest.get(key) != value}
+                    if delta:
+                        delta['symbol'] = symbol
+                        delta.update((key, data[key]) for key in IGNORED_FIELDS if key in data)
+                        latest.update(data)
+                        self._publish(symbol, delta)
+            except asyncio.CancelledError:
+                raise
+            except NoDataError as e:
+                # 只在状态变化时推送错误
+                message = {'symbol': symbol, 'error': str(e), 'code': e.code}
+                if self._latest.get(symbol) != message:
+                    self._latest[symbol] = message
+                    self._publish(symbol, message)
+            except DataError as e:
+                logger.warning("Failed to poll quote %s: %s", symbol, e)
+            except Exception:
+                logger.exception("Failed to poll quote %s", symbol)
+            await asyncio.sleep(self.interval)
+
+
+def sse_event(event: str, data) -> str:
+    """Server-Sent Events 格式的消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def stream_quotes(hub: QuoteHub, client: Client, symbols: list, heartbeat: float = STREAM_HEARTBEAT_INTERVAL):
+    """
+    订阅报价并生成 SSE 消息，连接关闭时取消订阅
+    报价消息 event 为 quote，symbol 没有数据时 event 为 error，没有变化时定期发送注释行作为心跳
+    开始发送前其他连接已占满订阅上限时，发送一条 error 消息后结束
+    """
+    try:
+        subscriber = hub.subscribe(client, symbols)
+    except DataError as e:
+        yield sse_event('error', {'error': str(e), 'code': e.code})
+        return
+    try:
+        while True:
+            messages = await subscriber.next(heartbeat)
+            if not messages:
+                yield ": keep-alive\n\n"
+                continue
+            yield "".join(sse_event('error' if 'error' in message else 'quote', message) for message in messages)
+    finally:
+        hub.unsubscribe(subscriber)
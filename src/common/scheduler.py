@@ -0,0 +1,285 @@
+import os
+import time
+import asyncio
+from collections import deque
+from fastapi.requests import Request
+from starlette.concurrency import run_in_threadpool
+from src.common.clients import Client, LANES, anonymous_client
+from src.common.errors import RateLimitError, DeadlineExceededError, ClientDisconnectedError
+from src.common.deadline import request_timeout, set_deadline, reset_deadline, remaining
+from src.common.cache import MISSING
+from src.common.admission import admission
+from src.common import profiling
+
+# 同时执行的上游获取数
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", 8))
+# 为 interactive 通道保留的执行位，bulk 通道最多使用 UPSTREAM_CONCURRENCY - 该值 个执行位
+UPSTREAM_INTERACTIVE_RESERVED = int(os.getenv("UPSTREAM_INTERACTIVE_RESERVED", 2))
+# 请求头，指定请求所在的通道 interactive 或 bulk
+LANE_HEADER = "x-request-lane"
+# 排队期间检查客户端是否断开连接的间隔，单位为秒
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class _ClientState:
+    """单个客户端的调度状态"""
+    __slots__ = ('client', 'active', 'vtime', 'tokens', 'updated', 'queues')
+
+    def __init__(self, client: Client):
+        self.client = client
+        self.active = 0
+        # 虚拟时间：已使用的上游执行时间 / 权重，越小越先调度
+        self.vtime = 0.0
+        self.tokens = None
+        self.updated = time.monotonic()
+        self.queues = {lane: deque() for lane in LANES}
+
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class FairScheduler:
+    """
+    上游获取的加权公平调度器，只在事件循环线程中使用
+    执行位有空闲时直接执行，否则排队；有执行位释放时先调度 interactive 通道，
+    同一通道内调度虚拟时间最小的客户端（按实际执行时间 / 权重计算），大量请求的客户端不会饿死其他客户端
+    每个客户端还受并发数和请求频率（令牌桶）限制，超过频率限制时直接拒绝
+    """
+
+    def __init__(self, concurrency: int = UPSTREAM_CONCURRENCY, interactive_reserved: int = UPSTREAM_INTERACTIVE_RESERVED):
+        self.concurrency = concurrency
+        self.bulk_concurrency = max(1, concurrency - interactive_reserved)
+        self.active = {lane: 0 for lane in LANES}
+        self.vtime = 0.0
+        self._clients = {}
+
+    def _state(self, client: Client) -> _ClientState:
+        state = self._clients.get(client.name)
+        if state is None or state.client is not client:
+            state = self._clients[client.name] = _ClientState(client)
+        return state
+
+    def _take_token(self, state: _ClientState):
+        """令牌桶限流，没有令牌时抛出 RateLimitError"""
+        client = state.client
+        if not client.rate:
+            return
+        burst = client.burst or max(1, int(-(-client.rate // 1)))
+        now = time.monotonic()
+        tokens = burst if state.tokens is None else min(burst, state.tokens + (now - state.updated) * client.rate)
+        state.updated = now
+        if tokens < 1:
+            state.tokens = tokens
+            raise RateLimitError(f"Rate limit exceeded for client {client.name}", (1 - tokens) / client.rate)
+        state.tokens = tokens - 1
+
+    def _eligible(self, state: _ClientState, lane: str) -> bool:
+        """客户端在该通道是否可以立即执行"""
+        if sum(self.active.values()) >= self.concurrency:
+            return False
+        if lane == 'bulk' and self.active['bulk'] >= self.bulk_concurrency:
+            return False
+        return not state.client.max_concurrency or state.active < state.client.max_concurrency
+
+    def _start(self, state: _ClientState, lane: str):
+        state.active += 1
+        self.active[lane] += 1
+
+    def _dispatch(self):
+        """调度排队的请求直到没有空闲执行位，interactive 通道优先"""
+        while True:
+            selected = None
+            for lane in LANES:
+                candidates = [state for state in self._clients.values()
+                              if state.queues[lane] and self._eligible(state, lane)]
+                if candidates:
+                    selected = (min(candidates, key=lambda state: state.vtime), lane)
+                    break
+            if selected is None:
+                return
+            state, lane = selected
+            future = state.queues[lane].popleft()
+            if future.done():
+                continue
+            self.vtime = max(self.vtime, state.vtime)
+            self._start(state, lane)
+            future.set_result(None)
+
+    async def acquire(self, client: Client, lane: str):
+        """
+        获取执行位，需要与 release 成对调用
+        :param client: 客户端
+        :param lane: 通道 interactive 或 bulk
+        """
+        state = self._state(client)
+        self._take_token(state)
+        # 空闲后重新进入的客户端从当前虚拟时间开始，不能用空闲期间积累的额度插队
+        if not state.active and not state.waiting():
+            state.vtime = max(state.vtime, self.vtime)
+        if self._eligible(state, lane):
+            self._start(state, lane)
+            return
+        future = asyncio.get_running_loop().create_future()
+        state.queues[lane].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已经分配了执行位但调用方被取消，归还执行位
+            if future.done() and not future.cancelled():
+                self.release(client, lane, 0.0)
+            else:
+                future.cancel()
+            raise
+
+    def release(self, client: Client, lane: str, elapsed: float):
+        """
+        释放执行位，按执行时间增加客户端的虚拟时间
+        :param elapsed: 执行时间，单位为秒
+        """
+        state = self._state(client)
+        state.active -= 1
+        self.active[lane] -= 1
+        state.vtime += elapsed / state.client.weight
+        self._dispatch()
+
+    async def run(self, client: Client, lane: str, func, *args, **kwargs):
+        """在调度器控制下于线程池中执行阻塞函数"""
+        await self.acquire(client, lane)
+        start = time.monotonic()
+        try:
+            return await run_in_threadpool(func, *args, **kwargs)
+        finally:
+            self.release(client, lane, time.monotonic() - start)
+
+    def stats(self) -> list:
+        """
+        获取各个客户端的调度状态
+        :return: [{name, lane, weight, active, waiting, vtime}]
+        """
+        return [{
+            'name': state.client.name,
+            'lane': state.client.lane,
+            'weight': state.client.weight,
+            'active': state.active,
+            'waiting': state.waiting(),
+            'vtime': state.vtime,
+        } for state in self._clients.values()]
+
+
+scheduler = FairScheduler()
+
+
+def request_client(request: Request) -> Client:
+    """获取 verify_token 识别出的客户端"""
+    return getattr(request.state, 'client', None) or anonymous_client
+
+
+def request_lane(request: Request, default: str = None) -> str:
+    """
+    获取请求所在的通道：客户端配置的通道和路由的默认通道 default 中优先级较低的一个，
+    请求头 X-Request-Lane 只能把请求降到更低优先级的通道（bulk），不能提升
+    """
+    lanes = [request_client(request).lane]
+    if default:
+        lanes.append(default)
+    lane = max(lanes, key=LANES.index)
+    requested = request.headers.get(LANE_HEADER, '').lower()
+    if requested in LANES and LANES.index(requested) > LANES.index(lane):
+        return requested
+    return lane
+
+
+def request_route(request: Request) -> str:
+    """获取请求匹配的路由路径，用于按路由准入控制"""
+    route = request.scope.get('route')
+    return getattr(route, 'path', None) or request.url.path
+
+
+async def _acquire(route: str, client: Client, lane: str):
+    """依次获取准入名额和上游执行位"""
+    await admission.acquire(route)
+    try:
+        await scheduler.acquire(client, lane)
+    except BaseException:
+        admission.release(route)
+        raise
+
+
+async def _wait_queued(request: Request, route: str, client: Client, lane: str):
+    """
+    排队等待执行，超过截止时间或客户端断开连接时放弃排队
+    正常返回时已持有准入名额和执行位，由调用方释放；放弃排队时不持有任何名额
+    """
+    task = asyncio.ensure_future(_acquire(route, client, lane))
+    acquired = False
+    try:
+        while True:
+            left = remaining()
+            timeout = DISCONNECT_POLL_INTERVAL if left is None else max(min(DISCONNECT_POLL_INTERVAL, left), 0)
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                task.result()
+                acquired = True
+                return
+            if left is not None and left <= timeout:
+                raise DeadlineExceededError("Request deadline exceeded while queued")
+            if await request.is_disconnected():
+                raise ClientDisconnectedError("Client disconnected while queued")
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        elif not acquired and not task.cancelled() and task.exception() is None:
+            # 检查连接状态期间排队已完成，放弃执行时释放已获取的名额
+            scheduler.release(client, lane, 0.0)
+            admission.release(route)
+
+
+async def _execute(route: str, client: Client, lane: str, func, args, kwargs):
+    """在线程池中执行，完成后才释放执行位和准入名额"""
+    start = time.monotonic()
+    try:
+        return await run_in_threadpool(profiling.bind(func), *args, **kwargs)
+    finally:
+        elapsed = time.monotonic() - start
+        scheduler.release(client, lane, elapsed)
+        admission.release(route, elapsed)
+
+
+def _consume_result(task: asyncio.Task):
+    """请求已放弃等待的任务，结果已写入缓存，这里只取出异常避免警告"""
+    if not task.cancelled():
+        task.exception()
+
+
+async def fetch(request: Request, func, *args, lane: str = None, **kwargs):
+    """
+    执行数据获取函数，路由中调用上游相关的函数都应通过该函数
+    缓存命中时直接返回；否则先经过准入控制，再由调度器在线程池中执行
+    请求的截止时间（X-Request-Timeout 或路由默认值）传递给数据获取函数，超时后未开始的上游获取不再执行；
+    排队中客户端断开连接时放弃排队；已经开始的获取继续完成并写入缓存，不浪费已完成的工作
+    :param request: 请求对象
+    :param func: 阻塞的数据获取函数
+    :param lane: 默认通道，请求头 X-Request-Lane 优先
+    :return: 函数结果
+    """
+    cached = getattr(func, 'cached', None)
+    if cached is not None:
+        value = cached(*args, **kwargs)
+        if value is not MISSING:
+            return value
+
+    route = request_route(request)
+    client = request_client(request)
+    lane = request_lane(request, lane)
+    token = set_deadline(request_timeout(request, route))
+    try:
+        await _wait_queued(request, route, client, lane)
+        task = asyncio.ensure_future(_execute(route, client, lane, func, args, kwargs))
+        task.add_done_callback(_consume_result)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("Request deadline exceeded") from None
+    finally:
+        reset_deadline(token)
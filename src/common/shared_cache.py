@@ -0,0 +1,175 @@
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+
+# 多进程共享的本地缓存层（SQLite 文件），为空时不启用
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+# 写入多少次后清理一次过期条目
+PRUNE_EVERY = 1000
+
+logger = logging.getLogger(__name__)
+_local = threading.local()
+_writes = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    symbol TEXT,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (name, key)
+);
+CREATE INDEX IF NOT EXISTS cache_symbol ON cache (symbol);
+CREATE TABLE IF NOT EXISTS invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    names TEXT,
+    symbol TEXT,
+    pattern TEXT,
+    created_at REAL NOT NULL
+);
+"""
+# 失效记录保留的时间，单位为秒
+INVALIDATION_RETENTION = 24 * 60 * 60
+
+
+def enabled() -> bool:
+    return bool(SHARED_CACHE_PATH)
+
+
+def _connection() -> sqlite3.Connection:
+    """每个进程的每个线程使用独立的连接，fork 之后在 worker 中重新打开"""
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and _local.pid == os.getpid():
+        return connection
+    os.makedirs(os.path.dirname(os.path.abspath(SHARED_CACHE_PATH)), exist_ok=True)
+    connection = sqlite3.connect(SHARED_CACHE_PATH, timeout=5, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    _local.connection = connection
+    _local.pid = os.getpid()
+    return connection
+
+
+def get(name: str, key):
+    """
+    读取共享缓存
+    :param name: 缓存函数名称
+    :param key: 缓存键
+    :return: (值, 过期时间 time.time())，未命中或已过期时返回 None
+    """
+    try:
+        row = _connection().execute("SELECT value, expires_at FROM cache WHERE name = ? AND key = ? AND expires_at > ?",
+                                    (name, repr(key), time.time())).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+    except Exception:
+        logger.exception("Failed to read shared cache %s", name)
+        return None
+
+
+def put(name: str, key, value, expires_at: float, symbol: str = None):
+    """
+    写入共享缓存，写入失败只记录日志
+    :param expires_at: 过期时间 time.time()
+    :param symbol: 缓存条目对应的 symbol，用于按 symbol 失效
+    """
+    global _writes
+    try:
+        connection = _connection()
+        connection.execute("INSERT OR REPLACE INTO cache (name, key, symbol, value, expires_at) VALUES (?, ?, ?, ?, ?)",
+                           (name, repr(key), symbol, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at))
+        _writes += 1
+        if _writes % PRUNE_EVERY == 0:
+            connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            connection.execute("DELETE FROM invalidations WHERE created_at <= ?", (time.time() - INVALIDATION_RETENTION,))
+    except Exception:
+        logger.exception("Failed to write shared cache %s", name)
+
+
+def clear(name: str = None):
+    """清空共享缓存，name 不为 None 时只清空该函数的条目"""
+    try:
+        if name is None:
+            _connection().execute("DELETE FROM cache")
+        else:
+            _connection().execute("DELETE FROM cache WHERE name = ?", (name,))
+    except Exception:
+        logger.exception("Failed to clear shared cache %s", name)
+
+
+def _where(names: list = None, symbol: str = None, pattern: str = None):
+    conditions, params = [], []
+    if names:
+        conditions.append(f"name IN ({', '.join('?' * len(names))})")
+        params += names
+    if symbol is not None:
+        conditions.append("symbol = ?")
+        params.append(symbol)
+    if pattern is not None:
+        conditions.append("key GLOB ?")
+        params.append(pattern)
+    return " AND ".join(conditions) or "1", params
+
+
+def entries(names: list = None, symbol: str = None, pattern: str = None, limit: int = 100) -> list:
+    """
+    列出共享缓存中未过期的条目
+    :return: [(name, key, symbol, 字节数, 过期时间 time.time())]
+    """
+    where, params = _where(names, symbol, pattern)
+    try:
+        return _connection().execute(f"SELECT name, key, symbol, length(value), expires_at FROM cache "
+                                     f"WHERE {where} AND expires_at > ? ORDER BY name, key LIMIT ?",
+                                     (*params, time.time(), limit)).fetchall()
+    except Exception:
+        logger.exception("Failed to list shared cache")
+        return []
+
+
+def invalidate(names: list = None, symbol: str = None, pattern: str = None) -> int:
+    """
+    删除共享缓存中匹配的条目，并记录失效操作，其他进程通过 invalidations_since 同步到进程内缓存
+    :param names: 缓存函数名称，None 表示所有函数
+    :param symbol: 只删除该 symbol 的条目
+    :param pattern: 只删除缓存键（repr）匹配该 glob 模式的条目
+    :return: 删除的条目数
+    """
+    where, params = _where(names, symbol, pattern)
+    try:
+        connection = _connection()
+        deleted = connection.execute(f"DELETE FROM cache WHERE {where}", params).rowcount
+        connection.execute("INSERT INTO invalidations (pid, names, symbol, pattern, created_at) VALUES (?, ?, ?, ?, ?)",
+                           (os.getpid(), ",".join(names) if names else None, symbol, pattern, time.time()))
+        return deleted
+    except Exception:
+        logger.exception("Failed to invalidate shared cache")
+        return 0
+
+
+def invalidations_since(last_id: int = None):
+    """
+    读取其他进程记录的失效操作
+    :param last_id: 上次读取到的 id，None 表示只获取当前最大的 id
+    :return: ([(names, symbol, pattern)], 最大 id)
+    """
+    try:
+        connection = _connection()
+        if last_id is None:
+            row = connection.execute("SELECT max(id) FROM invalidations").fetchone()
+            return [], row[0] or 0
+        rows = connection.execute("SELECT id, pid, names, symbol, pattern FROM invalidations WHERE id > ? ORDER BY id",
+                                  (last_id,)).fetchall()
+    except Exception:
+        logger.exception("Failed to read shared cache invalidations")
+        return [], last_id
+    pid = os.getpid()
+    items = [(names.split(",") if names else None, symbol, pattern) for _, row_pid, names, symbol, pattern in rows
+             if row_pid != pid]
+    return items, rows[-1][0] if rows else last_id
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import importlib
+from contextlib import contextmanager
+
+# 为 true 时记录启动过程中每个模块的导入时间，启动完成后输出耗时最多的模块
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+# 输出导入时间最多的模块数
+STARTUP_PROFILE_TOP = int(os.getenv("STARTUP_PROFILE_TOP", 20))
+# 预先生成的 OpenAPI schema 文件，存在且与当前代码一致时直接加载，不在启动时生成
+OPENAPI_SCHEMA_PATH = os.getenv("OPENAPI_SCHEMA_PATH", "")
+# 影响 OpenAPI schema 的源文件，内容变化后预先生成的 schema 失效
+SCHEMA_SOURCES = ('main.py', 'src/common/fastapi_util.py', 'src/models')
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+_started = time.perf_counter()
+_phases = []
+# {模块名: [自身耗时, 总耗时]}，单位为秒
+_imports = {}
+
+
+class _ImportTimer:
+    """
+    记录模块导入时间的 meta path finder，放在 sys.meta_path 最前面，
+    找到模块后包装 loader 的 exec_module，自身耗时不含导入其他模块的时间
+    """
+
+    def __init__(self):
+        self._stack = []
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # 内置模块的 loader 是类本身，不能替换其方法
+        if loader is None or isinstance(loader, type) or not hasattr(loader, 'exec_module'):
+            return spec
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                children = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += total
+                _imports[name] = [total - children, total]
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+
+_timer = None
+if STARTUP_PROFILE:
+    _timer = _ImportTimer()
+    sys.meta_path.insert(0, _timer)
+
+
+class LazyModule:
+    """
+    延迟导入的模块，第一次访问属性时才导入
+    导入由 importlib 的模块锁保证线程安全，多个线程同时访问时只导入一次
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+_lazy_modules = []
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    延迟导入模块，用于启动时不需要的重量级依赖（pandas、yfinance 等），接受请求前不必等待它们导入完成
+    :param name: 模块名
+    :return: 第一次访问属性时才导入的模块
+    """
+    module = LazyModule(name)
+    _lazy_modules.append(module)
+    return module
+
+
+def warm_up():
+    """导入所有延迟导入的模块，启动后在后台线程中执行，或在 fork worker 之前执行"""
+    for module in _lazy_modules:
+        try:
+            module.load()
+        except Exception:
+            logger.exception("Failed to import %s", module._name)
+    mark('warm_up')
+
+
+def mark(phase: str):
+    """记录启动阶段的完成时间"""
+    _phases.append((phase, time.perf_counter()))
+
+
+def report() -> dict:
+    """
+    获取启动耗时
+    :return: {phases: [{name, seconds}], imports: [{name, self_seconds, total_seconds}]}，
+             imports 只在 STARTUP_PROFILE 开启时记录，按自身耗时降序
+    """
+    phases = []
+    last = _started
+    for name, at in _phases:
+        phases.append({'name': name, 'seconds': at - last})
+        last = at
+    imports = sorted(({'name': name, 'self_seconds': times[0], 'total_seconds': times[1]}
+                      for name, times in _imports.items()), key=lambda item: item['self_seconds'], reverse=True)
+    return {'phases': phases, 'imports': imports}
+
+
+def finish():
+    """启动完成，停止记录导入时间并输出启动耗时"""
+    global _timer
+    mark('total')
+    if _timer is None:
+        return
+    sys.meta_path.remove(_timer)
+    _timer = None
+    data = report()
+    lines = [f"{phase['name']}: {phase['seconds'] * 1000:.1f}ms" for phase in data['phases']]
+    lines += [f"{item['name']}: self {item['self_seconds'] * 1000:.1f}ms, total {item['total_seconds'] * 1000:.1f}ms"
+              for item in data['imports'][:STARTUP_PROFILE_TOP]]
+    logger.warning("Startup profile:\n  %s", "\n  ".join(lines))
+
+
+def schema_fingerprint(app) -> str:
+    """根据应用版本、依赖版本和定义路由和模型的源文件计算 schema 的指纹"""
+    import fastapi
+    import pydantic
+    digest = hashlib.sha256(f"{app.title}|{app.version}|{fastapi.__version__}|{pydantic.VERSION}".encode())
+    for source in SCHEMA_SOURCES:
+        path = os.path.join(ROOT_DIR, source)
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(path, file) for file in os.listdir(path) if file.endswith('.py'))
+        for file in files:
+            with open(file, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def write_openapi_schema(app, path: str = OPENAPI_SCHEMA_PATH):
+    """
+    生成 OpenAPI schema 并写入文件，部署前执行，启动时通过 load_openapi_schema 加载
+    :param app: FastAPI 应用
+    :param path: 文件路径
+    """
+    data = {'fingerprint': schema_fingerprint(app), 'schema': app.openapi()}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def load_openapi_schema(app, path: str = OPENAPI_SCHEMA_PATH) -> bool:
+    """
+    加载预先生成的 OpenAPI schema，文件不存在或与当前代码不一致时不加载，启动时照常生成
+    :param app: FastAPI 应用
+    :param path: 文件路径
+    :return: 是否已加载
+    """
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        logger.exception("Failed to load OpenAPI schema %s", path)
+        return False
+    if data.get('fingerprint') != schema_fingerprint(app):
+        logger.warning("OpenAPI schema %s is outdated, regenerate it with `python main.py --build-schema`", path)
+        return False
+    app.openapi_schema = data['schema']
+    return True
+
+
+@contextmanager
+def prebuilt_openapi(app):
+    """
+    FastApiMCP 初始化时直接调用 get_openapi 生成 schema，
+    已加载预先生成的 schema 时在该范围内改为返回其副本，MCP 工具由它转换得到
+    """
+    if app.openapi_schema is None:
+        yield
+        return
+    import copy
+    from fastapi_mcp import server
+    get_openapi = server.get_openapi
+    server.get_openapi = lambda **kwargs: copy.deepcopy(app.openapi_schema)
+    try:
+        yield
+    finally:
+        server.get_openapi = get_openapi
@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import bisect
+import difflib
+import threading
+from src.models.ticker_lookup_model import LookupItem
+
+# 可选的内置 symbol 列表，JSON 数组，格式与 /ticker/lookup 的返回值相同
+SYMBOL_LIST_PATH = os.getenv("SYMBOL_LIST_PATH", "")
+# 本地索引返回条目的最小匹配分数
+GOOD_MATCH_SCORE = 0.75
+# 模糊匹配的最小相似度
+FUZZY_CUTOFF = 0.8
+
+# 匹配分数，按匹配方式从高到低
+EXACT_SYMBOL_SCORE = 1.0
+EXACT_NAME_SCORE = 0.98
+SYMBOL_PREFIX_SCORE = 0.95
+NAME_PREFIX_SCORE = 0.9
+TOKEN_PREFIX_SCORE = 0.85
+
+
+def normalize(text: str) -> str:
+    """
+    本地索引的匹配键：统一大小写（casefold），保留各语言的文字、数字和 symbol 中的 ^ - .，
+    其余符号替换为空格，合并连续空格；只用于本地索引，上游搜索使用原始关键词
+    """
+    return ' '.join(re.sub(r'[^\w^.\-]+', ' ', (text or '').casefold()).split())
+
+
+class SymbolIndex:
+    """
+    本地 symbol 搜索索引
+    symbol 和名称按词排序存放，前缀匹配使用二分查找；没有前缀匹配时在首字母相同的候选中做模糊匹配
+    加入条目时只插入或删除变化的词，不重新排序整个索引
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self._names = {}
+        # 有序的 (词, symbol) 列表
+        self._entries = []
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def _keys(symbol: str, name: str) -> set:
+        """symbol 在索引中的 (词, symbol)"""
+        return {(symbol.casefold(), symbol), *((token, symbol) for token in name.split())}
+
+    def add(self, items):
+        """
+        加入或更新索引中的条目
+        :param items: LookupItem 列表
+        """
+        with self._lock:
+            # 索引为空时（加载内置列表）一次排序，否则逐个插入
+            bulk = not self._entries
+            for item in items:
+                if not item.symbol:
+                    continue
+                name = normalize(item.short_name)
+                old_name = self._names.get(item.symbol)
+                self._items[item.symbol] = item
+                self._names[item.symbol] = name
+                if bulk or old_name == name:
+                    continue
+                old_keys = self._keys(item.symbol, old_name) if old_name is not None else set()
+                new_keys = self._keys(item.symbol, name)
+                for key in old_keys - new_keys:
+                    index = bisect.bisect_left(self._entries, key)
+                    if index < len(self._entries) and self._entries[index] == key:
+                        del self._entries[index]
+                for key in new_keys - old_keys:
+                    bisect.insort(self._entries, key)
+            if bulk:
+                self._entries = sorted(set().union(*(self._keys(symbol, name) for symbol, name in self._names.items())))
+
+    def load(self, path: str):
+        """
+        从 JSON 文件加载内置 symbol 列表
+        :param path: JSON 文件路径
+        """
+        with open(path) as f:
+            self.add(LookupItem(**item) for item in json.load(f))
+
+    def _prefix(self, prefix: str) -> set:
+        """所有以 prefix 开头的词对应的 symbol"""
+        start = bisect.bisect_left(self._entries, (prefix,))
+        end = bisect.bisect_left(self._entries, (prefix + '\uffff',))
+        return {symbol for _, symbol in self._entries[start:end]}
+
+    def _score(self, query: str, tokens: list, symbol: str) -> float:
+        name = self._names[symbol]
+        symbol_key = symbol.casefold()
+        if query == symbol_key or query == symbol_key.split('.')[0]:
+            return EXACT_SYMBOL_SCORE
+        if query == name:
+            return EXACT_NAME_SCORE
+        if symbol_key.startswith(query):
+            return SYMBOL_PREFIX_SCORE
+        if name.startswith(query):
+            return NAME_PREFIX_SCORE
+        name_tokens = name.split() + [symbol_key]
+        if all(any(name_token.startswith(token) for name_token in name_tokens) for token in tokens):
+            return TOKEN_PREFIX_SCORE
+        # 模糊匹配：与完整名称或同长度的名称前缀比较，分数低于所有前缀匹配
+        ratio = max(difflib.SequenceMatcher(None, query, name).ratio(),
+                    difflib.SequenceMatcher(None, query, name[:len(query)]).ratio())
+        return ratio * TOKEN_PREFIX_SCORE if ratio >= FUZZY_CUTOFF else 0
+
+    def match(self, query: str, limit: int = 25, min_score: float = GOOD_MATCH_SCORE) -> tuple:
+        """
+        搜索 symbol，支持 symbol/名称前缀、分词前缀和模糊匹配，结果按匹配分数和 rank 排序
+        :param query: 搜索关键词
+        :param limit: 最多返回的条目数
+        :param min_score: 最小匹配分数
+        :return: (LookupItem 列表, 是否有 symbol 或名称与关键词完全相同的条目)
+        """
+        query = normalize(query)
+        tokens = query.split()
+        if not tokens:
+            return [], False
+        with self._lock:
+            # 每个词都需要匹配，取各个词前缀匹配结果的交集
+            candidates = None
+            for token in tokens:
+                matched = self._prefix(token)
+                candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                # 模糊匹配：候选为与任一词前 3 个字符相同的条目
+                candidates = set()
+                for token in tokens:
+                    candidates |= self._prefix(token[:3])
+            scored = [(self._score(query, tokens, symbol), symbol) for symbol in candidates]
+            items = self._items
+
+        scored = [(score, symbol) for score, symbol in scored if score >= min_score]
+        scored.sort(key=lambda x: (x[0], items[x[1]].rank or 0), reverse=True)
+        exact = bool(scored) and scored[0][0] >= EXACT_NAME_SCORE
+        return [items[symbol] for _, symbol in scored[:limit]], exact
+
+    def search(self, query: str, limit: int = 25, min_score: float = GOOD_MATCH_SCORE) -> list:
+        """
+        搜索 symbol，见 match
+        :return: LookupItem 列表
+        """
+        return self.match(query, limit, min_score)[0]
+
+
+symbol_index = SymbolIndex()
+if SYMBOL_LIST_PATH:
+    symbol_index.load(SYMBOL_LIST_PATH)
@@ -6,6 +6,26 @@ import math
 
 T = TypeVar('T', bound=BaseModel)
 
+def camel_to_snake(key: str) -> str:
+    """
+    将名称从驼峰命名改成下划线命名，首位大写字母前添加下划线， 连续大写字母前添加下划线， 全部字母改成小写
+    如果出现空格，空格替换为下划线
+    :param key: 驼峰命名的名称
+    :return: 下划线命名的名称
+    """
+    new_key = key[0].lower()
+    for i in range(1, len(key)):
+        if key[i] == ' ':
+            new_key += '_'
+            continue
+        pre_is_upper = key[i - 1].isupper()
+        if key[i].isupper():
+            if not pre_is_upper:
+                new_key += '_'
+        new_key += key[i].lower()
+    return new_key
+
+
 def convert_camel_to_snake(d):
     """
     将字典中属性名称，从驼峰命名改成下划线命名，首位大写字母前添加下划线， 连续大写字母前添加下划线， 全部字母改成小写
@@ -16,17 +36,7 @@ def convert_camel_to_snake(d):
     # clone keys of d
     keys = list(d.keys())
     for key in keys:
-        new_key = key[0].lower()
-        for i in range(1, len(key)):
-            if key[i] == ' ':
-                new_key += '_'
-                continue
-            pre_is_upper = key[i - 1].isupper()
-            if key[i].isupper():
-                if not pre_is_upper:
-                    new_key += '_'
-            new_key += key[i].lower()
-        d[new_key] = d.pop(key)
+        d[camel_to_snake(key)] = d.pop(key)
                 
 def convert_list_dict_camel_to_snake(d):
     """
@@ -39,6 +49,34 @@ def convert_list_dict_camel_to_snake(d):
         convert_camel_to_snake(item)
 
 
+class FrozenDict(dict):
+    """只读字典，用于不可变模型中结构不固定的嵌套字段，序列化时与 dict 相同"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __hash__(self):
+        return hash(tuple(self.items()))
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze_nested(value):
+    """
+    将嵌套的字典、列表转为只读的 FrozenDict、元组，用于不可变模型的字段校验
+    :param value: 任意 JSON 数据
+    :return: 只读的数据
+    """
+    if isinstance(value, dict) and not isinstance(value, FrozenDict):
+        return FrozenDict((key, freeze_nested(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_nested(item) for item in value)
+    return value
+
+
 def to_model(data: Dict[str, Any], model: Type[T]) -> T:
     """
     将字典转换为 Pydantic 模型
@@ -0,0 +1,11 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class AdmissionUsageItem(BaseModel):
+    """Admission control state of a single route"""
+    route: Optional[str] = Field(None, description="Route path, 'total' for the global summary")
+    limit: Optional[int] = Field(None, description="Requests processed at the same time, None for no limit")
+    active: Optional[int] = Field(None, description="Requests being processed")
+    waiting: Optional[int] = Field(None, description="Requests waiting in the admission queue")
+    shed: Optional[int] = Field(None, description="Requests rejected with 503 because the queue was full or the wait timed out")
@@ -0,0 +1,27 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class CacheEntryItem(BaseModel):
+    """A single entry of the in-process cache"""
+    name: Optional[str] = Field(None, description="Cached function name")
+    key: Optional[str] = Field(None, description="Cache key, the canonical arguments of the call")
+    symbol: Optional[str] = Field(None, description="Symbol of the entry, None for functions without a symbol argument")
+    bytes: Optional[int] = Field(None, description="Estimated memory usage in bytes")
+    hits: Optional[int] = Field(None, description="Hits served from the entry")
+    negative: Optional[bool] = Field(None, description="Whether the entry records an empty result or an error")
+    expires_in: Optional[float] = Field(None, description="Seconds until the entry expires")
+
+
+class CacheInvalidateItem(BaseModel):
+    """Entries removed from a single cache"""
+    name: Optional[str] = Field(None, description="Cached function name, 'news' for the news store, 'shared' for the shared cache tier")
+    removed: Optional[int] = Field(None, description="Number of entries removed")
+
+
+class CachePrefetchItem(BaseModel):
+    """Result of prefetching a single function and symbol"""
+    name: Optional[str] = Field(None, description="Cached function name")
+    symbol: Optional[str] = Field(None, description="Ticker symbol")
+    code: Optional[int] = Field(None, description="Status code, 0 for success, 1 for error, 2 for no data found, 3 for rate limited or overloaded")
+    msg: Optional[str] = Field(None, description="Error message")
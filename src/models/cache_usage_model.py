@@ -0,0 +1,15 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class CacheUsageItem(BaseModel):
+    """Cache usage of a single cached function"""
+    name: Optional[str] = Field(None, description="Cached function name, 'total' for the summary")
+    entries: Optional[int] = Field(None, description="Number of cached entries")
+    bytes: Optional[int] = Field(None, description="Estimated memory usage in bytes")
+    max_bytes: Optional[int] = Field(None, description="Memory budget in bytes, None for no function budget")
+    hits: Optional[int] = Field(None, description="Cache hits")
+    misses: Optional[int] = Field(None, description="Cache misses")
+    evictions: Optional[int] = Field(None, description="Entries evicted to stay within the memory budget")
+    negative_entries: Optional[int] = Field(None, description="Negative entries recording empty results or errors")
+    negative_hits: Optional[int] = Field(None, description="Hits served from negative entries")
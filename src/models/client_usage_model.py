@@ -0,0 +1,12 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ClientUsageItem(BaseModel):
+    """Upstream scheduling state of a single client"""
+    name: Optional[str] = Field(None, description="Client name")
+    lane: Optional[str] = Field(None, description="Default lane of the client, interactive or bulk")
+    weight: Optional[float] = Field(None, description="Share of upstream capacity relative to other clients")
+    active: Optional[int] = Field(None, description="Upstream fetches currently running")
+    waiting: Optional[int] = Field(None, description="Requests waiting for an upstream slot")
+    vtime: Optional[float] = Field(None, description="Weighted upstream seconds used, the client with the smallest value is scheduled first")
@@ -0,0 +1,26 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class LoopStallItem(BaseModel):
+    """A period in which a single callback blocked the event loop"""
+    started_at: Optional[float] = Field(None, description="Approximate start time of the stall, Unix timestamp")
+    duration: Optional[float] = Field(None, description="Time the event loop was blocked in seconds")
+    route: Optional[str] = Field(None, description="Route of the request whose task blocked the loop")
+    path: Optional[str] = Field(None, description="Path of the request whose task blocked the loop")
+    function: Optional[str] = Field(None, description="Innermost application function on the blocked stack")
+    stack: Optional[list[str]] = Field(None, description="Stack of the event loop thread captured during the stall, outermost first")
+
+
+class LoopMonitorInfo(BaseModel):
+    """Event loop lag statistics"""
+    enabled: Optional[bool] = Field(None, description="Whether the monitor is running")
+    interval: Optional[float] = Field(None, description="Lag measurement interval in seconds")
+    threshold: Optional[float] = Field(None, description="Blocking time in seconds above which a stall is recorded")
+    lag: Optional[float] = Field(None, description="Latest event loop lag in seconds")
+    lag_p50: Optional[float] = Field(None, description="Median lag over the recent measurement window in seconds")
+    lag_p99: Optional[float] = Field(None, description="99th percentile lag over the recent measurement window in seconds")
+    max_lag: Optional[float] = Field(None, description="Maximum lag since startup in seconds")
+    stall_count: Optional[int] = Field(None, description="Stalls since startup")
+    stalled_seconds: Optional[float] = Field(None, description="Total time the loop was blocked by stalls since startup")
+    stalls: Optional[list[LoopStallItem]] = Field(None, description="Most recent stalls, newest first")
@@ -0,0 +1,15 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ProfileItem(BaseModel):
+    """Summary of a recorded request profile"""
+    id: Optional[str] = Field(None, description="Profile id, also returned in the X-Profile-Id response header")
+    trigger: Optional[str] = Field(None, description="'request' for profiles asked for by the request, 'slow' for slow requests recorded by continuous sampling")
+    route: Optional[str] = Field(None, description="Matched route path")
+    path: Optional[str] = Field(None, description="Request path")
+    client: Optional[str] = Field(None, description="Client name, None for unauthenticated requests")
+    started_at: Optional[float] = Field(None, description="Start time of the request, Unix timestamp")
+    duration: Optional[float] = Field(None, description="Request processing time in seconds")
+    interval: Optional[float] = Field(None, description="Sampling interval in seconds")
+    samples: Optional[int] = Field(None, description="Number of samples taken")
@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class BalanceSheetItem(BaseModel):
     """Single balance sheet item"""
+    model_config = ConfigDict(frozen=True)
+
     treasury_shares_number: Optional[float] = Field(None, description="Number of treasury shares")
     ordinary_shares_number: Optional[float] = Field(None, description="Number of ordinary shares")
     share_issued: Optional[float] = Field(None, description="Number of shares issued")
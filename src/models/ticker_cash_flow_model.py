@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class CashFlowItem(BaseModel):
     """Single cash flow statement item"""
+    model_config = ConfigDict(frozen=True)
+
     free_cash_flow: Optional[float] = Field(None, description="Free cash flow")
     repurchase_of_capital_stock: Optional[float] = Field(None, description="Repurchase of capital stock")
     repayment_of_debt: Optional[float] = Field(None, description="Repayment of debt")
@@ -0,0 +1,14 @@
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class CorporateActionItem(BaseModel):
+    """Dividend or stock split of a ticker"""
+    model_config = ConfigDict(frozen=True)
+
+    date: Optional[datetime] = Field(None, description="Ex-date")
+    action: Optional[str] = Field(None, description="Action type, dividend or split")
+    value: Optional[float] = Field(None, description="Dividend per share, or split ratio (new shares per old share)")
+    prev_close: Optional[float] = Field(None, description="Unadjusted close of the previous trading day")
+    factor: Optional[float] = Field(None, description="Adjustment factor of prices before the ex-date, 1 - dividend / previous close or 1 / split ratio; upstream unadjusted prices already include splits")
@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class FinancialItem(BaseModel):
     """Financial item"""
+    model_config = ConfigDict(frozen=True)
+
     date: Optional[datetime] = Field(None, description="Date and time")
     open: Optional[float] = Field(None, description="Opening price")
     high: Optional[float] = Field(None, description="Highest price")
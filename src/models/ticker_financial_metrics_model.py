@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class FinancialMetricItem(BaseModel):
     """Financial metric item"""
+    model_config = ConfigDict(frozen=True)
+
     date: Optional[datetime] = Field(None, description="Statement date")
     market_cap: Optional[float] = Field(None, description="Market capitalization")
     enterprise_value: Optional[float] = Field(None, description="Enterprise value")
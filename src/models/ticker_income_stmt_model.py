@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class IncomeStmtItem(BaseModel):
     """Single income statement item"""
+    model_config = ConfigDict(frozen=True)
+
     tax_effect_of_unusual_items: Optional[float] = Field(None, description="Tax effect of unusual items")
     tax_rate_for_calcs: Optional[float] = Field(None, description="Tax rate used for calculations")
     normalized_ebitda: Optional[float] = Field(None, description="Normalized EBITDA")
@@ -0,0 +1,19 @@
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class TickerIndicatorItem(BaseModel):
+    """Technical indicators at a single price bar"""
+    model_config = ConfigDict(frozen=True)
+
+    date: Optional[datetime] = Field(None, description="Date and time")
+    close: Optional[float] = Field(None, description="Closing price")
+    returns: Optional[float] = Field(None, description="Return since the previous bar")
+    sma: Optional[float] = Field(None, description="Simple moving average of the close over the window")
+    ema: Optional[float] = Field(None, description="Exponential moving average of the close over the window")
+    rsi: Optional[float] = Field(None, description="Relative strength index (Wilder) over the window")
+    atr: Optional[float] = Field(None, description="Average true range (Wilder) over the window")
+    volatility: Optional[float] = Field(None, description="Rolling standard deviation of returns over the window, annualized for daily and longer intervals")
+    high_52w: Optional[float] = Field(None, description="Highest price over the trailing 52 weeks")
+    low_52w: Optional[float] = Field(None, description="Lowest price over the trailing 52 weeks")
@@ -1,10 +1,13 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Optional, Tuple
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
+from src.common.util import freeze_nested
 from datetime import datetime
 
 
 class CompanyOfficer(BaseModel):
     """Company officer information"""
+    model_config = ConfigDict(frozen=True)
+
     max_age: Optional[int] = Field(None, description="Maximum age of the data")
     name: Optional[str] = Field(None, description="Name of the officer")
     age: Optional[int] = Field(None, description="Age of the officer")
@@ -18,6 +21,8 @@ class CompanyOfficer(BaseModel):
 
 class CorporateActionMeta(BaseModel):
     """Corporate action metadata"""
+    model_config = ConfigDict(frozen=True)
+
     event_type: Optional[str] = Field(None, description="Type of corporate event")
     date_epoch_ms: Optional[int] = Field(None, description="Event date in epoch milliseconds")
     amount: Optional[str] = Field(None, description="Amount associated with the event")
@@ -25,6 +30,8 @@ class CorporateActionMeta(BaseModel):
 
 class CorporateAction(BaseModel):
     """Corporate action information"""
+    model_config = ConfigDict(frozen=True)
+
     header: Optional[str] = Field(None, description="Header of the corporate action")
     message: Optional[str] = Field(None, description="Description of the corporate action")
     meta: Optional[CorporateActionMeta] = Field(None, description="Metadata of the corporate action")
@@ -32,6 +39,8 @@ class CorporateAction(BaseModel):
 
 class TickerInfo(BaseModel):
     """Ticker information response model"""
+    model_config = ConfigDict(frozen=True)
+
     address1: Optional[str] = Field(None, description="First line of the company address")
     city: Optional[str] = Field(None, description="City of the company")
     state: Optional[str] = Field(None, description="State of the company")
@@ -47,7 +56,7 @@ class TickerInfo(BaseModel):
     sector_disp: Optional[str] = Field(None, description="Sector display name")
     long_business_summary: Optional[str] = Field(None, description="Long business summary")
     full_time_employees: Optional[int] = Field(None, description="Number of full-time employees")
-    company_officers: Optional[List[CompanyOfficer]] = Field(None, description="List of company officers")
+    company_officers: Optional[Tuple[CompanyOfficer, ...]] = Field(None, description="List of company officers")
     audit_risk: Optional[int] = Field(None, description="Audit risk score")
     board_risk: Optional[int] = Field(None, description="Board risk score")
     compensation_risk: Optional[int] = Field(None, description="Compensation risk score")
@@ -56,7 +65,7 @@ class TickerInfo(BaseModel):
     governance_epoch_date: Optional[int] = Field(None, description="Governance date in epoch format")
     compensation_as_of_epoch_date: Optional[int] = Field(None, description="Compensation date in epoch format")
     ir_website: Optional[str] = Field(None, description="Investor relations website")
-    executive_team: Optional[List] = Field(None, description="Executive team information")
+    executive_team: Optional[Annotated[Tuple[Any, ...], AfterValidator(freeze_nested)]] = Field(None, description="Executive team information")
     max_age: Optional[int] = Field(None, description="Maximum age of the data")
     price_hint: Optional[int] = Field(None, description="Price hint")
     previous_close: Optional[float] = Field(None, description="Previous closing price")
@@ -185,7 +194,7 @@ class TickerInfo(BaseModel):
     is_earnings_date_estimate: Optional[bool] = Field(None, description="Whether earnings date is estimated")
     short_name: Optional[str] = Field(None, description="Short name of the company")
     long_name: Optional[str] = Field(None, description="Long name of the company")
-    corporate_actions: Optional[List[CorporateAction]] = Field(None, description="List of corporate actions")
+    corporate_actions: Optional[Tuple[CorporateAction, ...]] = Field(None, description="List of corporate actions")
     post_market_time: Optional[int] = Field(None, description="Post-market time")
     regular_market_time: Optional[int] = Field(None, description="Regular market time")
     exchange: Optional[str] = Field(None, description="Exchange code")
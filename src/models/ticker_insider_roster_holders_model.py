@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class InsiderRosterHolderItem(BaseModel):
     """Insider roster holder item"""
+    model_config = ConfigDict(frozen=True)
+
     name: Optional[str] = Field(None, description="Name of the insider")
     position: Optional[str] = Field(None, description="Position of the insider")
     url: Optional[str] = Field(None, description="URL to the insider's profile")
@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class InsiderTransactionItem(BaseModel):
     """Insider transaction item"""
+    model_config = ConfigDict(frozen=True)
+
     shares: Optional[int] = Field(None, description="Number of shares")
     value: Optional[float] = Field(None, description="Transaction value")
     url: Optional[str] = Field(None, description="URL to transaction details")
@@ -1,10 +1,12 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 class LookupItem(BaseModel):
     """Lookup item"""
+    model_config = ConfigDict(frozen=True)
+
     symbol: Optional[str] = Field(None, description="Stock symbol")
     exchange: Optional[str] = Field(None, description="Exchange code")
     industry_link: Optional[str] = Field(None, description="Industry link")
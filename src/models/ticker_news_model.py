@@ -1,10 +1,13 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Tuple
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
+from src.common.util import freeze_nested
 from datetime import datetime
 
 
 class NewsThumbnailResolution(BaseModel):
     """News thumbnail resolution"""
+    model_config = ConfigDict(frozen=True)
+
     url: Optional[str] = Field(None, description="Image URL")
     width: Optional[int] = Field(None, description="Width in pixels")
     height: Optional[int] = Field(None, description="Height in pixels")
@@ -13,21 +16,27 @@ class NewsThumbnailResolution(BaseModel):
 
 class NewsThumbnail(BaseModel):
     """News thumbnail"""
+    model_config = ConfigDict(frozen=True)
+
     original_url: Optional[str] = Field(None, description="Original image URL")
     original_width: Optional[int] = Field(None, description="Original image width")
     original_height: Optional[int] = Field(None, description="Original image height")
     caption: Optional[str] = Field(None, description="Image caption")
-    resolutions: Optional[List[NewsThumbnailResolution]] = Field(None, description="List of resolutions")
+    resolutions: Optional[Tuple[NewsThumbnailResolution, ...]] = Field(None, description="List of resolutions")
 
 
 class NewsProvider(BaseModel):
     """News provider"""
+    model_config = ConfigDict(frozen=True)
+
     display_name: Optional[str] = Field(None, description="Display name")
     url: Optional[str] = Field(None, description="Provider URL")
 
 
 class NewsCanonicalUrl(BaseModel):
     """News canonical URL"""
+    model_config = ConfigDict(frozen=True)
+
     url: Optional[str] = Field(None, description="Canonical URL")
     site: Optional[str] = Field(None, description="Site name")
     region: Optional[str] = Field(None, description="Region")
@@ -36,6 +45,8 @@ class NewsCanonicalUrl(BaseModel):
 
 class NewsClickThroughUrl(BaseModel):
     """News click-through URL"""
+    model_config = ConfigDict(frozen=True)
+
     url: Optional[str] = Field(None, description="Click-through URL")
     site: Optional[str] = Field(None, description="Site name")
     region: Optional[str] = Field(None, description="Region")
@@ -44,22 +55,30 @@ class NewsClickThroughUrl(BaseModel):
 
 class NewsMetadata(BaseModel):
     """News metadata"""
+    model_config = ConfigDict(frozen=True)
+
     editors_pick: Optional[bool] = Field(None, description="Editor's pick flag")
 
 
 class NewsPremiumFinance(BaseModel):
     """News premium finance information"""
+    model_config = ConfigDict(frozen=True)
+
     is_premium_news: Optional[bool] = Field(None, description="Whether this is premium news")
     is_premium_free_news: Optional[bool] = Field(None, description="Whether this is free premium news")
 
 
 class NewsFinance(BaseModel):
     """News finance information"""
+    model_config = ConfigDict(frozen=True)
+
     premium_finance: Optional[NewsPremiumFinance] = Field(None, description="Premium finance information")
 
 
 class StorylineContent(BaseModel):
     """Storyline content"""
+    model_config = ConfigDict(frozen=True)
+
     id: Optional[str] = Field(None, description="Content ID")
     content_type: Optional[str] = Field(None, description="Content type")
     is_hosted: Optional[bool] = Field(None, description="Whether content is hosted")
@@ -74,11 +93,15 @@ class StorylineContent(BaseModel):
 
 class StorylineItem(BaseModel):
     """Storyline item"""
+    model_config = ConfigDict(frozen=True)
+
     content: Optional[StorylineContent] = Field(None, description="Storyline content")
 
 
 class NewsItem(BaseModel):
     """Single news item"""
+    model_config = ConfigDict(frozen=True)
+
     id: Optional[str] = Field(None, description="News ID")
     content_type: Optional[str] = Field(None, description="Content type")
     title: Optional[str] = Field(None, description="News title")
@@ -95,5 +118,5 @@ class NewsItem(BaseModel):
     click_through_url: Optional[NewsClickThroughUrl] = Field(None, description="Click-through URL")
     metadata: Optional[NewsMetadata] = Field(None, description="News metadata")
     finance: Optional[NewsFinance] = Field(None, description="Finance information")
-    storyline: Optional[dict] = Field(None, description="Storyline information")
+    storyline: Optional[Annotated[dict, AfterValidator(freeze_nested)]] = Field(None, description="Storyline information")
 
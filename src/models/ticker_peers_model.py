@@ -0,0 +1,31 @@
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class PeerMetricItem(BaseModel):
+    """A financial metric of a ticker compared with its peer group"""
+    model_config = ConfigDict(frozen=True)
+
+    name: Optional[str] = Field(None, description="Financial metric name")
+    value: Optional[float] = Field(None, description="Value of the ticker in its latest yearly statement")
+    percentile: Optional[float] = Field(None, description="Percentile rank of the value within the group, 0 to 100")
+    count: Optional[int] = Field(None, description="Peers with a value of the metric")
+    min: Optional[float] = Field(None, description="Minimum value in the group")
+    p25: Optional[float] = Field(None, description="25th percentile of the group")
+    median: Optional[float] = Field(None, description="Median of the group")
+    p75: Optional[float] = Field(None, description="75th percentile of the group")
+    max: Optional[float] = Field(None, description="Maximum value in the group")
+
+
+class PeerComparisonItem(BaseModel):
+    """Financial metrics of a ticker ranked within its sector or industry"""
+    model_config = ConfigDict(frozen=True)
+
+    symbol: Optional[str] = Field(None, description="Stock symbol")
+    level: Optional[str] = Field(None, description="Grouping level, sector or industry")
+    group: Optional[str] = Field(None, description="Sector or industry name")
+    sector: Optional[str] = Field(None, description="Sector of the company")
+    industry: Optional[str] = Field(None, description="Industry of the company")
+    peers: Optional[int] = Field(None, description="Tickers of the configured universe in the group")
+    refreshed_at: Optional[float] = Field(None, description="Time the last full refresh of the aggregates finished, Unix timestamp")
+    metrics: Optional[list[PeerMetricItem]] = Field(None, description="Metrics compared with the group")
@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class QuoteItem(BaseModel):
+    """Latest quote of a ticker"""
+    model_config = ConfigDict(frozen=True)
+
+    symbol: Optional[str] = Field(None, description="Stock symbol")
+    price: Optional[float] = Field(None, description="Last traded price")
+    previous_close: Optional[float] = Field(None, description="Previous close price")
+    change: Optional[float] = Field(None, description="Change from the previous close")
+    change_percent: Optional[float] = Field(None, description="Change from the previous close in percent")
+    open: Optional[float] = Field(None, description="Opening price of the current session")
+    day_high: Optional[float] = Field(None, description="Highest price of the current session")
+    day_low: Optional[float] = Field(None, description="Lowest price of the current session")
+    volume: Optional[int] = Field(None, description="Volume of the current session")
+    market_cap: Optional[float] = Field(None, description="Market capitalization")
+    currency: Optional[str] = Field(None, description="Trading currency")
+    exchange: Optional[str] = Field(None, description="Exchange code")
+    updated_at: Optional[str] = Field(None, description="Time the quote was fetched, UTC")
@@ -0,0 +1,132 @@
+import pytest
+from src.common.cache import cache
+from src.common.errors import DataError, NoDataError, RateLimitError
+
+
+def counting(error):
+    calls = []
+
+    @cache(timeout=60)
+    def func(symbol):
+        calls.append(symbol)
+        raise error
+
+    return func, calls
+
+
+@pytest.mark.parametrize('error', [NoDataError('no data'), DataError('bad input')])
+def test_data_errors_are_negative_cached(error):
+    func, calls = counting(error)
+    for _ in range(2):
+        with pytest.raises(type(error)):
+            func('AAPL')
+    assert calls == ['AAPL']
+    assert func.cache_info().negative_entries == 1
+
+
+@pytest.mark.parametrize('error', [ConnectionError('reset'), KeyError('close'), RateLimitError('slow down', 1)])
+def test_other_errors_are_not_cached(error):
+    func, calls = counting(error)
+    for _ in range(2):
+        with pytest.raises(type(error)):
+            func('AAPL')
+    assert calls == ['AAPL', 'AAPL']
+    assert func.cache_info().negative_entries == 0
+
+
+def test_items_are_part_of_a_hashable_key():
+    calls = []
+
+    @cache(timeout=60)
+    def financial_items(symbol, items=None, freq='yearly'):
+        calls.append(items)
+        return [symbol, items]
+
+    assert financial_items('aapl', ['market_cap', ' close', 'market_cap']) == ('AAPL', ('close', 'market_cap'))
+    assert financial_items('AAPL', ('close', 'market_cap')) == ('AAPL', ('close', 'market_cap'))
+    assert financial_items.cached('AAPL', 'market_cap,close') == ('AAPL', ('close', 'market_cap'))
+    assert calls == [('close', 'market_cap')]
+
+
+def test_on_load_runs_for_shared_tier_hits(tmp_path, monkeypatch):
+    from src.common import shared_cache
+    monkeypatch.setattr(shared_cache, 'SHARED_CACHE_PATH', str(tmp_path / 'shared.db'))
+    loaded = []
+
+    def process():
+        # 同名函数模拟另一个进程中的同一缓存函数
+        @cache(timeout=60, shared=True, on_load=lambda value, symbol: loaded.append((symbol, value)))
+        def info(symbol):
+            return {'symbol': symbol}
+
+        return info
+
+    first, second = process(), process()
+    first('AAPL')
+    first('AAPL')
+    assert second('AAPL') == {'symbol': 'AAPL'}
+    second('AAPL')
+    assert loaded == [('AAPL', {'symbol': 'AAPL'})] * 2
+
+
+def test_lookups_do_not_read_shared_invalidations(tmp_path, monkeypatch):
+    import time
+    from src.common import cache as cache_module, shared_cache
+    monkeypatch.setattr(shared_cache, 'SHARED_CACHE_PATH', str(tmp_path / 'shared.db'))
+    monkeypatch.setattr(cache_module, '_invalidation_id', None)
+
+    @cache(timeout=60, shared=True)
+    def quote(symbol):
+        return {'symbol': symbol}
+
+    cache_module._sync_invalidations()
+    quote('AAPL')
+    # 另一个进程记录的失效操作
+    shared_cache._connection().execute(
+        "INSERT INTO invalidations (pid, names, symbol, pattern, created_at) VALUES (?, ?, ?, ?, ?)",
+        (-1, quote.__qualname__, 'AAPL', None, time.time()))
+    with monkeypatch.context() as m:
+        m.setattr(shared_cache, 'invalidations_since', lambda *args: pytest.fail("lookup read the shared cache"))
+        assert quote.cached('AAPL') == {'symbol': 'AAPL'}
+    cache_module._sync_invalidations()
+    assert quote.cached('AAPL') is cache_module.MISSING
+
+
+def test_eviction_prefers_expired_then_lowest_score(monkeypatch):
+    from src.common import cache as cache_module
+    monkeypatch.setattr(cache_module, 'CACHE_MAX_BYTES', None)
+    store = cache_module._CacheStore('eviction-test', 60)
+    now = 1000.0
+
+    def entry(cost, expiration=now + 60):
+        return cache_module._CacheEntry('x', 100, cost, expiration)
+
+    store.add('cheap', entry(1.0))
+    store.add('costly', entry(5.0))
+    store.add('expired', entry(9.0, expiration=now - 1))
+    store.add('hot', entry(1.0))
+    # 命中后 score 增加，堆中的旧记录在出堆时更新
+    store.entries['hot'].hits += 10
+    order = []
+    while cache_module._evict_one([store], now):
+        order.append(len(store.entries))
+    assert order == [3, 2, 1, 0]
+    assert store.bytes == 0 and store.evictions == 4
+
+
+def test_global_budget_uses_a_running_byte_count(monkeypatch):
+    from src.common import cache as cache_module
+
+    @cache(timeout=60)
+    def frame(symbol):
+        return 'x' * 1000
+
+    size = cache_module.estimate_size('x' * 1000)
+    before = cache_module._total_bytes()
+    monkeypatch.setattr(cache_module, 'CACHE_MAX_BYTES', before + 3 * size)
+    for symbol in ('A', 'B', 'C', 'D'):
+        frame(symbol)
+    assert frame.cache_info().currsize == 3
+    assert cache_module._total_bytes() == before + 3 * size
+    frame.cache_clear()
+    assert cache_module._total_bytes() == before
@@ -0,0 +1,13 @@
+import json
+from src.common import clients
+
+
+def test_only_configured_clients_are_admins(monkeypatch):
+    monkeypatch.setattr(clients, 'API_CLIENTS', json.dumps([
+        {"name": "ops", "token": "t1", "admin": True},
+        {"name": "agent", "token": "t2"},
+    ]))
+    loaded = clients.load_clients()
+    assert loaded[clients.API_TOKEN].admin
+    assert loaded['t1'].admin
+    assert not loaded['t2'].admin
@@ -0,0 +1,33 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+from src.common.errors import DataError, DeadlineExceededError, NoDataError
+from src.common.fastapi_util import export_response
+
+
+def fetch(symbol):
+    if symbol == 'EMPTY':
+        return pd.DataFrame()
+    if symbol == 'GONE':
+        raise NoDataError(symbol)
+    if symbol == 'BAD':
+        raise DataError(symbol)
+    if symbol == 'BUG':
+        raise KeyError(symbol)
+    return pd.DataFrame({'close': [1.0, 2.0]}, index=pd.DatetimeIndex(['2025-01-02', '2025-01-03'], name='date'))
+
+
+def test_export_skips_failed_symbols():
+    response = export_response('prices', 'AAPL, EMPTY,GONE,BAD,BUG,MSFT', fetch, 'arrow')
+    assert response.headers['X-Missing-Symbols'] == 'EMPTY,GONE'
+    assert response.headers['X-Failed-Symbols'] == 'BAD,BUG'
+    table = pa.ipc.open_stream(response.body).read_all()
+    assert table.column('symbol').to_pylist() == ['AAPL', 'AAPL', 'MSFT', 'MSFT']
+
+
+def test_export_stops_at_deadline():
+    def expired(symbol):
+        raise DeadlineExceededError('deadline exceeded')
+
+    with pytest.raises(DeadlineExceededError):
+        export_response('prices', 'AAPL,MSFT', expired, 'parquet')
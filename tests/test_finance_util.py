@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.common.errors import DataError
+from src.common.finance_util import calculate_trailing, INCOME_STMT_STOCK_ITEMS
+
+QUARTER_ENDS = ['2024-03-31', '2024-06-30', '2024-09-30', '2024-12-31', '2025-03-31', '2025-06-30']
+
+
+def quarterly(dates=QUARTER_ENDS) -> pd.DataFrame:
+    index = pd.DatetimeIndex(dates, name='date')
+    return pd.DataFrame({'total_revenue': np.arange(1.0, len(index) + 1) * 100,
+                         'net_income': [10.0, np.nan, 10.0, 10.0, 10.0, 10.0][:len(index)],
+                         'diluted_average_shares': np.arange(1.0, len(index) + 1)},
+                        index=index).sort_index(ascending=False)
+
+
+def test_trailing_sums_four_quarters():
+    result = calculate_trailing(quarterly(), INCOME_STMT_STOCK_ITEMS)
+    assert list(result.index.strftime('%Y-%m-%d')) == ['2025-06-30', '2025-03-31', '2024-12-31']
+    assert list(result['total_revenue']) == [1800.0, 1400.0, 1000.0]
+    # 存量项目取最近一个季度，任一季度缺少的流量项目为空
+    assert list(result['diluted_average_shares']) == [6.0, 5.0, 4.0]
+    assert result['net_income'].tolist()[0] == 40.0
+    assert np.isnan(result['net_income'].tolist()[1:]).all()
+    assert list(result.columns) == ['total_revenue', 'net_income', 'diluted_average_shares']
+
+
+def test_trailing_skips_windows_with_missing_quarters():
+    # 缺少 2024-09-30，跨越该季度的 4 个报表日期超过一年，不能作为 TTM
+    dates = [date for date in QUARTER_ENDS if date != '2024-09-30']
+    result = calculate_trailing(quarterly(dates), INCOME_STMT_STOCK_ITEMS)
+    assert list(result.index.strftime('%Y-%m-%d')) == []
+    assert calculate_trailing(quarterly(QUARTER_ENDS[:3])).empty
+
+
+def test_trailing_statements_are_derived_from_quarterlies(monkeypatch):
+    from src.api import ticker
+    requested = []
+    statement = quarterly().T
+    statement.index = ['TotalRevenue', 'NetIncome', 'DilutedAverageShares']
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            pass
+
+        def get_income_stmt(self, freq, as_dict):
+            requested.append(freq)
+            return statement
+
+    monkeypatch.setattr(ticker.yf, 'Ticker', FakeTicker)
+    ticker.get_income_stmt_frame.cache_clear()
+    try:
+        result = ticker.get_income_stmt_frame('TTMTEST', 'trailing')
+        assert list(result['total_revenue']) == [1800.0, 1400.0, 1000.0]
+        assert ticker.get_income_stmt_frame('TTMTEST', 'trailing') is result
+        assert requested == ['quarterly']
+        with pytest.raises(DataError):
+            ticker.get_balance_sheet_frame('TTMTEST', 'trailing')
+    finally:
+        ticker.get_income_stmt_frame.cache_clear()
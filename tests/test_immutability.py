@@ -0,0 +1,118 @@
+import pickle
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from src.common.cache import cache, freeze
+from src.common.util import FrozenDict
+from src.models.ticker_info_model import TickerInfo
+from src.models.ticker_news_model import NewsItem
+
+
+def test_freeze_frame_is_read_only():
+    frame = freeze(pd.DataFrame({'close': [1.0, 2.0], 'volume': [10, 20]}))
+    with pytest.raises(ValueError):
+        frame.iloc[0, 0] = 5.0
+    with pytest.raises(ValueError):
+        frame['close'].to_numpy()[0] = 5.0
+    copy = frame.copy()
+    copy.iloc[0, 0] = 5.0
+    assert frame.iloc[0, 0] == 1.0
+
+
+def test_freeze_series_is_read_only():
+    series = freeze(pd.Series([1.0, 2.0]))
+    with pytest.raises(ValueError):
+        series.iloc[0] = 5.0
+
+
+def test_cached_frame_is_shared_read_only():
+    calls = []
+
+    @cache(timeout=60)
+    def frame(symbol):
+        calls.append(symbol)
+        return pd.DataFrame({'close': [1.0, 2.0]})
+
+    first = frame('AAPL')
+    assert frame('AAPL') is first
+    assert calls == ['AAPL']
+    with pytest.raises(ValueError):
+        first.iloc[0, 0] = 5.0
+
+
+def test_nested_model_fields_are_frozen():
+    info = TickerInfo(company_officers=[{'name': 'A'}], executive_team=[{'name': 'B', 'titles': ['CEO']}])
+    assert isinstance(info.company_officers, tuple)
+    assert isinstance(info.executive_team[0], FrozenDict)
+    assert info.executive_team[0]['titles'] == ('CEO',)
+    with pytest.raises(TypeError):
+        info.executive_team[0]['name'] = 'C'
+    with pytest.raises(ValidationError):
+        info.company_officers = ()
+    assert pickle.loads(pickle.dumps(info)) == info
+    assert info.model_dump(mode='json')['executive_team'] == [{'name': 'B', 'titles': ['CEO']}]
+
+
+def test_news_storyline_is_frozen():
+    content = NewsItem(storyline={'storylineItems': [{'content': {'id': '1'}}]})
+    assert isinstance(content.storyline, FrozenDict)
+    with pytest.raises(TypeError):
+        content.storyline['storylineItems'] = []
+    assert content.model_dump(mode='json')['storyline'] == {'storylineItems': [{'content': {'id': '1'}}]}
+
+
+
+def test_consumers_never_mutate_cached_frames(monkeypatch):
+    # 只读标记只保护数值，列、index、名称和 attrs 无法拦截，缓存结果的使用方不能原地修改它们
+    from src.api import ticker
+    from src.common import cache as cache_module
+    from src.common import export_util
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.history_metadata = {}
+
+        def history(self, interval, start, end, prepost, auto_adjust):
+            index = pd.bdate_range('2025-01-01', '2025-03-31', tz='America/New_York', name='Date')
+            close = pd.Series(range(len(index)), index=index, dtype=float) + 100
+            data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                                 'Adj Close': close * 0.99, 'Volume': 1000, 'Dividends': 0.0, 'Stock Splits': 0.0})
+            data.iloc[20, data.columns.get_loc('Dividends')] = 0.5
+            return data
+
+        def get_income_stmt(self, freq, as_dict):
+            dates = pd.to_datetime(['2025-06-30', '2025-03-31', '2024-12-31', '2024-09-30', '2024-06-30'])
+            return pd.DataFrame([[100.0] * 5, [10.0] * 5], index=['TotalRevenue', 'NetIncome'], columns=dates)
+
+    cached = []
+
+    def record(value):
+        value = freeze(value)
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            cached.append((value, value.copy(), dict(value.attrs)))
+        return value
+
+    monkeypatch.setattr(ticker.yf, 'Ticker', FakeTicker)
+    monkeypatch.setattr(cache_module, 'freeze', record)
+    functions = (ticker.get_ticker_raw_price_frame, ticker.get_ticker_indicator_frame, ticker.get_corporate_actions,
+                 ticker.get_income_stmt_frame, ticker.get_income_stmt)
+    try:
+        symbol, start, end = 'MUTTEST', '2025-02-01', '2025-03-31'
+        # 每个调用执行两次，分别覆盖写入缓存和命中缓存
+        for _ in range(2):
+            for interval in ('1d', '1wk'):
+                for adjust in (True, False):
+                    frame = ticker.get_ticker_price_frame(symbol, interval, start, end, adjust)
+                    export_util.concat_symbol_frames({symbol: frame})
+            export_util.concat_symbol_frames({symbol: ticker.get_ticker_raw_price_frame(symbol, '1d', start, end)})
+            ticker.get_ticker_indicator_frame(symbol, '1d', start, end)
+            ticker.get_corporate_actions(symbol, start, end)
+            ticker.get_statement_export_frame('income_stmt', symbol, 'trailing')
+        assert len(cached) >= 4
+        for value, snapshot, attrs in cached:
+            assert_equal = pd.testing.assert_frame_equal if isinstance(value, pd.DataFrame) else pd.testing.assert_series_equal
+            assert_equal(value, snapshot)
+            assert value.attrs == attrs
+    finally:
+        for function in functions:
+            function.cache_clear()
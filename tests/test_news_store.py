@@ -0,0 +1,114 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from src.common.cache import MISSING
+from src.common.errors import DataError, NoDataError
+from src.common.news_store import NewsStore
+
+
+def article(index: int):
+    return SimpleNamespace(id=f'id-{index}', pub_date=f'2025-07-{index:02d}T12:00:00Z')
+
+
+def test_concurrent_misses_share_one_fetch():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch(symbol, count):
+        calls.append(symbol)
+        started.set()
+        release.wait(5)
+        return [article(index) for index in range(10, 0, -1)]
+
+    store = NewsStore(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get('aapl', 5))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ['AAPL']
+    assert [[item.id for item in result] for result in results] == [['id-10', 'id-9', 'id-8', 'id-7', 'id-6']] * 4
+
+
+def test_data_errors_are_negative_cached():
+    calls = []
+
+    def fetch(symbol, count):
+        calls.append(symbol)
+        raise NoDataError(f"No news found for symbol: {symbol}")
+
+    store = NewsStore(fetch)
+    for _ in range(3):
+        with pytest.raises(NoDataError):
+            store.get('BAD')
+    assert calls == ['BAD']
+    assert store.invalidate('BAD') == 1
+    with pytest.raises(NoDataError):
+        store.get('BAD')
+    assert calls == ['BAD', 'BAD']
+
+
+def test_other_errors_are_not_cached():
+    calls = []
+
+    def fetch(symbol, count):
+        calls.append(symbol)
+        raise ConnectionError('reset')
+
+    store = NewsStore(fetch)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            store.get('AAPL')
+    assert calls == ['AAPL', 'AAPL']
+
+
+def test_invalid_since():
+    store = NewsStore(lambda symbol, count: [article(1)])
+    with pytest.raises(DataError):
+        store.get('AAPL', since='yesterday-ish')
+    assert [item.id for item in store.get('AAPL', since='2025-06-30')] == ['id-1']
+
+
+def test_cached_probe_does_not_fetch():
+    calls = []
+
+    def fetch(symbol, count):
+        calls.append(symbol)
+        return [article(index) for index in range(3, 0, -1)]
+
+    store = NewsStore(fetch)
+    assert store.cached('AAPL') is MISSING
+    store.get('aapl', 5)
+    assert [item.id for item in store.cached('AAPL', 1)] == ['id-3']
+    assert [item.id for item in store.cached('AAPL', 10)] == ['id-3', 'id-2', 'id-1']
+    assert calls == ['AAPL']
+
+
+def test_error_entries_are_evicted():
+    def fetch(symbol, count):
+        raise NoDataError(f"No news found for symbol: {symbol}")
+
+    store = NewsStore(fetch, max_symbols=2)
+    for symbol in ('BAD1', 'BAD2', 'BAD3'):
+        with pytest.raises(NoDataError):
+            store.get(symbol)
+    assert list(store._symbols) == ['BAD2', 'BAD3']
+
+
+def test_full_window_covers_larger_counts():
+    calls = []
+
+    def fetch(symbol, count):
+        calls.append(count)
+        return [article(index) for index in range(count, 0, -1)]
+
+    store = NewsStore(fetch, max_items=5)
+    assert len(store.get('AAPL', 8)) == 5
+    assert len(store.get('AAPL', 20)) == 5
+    assert len(store.cached('AAPL', 20)) == 5
+    assert calls == [8]
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.common import price_archive
+from src.common.errors import DataError
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_archive, 'PRICE_ARCHIVE_DIR', str(tmp_path))
+    monkeypatch.setattr(price_archive, '_mmaps', price_archive.OrderedDict())
+    return tmp_path
+
+
+def bars(start: str, count: int) -> pd.DataFrame:
+    index = pd.date_range(start, periods=count, freq='D', tz='America/New_York', name='date')
+    close = np.arange(count, dtype='float64') + 100
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': 1000.0, 'dividends': 0.0, 'stock_splits': 0.0}, index=index)
+
+
+@pytest.mark.parametrize('symbol, interval', [
+    ('../../etc/passwd', '1d'),
+    ('AAPL/../../x', '1d'),
+    ('AAPL', '../1d'),
+    ('AAPL', '7d'),
+    ('', '1d'),
+    ('AA PL', '1d'),
+])
+def test_archive_path_rejects_invalid_input(archive_dir, symbol, interval):
+    with pytest.raises(DataError):
+        price_archive._archive_path(symbol, interval)
+    with pytest.raises(DataError):
+        price_archive.read_frame(symbol, interval)
+
+
+def test_archive_path(archive_dir):
+    assert price_archive._archive_path('brk-b', '1H') == os.path.join(str(archive_dir), '60m', 'BRK-B.bars')
+    assert price_archive._archive_path('^gspc', '1d') == os.path.join(str(archive_dir), '1d', '^GSPC.bars')
+
+
+def test_open_archives_are_bounded(archive_dir, monkeypatch):
+    monkeypatch.setattr(price_archive, 'PRICE_ARCHIVE_MAX_OPEN', 2)
+    for symbol in ('AAA', 'BBB', 'CCC'):
+        price_archive.archive_bars(symbol, '1d', bars('2025-01-01', 5))
+        assert len(price_archive.read_frame(symbol, '1d')) == 5
+    assert len(price_archive._mmaps) == 2
+    assert list(price_archive._mmaps) == [price_archive._archive_path(symbol, '1d') for symbol in ('BBB', 'CCC')]
+
+
+def raw_bars(start: str, count: int, dividend_at: int = None) -> pd.DataFrame:
+    data = bars(start, count)
+    data['adj_close'] = data['close']
+    if dividend_at is not None:
+        data.iloc[dividend_at, data.columns.get_loc('dividends')] = 1.0
+        data.iloc[:dividend_at, data.columns.get_loc('adj_close')] *= 1 - 1.0 / data['close'].iloc[dividend_at - 1]
+    return data
+
+
+def test_archive_stores_unadjusted_bars_and_adjusts_on_read(archive_dir):
+    price_archive.archive_bars('AAPL', '1d', raw_bars('2025-01-01', 10, dividend_at=6))
+    raw = price_archive.read_frame('AAPL', '1d', '2025-01-03', '2025-01-06', adjust=False)
+    assert list(raw.columns) == list(price_archive.PRICE_COLUMNS)
+    assert list(raw['close']) == [102.0, 103.0, 104.0]
+    adjusted = price_archive.read_frame('AAPL', '1d', '2025-01-03', '2025-01-06')
+    assert list(adjusted.columns) == list(price_archive.PRICE_COLUMNS)
+    # 区间之后的分红同样计入复权
+    np.testing.assert_allclose(adjusted['close'], raw['close'] * (1 - 1.0 / 105.0))
+
+
+def test_legacy_adjusted_archive_is_replaced_not_merged(archive_dir):
+    path = price_archive._archive_path('AAPL', '1d')
+    os.makedirs(os.path.dirname(path))
+    legacy = bars('2025-01-01', 3)
+    with open(path, 'wb') as f:
+        f.write(price_archive.HEADER.pack(price_archive.LEGACY_MAGIC, len(legacy), b'America/New_York'))
+        f.write(legacy.index.tz_convert('UTC').as_unit('ns').asi8.tobytes())
+        for column in price_archive.LEGACY_COLUMNS:
+            f.write(legacy[column].to_numpy(dtype=np.float64).tobytes())
+    assert list(price_archive.read_frame('AAPL', '1d')['close']) == [100.0, 101.0, 102.0]
+    with pytest.raises(DataError):
+        price_archive.read_frame('AAPL', '1d', adjust=False)
+
+    price_archive.archive_bars('AAPL', '1d', raw_bars('2025-01-03', 2))
+    data = price_archive.read_frame('AAPL', '1d', adjust=False)
+    assert list(data.index.strftime('%Y-%m-%d')) == ['2025-01-03', '2025-01-04']
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from src.common.price_util import resample_prices, trading_session, indicator_start_date, trim_before, calculate_indicators, \
+    dividend_factors, adjust_prices, corporate_actions
+
+TZ = 'America/New_York'
+DAY = pd.Timestamp('2025-06-23', tz=TZ)
+# 上游 60m K 线（prepost=True）的起点：盘前从 04:00 起，常规交易从 09:30 起，盘后从 16:00 起
+UPSTREAM_60M = ['04:00', '05:00', '06:00', '07:00', '08:00', '09:00',
+                '09:30', '10:30', '11:30', '12:30', '13:30', '14:30', '15:30',
+                '16:00', '17:00', '18:00', '19:00']
+METADATA = {'currentTradingPeriod': {
+    'pre': {'start': DAY + pd.Timedelta(hours=4), 'end': DAY + pd.Timedelta(hours=9, minutes=30)},
+    'regular': {'start': DAY + pd.Timedelta(hours=9, minutes=30), 'end': DAY + pd.Timedelta(hours=16)},
+    'post': {'start': DAY + pd.Timedelta(hours=16), 'end': DAY + pd.Timedelta(hours=20)},
+}}
+
+
+def clock(time: str) -> pd.Timedelta:
+    return pd.Timedelta(time + ':00')
+
+
+def minute_bars(start: str, end: str, day=DAY) -> pd.DataFrame:
+    index = pd.date_range(day + clock(start), day + clock(end), freq='1min', inclusive='left')
+    close = np.arange(len(index), dtype='float64') + 100
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': np.ones(len(index)), 'dividends': 0.0, 'stock_splits': 0.0}, index=index)
+
+
+def upstream_bar(data: pd.DataFrame, start: str, end: str) -> dict:
+    """上游对 [start, end) 内 1m K 线的聚合"""
+    bars = data[(data.index >= DAY + clock(start)) & (data.index < DAY + clock(end))]
+    return {'open': bars['open'].iloc[0], 'high': bars['high'].max(), 'low': bars['low'].min(),
+            'close': bars['close'].iloc[-1], 'volume': bars['volume'].sum()}
+
+
+def test_trading_session():
+    assert trading_session(METADATA) == (pd.Timedelta(hours=4), pd.Timedelta(hours=9, minutes=30), pd.Timedelta(hours=16))
+    assert trading_session({}) == ()
+
+
+def test_intraday_buckets_match_upstream_sessions():
+    data = minute_bars('04:00', '20:00')
+    result = resample_prices(data, '60m', trading_session(METADATA))
+    assert [date.strftime('%H:%M') for date in result.index] == UPSTREAM_60M
+    boundaries = UPSTREAM_60M + ['20:00']
+    for start, end in zip(boundaries, boundaries[1:]):
+        bar = result.loc[DAY + clock(start)]
+        assert bar[['open', 'high', 'low', 'close', 'volume']].to_dict() == upstream_bar(data, start, end)
+
+
+def test_90m_buckets_do_not_cross_sessions():
+    result = resample_prices(minute_bars('04:00', '20:00'), '90m', trading_session(METADATA))
+    assert [date.strftime('%H:%M') for date in result.index] == [
+        '04:00', '05:30', '07:00', '08:30', '09:30', '11:00', '12:30', '14:00', '15:30', '16:00', '17:30', '19:00']
+
+
+def test_missing_first_minutes_keep_session_anchor():
+    result = resample_prices(minute_bars('09:33', '16:00'), '60m', trading_session(METADATA))
+    assert result.index[0].strftime('%H:%M') == '09:30'
+
+
+def test_lunch_break_starts_new_bucket():
+    day = pd.Timestamp('2025-06-23', tz='Asia/Hong_Kong')
+    data = pd.concat([minute_bars('09:30', '12:00', day), minute_bars('13:00', '16:00', day)])
+    session = (pd.Timedelta(hours=9, minutes=30), pd.Timedelta(hours=16))
+    for value in (session, ()):
+        result = resample_prices(data, '60m', value)
+        assert [date.strftime('%H:%M') for date in result.index] == ['09:30', '10:30', '11:30', '13:00', '14:00', '15:00']
+
+
+def daily_bars(start: str, end: str) -> pd.DataFrame:
+    index = pd.bdate_range(start, end, tz=TZ, inclusive='left')
+    close = 100 + np.sin(np.arange(len(index)) / 10) * 10
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': 1000.0, 'dividends': 0.0, 'stock_splits': 0.0}, index=index)
+
+
+def test_indicator_start_date():
+    assert indicator_start_date('2025-06-23', '1d', 14) == '2024-06-02'
+    assert indicator_start_date('2025-06-23', '1wk', 10) == '2024-04-14'
+    today = datetime.now()
+    start = (today - timedelta(days=2)).strftime('%Y-%m-%d')
+    # 日内周期只预热 window 根 K 线，且不早于上游可以获取的最长时间
+    # 14 根 5m K 线不超过一个交易日，折算为 2 个日历日，另加 3 天余量
+    assert indicator_start_date(start, '5m', 14) == (datetime.strptime(start, '%Y-%m-%d') - timedelta(days=5)).strftime('%Y-%m-%d')
+    assert indicator_start_date(start, '1m', 10000) == (today - timedelta(days=29)).strftime('%Y-%m-%d')
+    old = (today - timedelta(days=100)).strftime('%Y-%m-%d')
+    assert indicator_start_date(old, '5m', 14) == old
+
+
+def test_indicators_are_warmed_up_before_start(monkeypatch):
+    from src.api import ticker
+    history = daily_bars('2023-01-01', '2025-07-01')
+    requested = []
+
+    def price_frame(symbol, interval, start_date, end_date):
+        requested.append(start_date)
+        return trim_before(history, start_date)[lambda frame: frame.index < pd.Timestamp(end_date, tz=TZ)]
+
+    monkeypatch.setattr(ticker, 'get_ticker_price_frame', price_frame)
+    result = ticker.get_ticker_indicator_frame('AAPL', '1d', '2025-06-02', '2025-07-01', 14)
+    assert requested == [indicator_start_date('2025-06-02', '1d', 14)]
+    assert result.index[0] == pd.Timestamp('2025-06-02', tz=TZ)
+    expected = calculate_indicators(history, '1d', 14).loc[result.index]
+    pd.testing.assert_frame_equal(result[['sma', 'rsi', 'atr', 'volatility', 'high_52w', 'low_52w']],
+                                  expected[['sma', 'rsi', 'atr', 'volatility', 'high_52w', 'low_52w']])
+    assert result.notna().all().all()
+
+
+def raw_bars() -> pd.DataFrame:
+    index = pd.date_range('2025-03-03', periods=5, freq='D', tz='America/New_York', name='date')
+    close = pd.Series([100.0, 102.0, 100.0, 50.0, 51.0], index=index)
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1000.0,
+                         'dividends': [0.0, 0.0, 2.04, 0.0, 1.0], 'stock_splits': [0.0, 0.0, 0.0, 2.0, 0.0]},
+                        index=index)
+
+
+def test_dividend_factors():
+    # 除息日的系数 1 - 分红 / 前收盘价作用于除息日之前的 K 线
+    factors = dividend_factors(raw_bars())
+    np.testing.assert_allclose(factors, [0.98 * 0.98, 0.98 * 0.98, 0.98, 0.98, 1.0])
+    assert (dividend_factors(raw_bars().drop(columns='dividends')) == 1.0).all()
+
+
+def test_adjust_prices_anchors_to_upstream_adj_close():
+    data = raw_bars()
+    adjusted = adjust_prices(data)
+    assert 'adj_close' not in adjusted.columns
+    np.testing.assert_allclose(adjusted['close'], data['close'] * dividend_factors(data))
+    pd.testing.assert_series_equal(adjusted['volume'], data['volume'])
+    # 区间结束之后的分红由最后一根 K 线上游的复权比例计入
+    data['adj_close'] = data['close'] * 0.9
+    adjusted = adjust_prices(data)
+    np.testing.assert_allclose(adjusted['close'], data['close'] * dividend_factors(data) * 0.9)
+    np.testing.assert_allclose(adjusted['high'], data['high'] * dividend_factors(data) * 0.9)
+
+
+def test_corporate_actions():
+    actions = corporate_actions(raw_bars())
+    assert list(actions['action']) == ['dividend', 'split', 'dividend']
+    assert list(actions['value']) == [2.04, 2.0, 1.0]
+    assert list(actions['prev_close']) == [102.0, 100.0, 50.0]
+    np.testing.assert_allclose(actions['factor'], [0.98, 0.5, 0.98])
+    empty = corporate_actions(raw_bars().assign(dividends=0.0, stock_splits=0.0))
+    assert empty.empty and list(empty.columns) == ['action', 'value', 'prev_close', 'factor']
@@ -0,0 +1,31 @@
+import asyncio
+from types import SimpleNamespace
+from src.common import profiling
+from src.common.profiling import Profile, start_requested
+
+
+loop = asyncio.new_event_loop()
+
+
+def requested_state(client='default'):
+    profile = Profile('request', 0.005, '/api/v1/ticker/info', loop, None)
+    return SimpleNamespace(profile=profile, client=None if client is None else SimpleNamespace(name=client))
+
+
+def test_unauthenticated_requests_are_not_sampled():
+    state = requested_state(client=None)
+    assert not start_requested(state)
+    assert not state.profile.started
+
+
+def test_concurrent_requested_profiles_are_capped(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_MAX_CONCURRENT', 2)
+    monkeypatch.setattr(profiling, 'profiler', profiling.Profiler())
+    states = [requested_state() for _ in range(3)]
+    assert [start_requested(state) for state in states] == [True, True, False]
+    profiling.profiler.end(states[0].profile, keep=True)
+    state = requested_state()
+    assert start_requested(state)
+    for profile in (states[1].profile, states[2].profile, state.profile):
+        profiling.profiler.end(profile, keep=False)
+    assert [profile.id for profile in profiling.profiler.profiles()] == [states[0].profile.id]
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from src.common.clients import Client
+from src.common.errors import RateLimitError, OverloadedError
+from src.common.quote_stream import QuoteHub
+
+
+def test_subscriptions_are_limited_per_client_and_in_total():
+    async def run():
+        hub = QuoteHub(lambda symbol: None, interval=60, client_max_symbols=3, max_polled_symbols=4)
+        agent, backfill = Client(name='agent'), Client(name='backfill')
+        first = hub.subscribe(agent, ['AAPL', 'MSFT'])
+        with pytest.raises(RateLimitError):
+            hub.subscribe(agent, ['NVDA', 'TSLA'])
+        hub.subscribe(backfill, ['AAPL', 'NVDA', 'TSLA'])
+        with pytest.raises(OverloadedError):
+            hub.subscribe(agent, ['AMZN'])
+        # 已轮询的 symbol 不增加轮询数
+        hub.subscribe(agent, ['NVDA'])
+        # 取消订阅后释放客户端的订阅数和 MSFT 的轮询
+        hub.unsubscribe(first)
+        hub.subscribe(agent, ['AMZN', 'AAPL'])
+        assert sorted(hub._pollers) == ['AAPL', 'AMZN', 'NVDA', 'TSLA']
+        for poller in hub._pollers.values():
+            poller.cancel()
+
+    asyncio.run(run())
+
+
+def test_polls_are_charged_to_subscribing_clients_in_turn():
+    async def run():
+        hub = QuoteHub(lambda symbol: None)
+        agent, backfill = Client(name='agent'), Client(name='backfill')
+        hub.subscribe(agent, ['AAPL'])
+        hub.subscribe(agent, ['AAPL'])
+        hub.subscribe(backfill, ['AAPL'])
+        for poller in hub._pollers.values():
+            poller.cancel()
+        return [hub._poll_client('AAPL', polls).name for polls in range(4)]
+
+    assert asyncio.run(run()) == ['agent', 'backfill', 'agent', 'backfill']
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.common import scheduler as scheduler_module
+from src.common.clients import Client
+from src.common.errors import ClientDisconnectedError
+from src.common.scheduler import request_lane
+
+
+def request(lane: str, header: str = None):
+    headers = {'x-request-lane': header} if header else {}
+    return SimpleNamespace(headers=headers, state=SimpleNamespace(client=Client(name='c', token='t', lane=lane)))
+
+
+@pytest.mark.parametrize('client_lane, default, header, expected', [
+    ('interactive', None, None, 'interactive'),
+    ('interactive', None, 'bulk', 'bulk'),
+    ('interactive', 'bulk', None, 'bulk'),
+    ('interactive', 'bulk', 'interactive', 'bulk'),
+    ('bulk', None, 'interactive', 'bulk'),
+    ('bulk', None, 'INTERACTIVE', 'bulk'),
+    ('bulk', 'interactive', None, 'bulk'),
+    ('interactive', None, 'unknown', 'interactive'),
+])
+def test_header_can_only_lower_the_lane(client_lane, default, header, expected):
+    assert request_lane(request(client_lane, header), default) == expected
+
+
+def test_slots_acquired_during_disconnect_check_are_released(monkeypatch):
+    """排队在检查客户端连接状态期间完成时，放弃执行需要释放刚获取的名额"""
+    client = Client(name='c', token='t')
+    held = []
+    released = []
+
+    async def scenario():
+        may_acquire = asyncio.Event()
+
+        async def acquire(route, client, lane):
+            await may_acquire.wait()
+            held.append((route, lane))
+
+        async def is_disconnected():
+            may_acquire.set()
+            while not held:
+                await asyncio.sleep(0)
+            return True
+
+        monkeypatch.setattr(scheduler_module, '_acquire', acquire)
+        monkeypatch.setattr(scheduler_module, 'DISCONNECT_POLL_INTERVAL', 0.01)
+        monkeypatch.setattr(scheduler_module.scheduler, 'release', lambda *args: released.append(('scheduler', *args)))
+        monkeypatch.setattr(scheduler_module.admission, 'release', lambda *args: released.append(('admission', *args)))
+        request = SimpleNamespace(is_disconnected=is_disconnected)
+        with pytest.raises(ClientDisconnectedError):
+            await scheduler_module._wait_queued(request, '/route', client, 'interactive')
+
+    asyncio.run(scenario())
+    assert held == [('/route', 'interactive')]
+    assert released == [('scheduler', client, 'interactive', 0.0), ('admission', '/route')]
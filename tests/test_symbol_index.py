@@ -0,0 +1,59 @@
+from src.common.symbol_index import SymbolIndex
+from src.models.ticker_lookup_model import LookupItem
+
+
+def item(symbol, name, rank=None):
+    return LookupItem(symbol=symbol, short_name=name, rank=rank)
+
+
+def index_of(*items):
+    index = SymbolIndex()
+    index.add(items)
+    return index
+
+
+def test_exact_matches():
+    index = index_of(item('BAC', 'Bank of America Corporation'), item('601988.SS', 'Bank of China Limited'))
+    assert index.match('BAC')[1]
+    assert index.match('601988')[1]
+    assert index.match('BANK OF CHINA, Limited')[1]
+    items, exact = index.match('bank of')
+    assert not exact
+    assert {found.symbol for found in items} == {'BAC', '601988.SS'}
+
+
+def test_incremental_add_keeps_entries_sorted():
+    index = index_of(item('AAPL', 'Apple Inc.'), item('MSFT', 'Microsoft Corporation'))
+    index.add([item('AMZN', 'Amazon.com, Inc.'), item('MSFT', 'Microsoft Corp')])
+    assert index._entries == sorted(index._entries)
+    assert ('corporation', 'MSFT') not in index._entries
+    assert ('corp', 'MSFT') in index._entries
+    assert [found.symbol for found in index.search('amaz')] == ['AMZN']
+    assert index.search('microsoft corporation') == []
+    assert index.match('microsoft corp')[1]
+
+
+def test_cjk_index_and_class_share_queries():
+    index = index_of(item('601988.SS', '中国银行'), item('^GSPC', 'S&P 500'), item('BRK-B', 'Berkshire Hathaway Inc.'),
+                     item('GLE.PA', 'Société Générale'))
+    items, exact = index.match('中国银行')
+    assert exact and [found.symbol for found in items] == ['601988.SS']
+    assert [found.symbol for found in index.search('中国')] == ['601988.SS']
+    items, exact = index.match('^gspc')
+    assert exact and [found.symbol for found in items] == ['^GSPC']
+    items, exact = index.match('brk-b')
+    assert exact and [found.symbol for found in items] == ['BRK-B']
+    assert [found.symbol for found in index.search('SOCIÉTÉ')] == ['GLE.PA']
+
+
+def test_upstream_receives_the_original_query():
+    from src.api import ticker
+    queries = []
+
+    def fetch_upstream(query):
+        queries.append(query)
+        return []
+
+    for query in (' 中国银行 ', '^GSPC', 'BRK-B', 'Société Générale'):
+        ticker._lookup_ticker(query, fetch_upstream)
+    assert queries == ['中国银行', '^GSPC', 'BRK-B', 'Société Générale']